@@ -1,3 +1,4 @@
+from .asynchronous import AsyncBrowser, async_browsers
 from .core import *
 from .integration import IntegrationTest, IntegrationTestBase
 from .settings import *
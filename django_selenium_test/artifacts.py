@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import base64
+import json
+import os
+import queue
+import re
+import threading
+import zipfile
+from io import BytesIO
+from multiprocessing.util import Finalize
+from typing import TYPE_CHECKING, NamedTuple
+
+from django.conf import settings
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional, Tuple
+
+# stops the writer thread
+_STOP = object()
+
+
+class FailureArtifacts(NamedTuple):
+    """What the browser showed when a test failed, as received from the driver"""
+
+    test_id: str
+    traceback: str
+    url: Optional[str]
+    screenshot: Optional[str]  # a base64 encoded png
+    page_source: Optional[str]
+    console: Optional[List[Dict[str, Any]]]
+
+
+class FailureArtifactWriter(object):
+    """
+    Writes the artifacts of failed tests into a zip file per test, using a background thread.
+
+    At most max_pending captures wait to be written at any time; further ones are dropped instead of making the
+    test wait. Every part of a capture is limited to max_size bytes, and nothing is written anymore once this
+    process has written max_total_size bytes.
+    """
+
+    max_pending = 8
+
+    _writers: Dict[Tuple[str, int, int], FailureArtifactWriter] = {}
+    _writers_lock = threading.Lock()
+
+    def __init__(self, directory: str, max_size: int, max_total_size: int) -> None:
+        self.directory = directory
+        self.max_size = max_size
+        self.max_total_size = max_total_size
+
+        self.queue: queue.Queue = queue.Queue(maxsize=self.max_pending)
+        self.thread: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+
+        # statistics of this process
+        self.written_size = 0
+        self.written = 0
+        self.dropped = 0
+
+    @classmethod
+    def from_settings(cls) -> Optional[FailureArtifactWriter]:
+        """Returns the writer configured by SELENIUM_FAILURE_ARTIFACTS, or None if capturing failures is disabled"""
+
+        directory = getattr(settings, "SELENIUM_FAILURE_ARTIFACTS", None)
+        if not directory:
+            return None
+        key = (
+            directory,
+            getattr(settings, "SELENIUM_FAILURE_ARTIFACTS_MAX_SIZE", 5 * 1024 * 1024),
+            getattr(
+                settings, "SELENIUM_FAILURE_ARTIFACTS_MAX_TOTAL_SIZE", 500 * 1024 * 1024
+            ),
+        )
+        with cls._writers_lock:
+            writer = cls._writers.get(key)
+            if writer is None:
+                writer = cls(*key)
+                cls._writers[key] = writer
+            return writer
+
+    @classmethod
+    def flush_all(cls) -> None:
+        """Waits until all writers of this process have written everything submitted so far"""
+        with cls._writers_lock:
+            writers = list(cls._writers.values())
+        for writer in writers:
+            writer.flush()
+
+    def submit(self, artifacts: FailureArtifacts) -> bool:
+        """Queues artifacts for writing, and returns False if they had to be dropped instead"""
+
+        self._start()
+        try:
+            self.queue.put_nowait(artifacts)
+        except queue.Full:
+            with self.lock:
+                self.dropped += 1
+            return False
+        return True
+
+    def flush(self) -> None:
+        if self.thread is not None:
+            self.queue.join()
+
+    def close(self) -> None:
+        """Writes everything submitted so far, and stops the writer thread"""
+        with self.lock:
+            thread, self.thread = self.thread, None
+        if thread is not None:
+            self.queue.put(_STOP)
+            thread.join()
+
+    def _start(self) -> None:
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(
+                target=self._run, name="failure-artifacts", daemon=True
+            )
+            self.thread.start()
+
+        # like the browser, parallel workers do not run 'atexit' hooks but do run finalizers
+        Finalize(None, self.close, exitpriority=0)
+
+    def _run(self) -> None:
+        while True:
+            artifacts = self.queue.get()
+            try:
+                if artifacts is _STOP:
+                    return
+                self.write(artifacts)
+            except Exception:
+                # e.g. a full disk; the test has already been reported as failed
+                with self.lock:
+                    self.dropped += 1
+            finally:
+                self.queue.task_done()
+
+    def write(self, artifacts: FailureArtifacts) -> Optional[str]:
+        """Compresses and writes artifacts, and returns the path written to, or None if over the total size"""
+
+        notes = []
+
+        def limit(name: str, data: Optional[bytes]) -> Optional[bytes]:
+            if data is not None and len(data) > self.max_size:
+                notes.append(
+                    "{} cut from {} to {} bytes".format(name, len(data), self.max_size)
+                )
+                return data[: self.max_size]
+            return data
+
+        screenshot = None
+        if artifacts.screenshot is not None:
+            screenshot = base64.b64decode(artifacts.screenshot)
+            if len(screenshot) > self.max_size:
+                # a partial png is of no use
+                notes.append("screenshot of {} bytes omitted".format(len(screenshot)))
+                screenshot = None
+
+        page_source = limit(
+            "page source",
+            None
+            if artifacts.page_source is None
+            else artifacts.page_source.encode("utf8"),
+        )
+        console = limit(
+            "console",
+            None
+            if artifacts.console is None
+            else json.dumps(artifacts.console, indent=2).encode("utf8"),
+        )
+
+        failure = "{}\n\nurl: {}\n\n{}".format(
+            artifacts.test_id, artifacts.url, artifacts.traceback
+        )
+        if notes:
+            failure += "\n" + "\n".join(notes) + "\n"
+
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("failure.txt", failure)
+            if screenshot is not None:
+                # already compressed
+                archive.writestr(
+                    "screenshot.png", screenshot, compress_type=zipfile.ZIP_STORED
+                )
+            if page_source is not None:
+                archive.writestr("page.html", page_source)
+            if console is not None:
+                archive.writestr("console.json", console)
+        data = buffer.getvalue()
+
+        with self.lock:
+            if self.written_size + len(data) > self.max_total_size:
+                self.dropped += 1
+                return None
+            self.written_size += len(data)
+            self.written += 1
+
+        os.makedirs(self.directory, exist_ok=True)
+        name = re.sub(r"[^\w.\[\]=-]+", "_", artifacts.test_id)
+        path = os.path.join(self.directory, name + ".zip")
+        counter = 1
+        while os.path.exists(path):
+            counter += 1
+            path = os.path.join(self.directory, "{}-{}.zip".format(name, counter))
+
+        # never leave a partial file behind
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+        return path
@@ -0,0 +1,685 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import socket
+import time
+from base64 import b64encode
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from typing import TYPE_CHECKING
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+
+from selenium.common.exceptions import (
+    JavascriptException,
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.errorhandler import ErrorHandler
+
+from .core import (
+    _WAIT_SCRIPT_SLICE,
+    WebDriverPool,
+    _parse_named_conditions,
+    _wait_result,
+    _wait_script,
+)
+from .instrumentation import CommandRecorder
+from .integration import _FILL_OUT_FORM_SCRIPT, _IS_MARKED_SCRIPT, _MARK_PAGE_SCRIPT
+
+if TYPE_CHECKING:
+    from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+    from selenium.webdriver.remote.webdriver import WebDriver
+
+    from .core import WaitResult
+    from .integration import IntegrationTestBase
+
+# key identifying element references in the W3C protocol
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+
+
+def _executor_url(driver: WebDriver) -> str:
+    """Returns the url of the WebDriver server a driver sends its commands to"""
+
+    executor = driver.command_executor
+    client_config = getattr(executor, "_client_config", None)
+    if client_config is not None:
+        return client_config.remote_server_addr
+    return executor._url
+
+
+class AsyncWebDriverConnection(object):
+    """
+    A keep-alive connection to a WebDriver server, sending commands from a coroutine.
+
+    Requests are made using http.client in a thread of the connection's own. Every session should use a connection
+    of its own, so that the commands of different sessions can be in flight at the same time.
+    """
+
+    # seconds to wait for the response to a single command
+    timeout: float = 120
+
+    def __init__(self, url: str) -> None:
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.ssl = parts.scheme == "https"
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/")
+
+        self.headers = {
+            "Accept": "application/json",
+            "Content-Type": "application/json;charset=UTF-8",
+            "Connection": "keep-alive",
+        }
+        if parts.username:
+            credentials = "{}:{}".format(
+                unquote(parts.username), unquote(parts.password or "")
+            )
+            self.headers["Authorization"] = "Basic " + b64encode(
+                credentials.encode("utf8")
+            ).decode("ascii")
+
+        self.connection: Optional[HTTPConnection] = None
+
+        # created on first use, the lock to belong to the event loop running the commands
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.lock: Optional[asyncio.Lock] = None
+
+    async def request(
+        self, name: str, method: str, path: str, payload: Optional[Any] = None
+    ) -> Any:
+        """
+        Sends the command called name, and returns the value of its response.
+        Raises the WebDriverException matching the error reported by the server, if any.
+        """
+
+        body = b"" if payload is None else json.dumps(payload).encode("utf8")
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+
+        start = time.perf_counter()
+        async with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="async-webdriver"
+                )
+            try:
+                status, data = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, self._exchange, method, self.prefix + path, body
+                )
+            except socket.timeout:
+                raise TimeoutException(
+                    "No response to {} within {} seconds".format(name, self.timeout)
+                )
+
+        if CommandRecorder.enabled():
+            CommandRecorder.record(
+                name, time.perf_counter() - start, len(body), len(data)
+            )
+
+        # the same check the synchronous driver uses
+        if status >= 300:
+            ErrorHandler().check_response(
+                {"status": status, "value": data.decode("utf8", "replace")}
+            )
+        return json.loads(data)["value"] if data else None
+
+    def _exchange(self, method: str, path: str, body: bytes) -> Tuple[int, bytes]:
+        while True:
+            reused = self.connection is not None
+            if not reused:
+                connection_class = HTTPSConnection if self.ssl else HTTPConnection
+                self.connection = connection_class(
+                    self.host, self.port, timeout=self.timeout
+                )
+
+            try:
+                self.connection.request(method, path, body, self.headers)
+                response = self.connection.getresponse()
+                data = response.read()
+            except (ConnectionError, HTTPException):
+                # the server may have closed an idle connection; retry once on a new one
+                self._close()
+                if not reused:
+                    raise
+                continue
+            except socket.timeout:
+                # the response might still arrive, and be mistaken for the next one
+                self._close()
+                raise
+
+            if response.will_close:
+                self._close()
+            return response.status, data
+
+    def _close(self) -> None:
+        connection, self.connection = self.connection, None
+        if connection is not None:
+            connection.close()
+
+    async def close(self) -> None:
+        executor, self.executor = self.executor, None
+        if executor is None:
+            self._close()
+            return
+        await asyncio.get_running_loop().run_in_executor(executor, self._close)
+        executor.shutdown(wait=False)
+
+
+class AsyncWebElement(object):
+    """An element found by an AsyncBrowser; like a WebElement, but reading or changing it is awaitable"""
+
+    def __init__(self, browser: AsyncBrowser, id_: str) -> None:
+        self.browser = browser
+        self.id = id_
+
+    def __repr__(self) -> str:
+        return "<{} {!r}>".format(self.__class__.__name__, self.id)
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, AsyncWebElement) and self.id == other.id
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+    async def _command(
+        self, name: str, method: str, path: str, payload: Optional[Any] = None
+    ) -> Any:
+        return await self.browser.command(
+            name, method, "/element/{}{}".format(self.id, path), payload
+        )
+
+    async def click(self) -> None:
+        await self._command("clickElement", "POST", "/click", {})
+
+    async def clear(self) -> None:
+        await self._command("clearElement", "POST", "/clear", {})
+
+    async def send_keys(self, *value: str) -> None:
+        text = "".join(value)
+        await self._command(
+            "sendKeysToElement", "POST", "/value", {"text": text, "value": list(text)}
+        )
+
+    async def text(self) -> str:
+        return await self._command("getElementText", "GET", "/text")
+
+    async def is_displayed(self) -> bool:
+        return await self._command("isElementDisplayed", "GET", "/displayed")
+
+    async def is_enabled(self) -> bool:
+        return await self._command("isElementEnabled", "GET", "/enabled")
+
+    async def is_selected(self) -> bool:
+        return await self._command("isElementSelected", "GET", "/selected")
+
+    async def get_property(self, name: str) -> Any:
+        return await self._command("getElementProperty", "GET", "/property/" + name)
+
+    async def get_dom_attribute(self, name: str) -> Optional[str]:
+        return await self._command("getElementAttribute", "GET", "/attribute/" + name)
+
+
+class AsyncBrowser(object):
+    """
+    Drives a single WebDriver session from a coroutine, without blocking the event loop.
+
+    Offers awaitable equivalents of the helpers of IntegrationTest, using the urls and defaults of the test case it
+    belongs to. Commands of different browsers are in flight at the same time, e.g. when awaited using
+    asyncio.gather(). A session only ever drives one window, so start a browser for every tab that should make
+    progress on its own.
+    """
+
+    def __init__(
+        self,
+        test: IntegrationTestBase,
+        connection: AsyncWebDriverConnection,
+        session_id: str,
+        capabilities: Dict[str, Any],
+        owned: bool = False,
+        driver: Optional[WebDriver] = None,
+    ) -> None:
+        self.test = test
+        self.connection = connection
+        self.session_id = session_id
+        self.capabilities = capabilities
+
+        # if the session was started by this browser, and should be ended by close()
+        self.owned = owned
+
+        # a driver started for this browser alone, quit by close()
+        self.driver = driver
+
+    @classmethod
+    def attach(cls, test: IntegrationTestBase) -> AsyncBrowser:
+        """Drives the session of test.selenium; it should not be used by the test while this browser is busy"""
+
+        driver = test.selenium
+        return cls(
+            test,
+            AsyncWebDriverConnection(_executor_url(driver)),
+            driver.session_id,
+            driver.capabilities,
+        )
+
+    @classmethod
+    async def start(cls, test: IntegrationTestBase) -> AsyncBrowser:
+        """
+        Starts a new session on the WebDriver server of test.selenium, e.g. a second browser window.
+        It uses the options and blocked urls of SELENIUM_WEBDRIVERS, but a new empty profile.
+
+        geckodriver only allows a single session, so for Firefox a new driver and browser is started instead.
+        """
+
+        driver = test.selenium
+        if driver.capabilities.get("browserName") == "firefox":
+            return await cls._start_driver(test)
+
+        connection = AsyncWebDriverConnection(_executor_url(driver))
+        response = await connection.request(
+            "newSession",
+            "POST",
+            "/session",
+            {
+                "capabilities": {
+                    "alwaysMatch": _session_capabilities(driver),
+                    "firstMatch": [{}],
+                }
+            },
+        )
+        browser = cls(
+            test,
+            connection,
+            response["sessionId"],
+            response["capabilities"],
+            owned=True,
+        )
+
+        try:
+            config = WebDriverPool.driver_config() or {}
+            for command, params in config.get("devtools", []):
+                await browser.command(
+                    "executeCdpCommand",
+                    "POST",
+                    "/goog/cdp/execute",
+                    {"cmd": command, "params": params},
+                )
+            await browser._resize_like(test)
+        except BaseException:
+            await browser.close()
+            raise
+        return browser
+
+    @classmethod
+    async def _start_driver(cls, test: IntegrationTestBase) -> AsyncBrowser:
+        """Starts a driver of SELENIUM_WEBDRIVERS for the new browser alone"""
+
+        driver = await asyncio.get_running_loop().run_in_executor(
+            None, WebDriverPool._create_driver
+        )
+        if driver is None:
+            raise WebDriverException("SELENIUM_WEBDRIVERS is not configured")
+
+        browser = cls(
+            test,
+            AsyncWebDriverConnection(_executor_url(driver)),
+            driver.session_id,
+            driver.capabilities,
+            driver=driver,
+        )
+        try:
+            await browser._resize_like(test)
+        except BaseException:
+            await browser.close()
+            raise
+        return browser
+
+    async def _resize_like(self, test: IntegrationTestBase) -> None:
+        """Gives the window the same size as the window of the test"""
+        size = test.selenium.__dict__.get("_window_size")
+        if size is not None:
+            await self.command(
+                "setWindowRect",
+                "POST",
+                "/window/rect",
+                {"width": size[0], "height": size[1]},
+            )
+
+    async def close(self) -> None:
+        """Ends the session if it was started by this browser, and closes the connection to the server"""
+
+        try:
+            if self.driver is not None:
+                driver, self.driver = self.driver, None
+                await asyncio.get_running_loop().run_in_executor(None, driver.quit)
+            elif self.owned:
+                self.owned = False
+                await self.connection.request(
+                    "quit", "DELETE", "/session/" + self.session_id
+                )
+        finally:
+            await self.connection.close()
+
+    async def __aenter__(self) -> AsyncBrowser:
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+    # commands
+
+    async def command(
+        self, name: str, method: str, path: str, payload: Optional[Any] = None
+    ) -> Any:
+        """Sends a command to the session, given by its path relative to the session, and returns its result"""
+
+        value = await self.connection.request(
+            name,
+            method,
+            "/session/{}{}".format(self.session_id, path),
+            self._encode(payload),
+        )
+        return self._decode(value)
+
+    def _encode(self, value: Any) -> Any:
+        if isinstance(value, AsyncWebElement):
+            return {ELEMENT_KEY: value.id}
+        if isinstance(value, (list, tuple)):
+            return [self._encode(v) for v in value]
+        if isinstance(value, dict):
+            return {k: self._encode(v) for (k, v) in value.items()}
+        return value
+
+    def _decode(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            if ELEMENT_KEY in value:
+                return AsyncWebElement(self, value[ELEMENT_KEY])
+            return {k: self._decode(v) for (k, v) in value.items()}
+        if isinstance(value, list):
+            return [self._decode(v) for v in value]
+        return value
+
+    async def get(self, url: str) -> None:
+        await self.command("get", "POST", "/url", {"url": url})
+
+    async def current_url(self) -> str:
+        return await self.command("getCurrentUrl", "GET", "/url")
+
+    async def execute_script(self, script: str, *args: Any) -> Any:
+        return await self.command(
+            "executeScript", "POST", "/execute/sync", {"script": script, "args": args}
+        )
+
+    async def execute_async_script(self, script: str, *args: Any) -> Any:
+        return await self.command(
+            "executeAsyncScript",
+            "POST",
+            "/execute/async",
+            {"script": script, "args": args},
+        )
+
+    async def locate(
+        self, by: str = By.ID, value: Optional[str] = None
+    ) -> AsyncWebElement:
+        """Finds an element right away, like WebDriver.find_element"""
+
+        # like selenium, translate the locators the W3C protocol does not know into css
+        if by == By.ID:
+            by, value = By.CSS_SELECTOR, '[id="{}"]'.format(value)
+        elif by == By.CLASS_NAME:
+            by, value = By.CSS_SELECTOR, ".{}".format(value)
+        elif by == By.NAME:
+            by, value = By.CSS_SELECTOR, '[name="{}"]'.format(value)
+        return await self.command(
+            "findElement", "POST", "/element", {"using": by, "value": value}
+        )
+
+    # waits
+
+    async def wait_for_conditions(
+        self,
+        conditions: List[Tuple[str, str, str, Optional[str], bool]],
+        timeout: float,
+        mode: str = "all",
+    ) -> Tuple[List[bool], List[Optional[AsyncWebElement]]]:
+        """Waits until any or all of the given conditions hold, like django_selenium_test.core._wait_for_conditions"""
+
+        deadline = time.monotonic() + timeout
+        conditions = [list(condition) for condition in conditions]
+
+        if getattr(settings, "SELENIUM_WAIT_IN_BROWSER", True):
+            script = _wait_script()
+            while True:
+                remaining = max(0, min(deadline - time.monotonic(), _WAIT_SCRIPT_SLICE))
+                try:
+                    result = await self.execute_async_script(
+                        script, conditions, mode, int(remaining * 1000)
+                    )
+                except WebDriverException:
+                    break
+                if result is not None:
+                    return result[0], result[1]
+                if time.monotonic() >= deadline:
+                    raise TimeoutException()
+
+        while True:
+            results = [await self._check_condition(c) for c in conditions]
+            matched = [ok for (ok, _) in results]
+            if (any if mode == "any" else all)(matched):
+                return matched, [element for (_, element) in results]
+            if time.monotonic() >= deadline:
+                raise TimeoutException()
+            await asyncio.sleep(0.5)
+
+    async def _check_condition(
+        self, condition: List[Any]
+    ) -> Tuple[bool, Optional[AsyncWebElement]]:
+        by, value, kind, text, negate = condition
+        try:
+            element = await self.locate(by, value)
+            if kind == "exists":
+                ok = True
+            elif kind == "displayed":
+                ok = await element.is_displayed()
+            elif kind == "contains":
+                ok = text in await element.text()
+            else:
+                ok = await element.is_displayed() and await element.is_enabled()
+        except (NoSuchElementException, StaleElementReferenceException):
+            element, ok = None, False
+
+        if negate:
+            ok = not ok
+        return ok, element if ok else None
+
+    async def wait_for_any(
+        self, conditions: Dict[str, Tuple[Any, ...]], timeout: Optional[float] = None
+    ) -> WaitResult:
+        """Waits until any of the given conditions holds, see IntegrationTest.wait_for_any"""
+        return await self._wait_for_named_conditions(conditions, timeout, "any")
+
+    async def wait_for_all(
+        self, conditions: Dict[str, Tuple[Any, ...]], timeout: Optional[float] = None
+    ) -> WaitResult:
+        """Waits until all of the given conditions hold, see IntegrationTest.wait_for_all"""
+        return await self._wait_for_named_conditions(conditions, timeout, "all")
+
+    async def wait_until(
+        self,
+        element: Any,
+        kind: str,
+        text: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> Optional[AsyncWebElement]:
+        """
+        Waits until a single condition holds, like the wait_until_* methods of PageElement.
+        element is a PageElement, a locator tuple or a CSS selector; kind is one of WAIT_CONDITIONS.
+        Returns the element matched, if any.
+        """
+        condition = (element, kind) if text is None else (element, kind, text)
+        result = await self._wait_for_named_conditions(
+            {"element": condition}, timeout, "all"
+        )
+        return result.element
+
+    async def _wait_for_named_conditions(
+        self,
+        conditions: Dict[str, Tuple[Any, ...]],
+        timeout: Optional[float],
+        mode: str,
+    ) -> WaitResult:
+        if timeout is None:
+            timeout = self.test.__class__.find_element_timeout
+        names, parsed = _parse_named_conditions(conditions)
+        matched, elements = await self.wait_for_conditions(parsed, timeout, mode)
+        return _wait_result(names, matched, elements)
+
+    # equivalents of the IntegrationTest helpers
+
+    async def find_element(
+        self,
+        selector: Optional[str] = None,
+        timeout: Optional[float] = None,
+        clickable: bool = False,
+    ) -> AsyncWebElement:
+        """Finds an element by a selector and waits for it to become available, see IntegrationTest.find_element"""
+
+        if timeout is None:
+            timeout = self.test.__class__.find_element_timeout
+        if selector is None:
+            if self.test.__class__.find_element_selector is None:
+                raise Exception("find_element_selector may not be None")
+            selector = self.test.__class__.find_element_selector
+
+        kind = "clickable" if clickable else "displayed"
+        _, elements = await self.wait_for_conditions(
+            [(By.CSS_SELECTOR, selector, kind, None, False)], timeout
+        )
+        return elements[0]
+
+    async def load_live_url(
+        self,
+        url_pattern: str,
+        selector: Optional[str] = None,
+        url_args: Optional[List[Any]] = None,
+        url_kwargs: Optional[Dict[str, Any]] = None,
+        url_get_params: Optional[Dict[str, str]] = None,
+        url_reverse_get_params: Optional[Dict[str, Any]] = None,
+        selector_timeout: Optional[float] = None,
+        selector_clickable: bool = False,
+    ) -> AsyncWebElement:
+        """Loads an url from the live server and waits for the selector, see IntegrationTest.load_live_url"""
+
+        url = self.test._resolve_url(
+            url_pattern,
+            args=url_args,
+            kwargs=url_kwargs,
+            get_params=url_get_params,
+            reverse_get_params=url_reverse_get_params,
+        )
+
+        # see IntegrationTest.load_live_url
+        wait_for_navigation = self.capabilities.get("pageLoadStrategy") == "none"
+        if wait_for_navigation:
+            await self.execute_script(_MARK_PAGE_SCRIPT)
+
+        await self.get(self.test.live_server_url + url)
+
+        if wait_for_navigation:
+            deadline = time.monotonic() + (
+                selector_timeout or self.test.__class__.find_element_timeout
+            )
+            while True:
+                try:
+                    if not await self.execute_script(_IS_MARKED_SCRIPT):
+                        break
+                except JavascriptException:
+                    pass
+                if time.monotonic() >= deadline:
+                    raise TimeoutException()
+                await asyncio.sleep(0.05)
+
+        return await self.find_element(
+            selector, timeout=selector_timeout, clickable=selector_clickable
+        )
+
+    async def fill_out_form(
+        self,
+        url_pattern: str,
+        submit_button: Optional[str] = None,
+        send_form_keys: Optional[Dict[str, str]] = None,
+        select_dropdowns: Optional[Dict[str, str]] = None,
+        select_checkboxes: Optional[Dict[str, bool]] = None,
+        script_value: Optional[Dict[str, str]] = None,
+        url_args: Optional[List[Any]] = None,
+        url_kwargs: Optional[Dict[str, Any]] = None,
+        url_reverse_get_params: Optional[Dict[str, Any]] = None,
+        selector_timeout: Optional[float] = None,
+    ) -> AsyncWebElement:
+        """
+        Loads a form and fills it out, then returns its submit button; see IntegrationTest.fill_out_form.
+        All fields are always set by a single script, like IntegrationTest.fill_out_form(scripted=True) does.
+        """
+
+        button = await self.load_live_url(
+            url_pattern,
+            selector=None if submit_button is None else "#{}".format(submit_button),
+            url_args=url_args,
+            url_kwargs=url_kwargs,
+            url_reverse_get_params=url_reverse_get_params,
+            selector_timeout=selector_timeout,
+            selector_clickable=True,
+        )
+
+        errors = await self.execute_script(
+            _FILL_OUT_FORM_SCRIPT,
+            send_form_keys or {},
+            select_dropdowns or {},
+            select_checkboxes or {},
+            script_value or {},
+        )
+        if errors:
+            raise NoSuchElementException("\n".join(errors))
+        return button
+
+
+def _session_capabilities(driver: WebDriver) -> Dict[str, Any]:
+    """Returns the capabilities to request for a new session like the one of driver"""
+
+    config = WebDriverPool.driver_config()
+    options = config["kwargs"].get("options") if config is not None else None
+    if options is not None:
+        return options.to_capabilities()
+
+    # e.g. a remote driver created without options
+    return {
+        key: driver.capabilities[key]
+        for key in ("browserName", "pageLoadStrategy")
+        if key in driver.capabilities
+    }
+
+
+@asynccontextmanager
+async def async_browsers(
+    test: IntegrationTestBase, n: int
+) -> AsyncIterator[List[AsyncBrowser]]:
+    """Starts n new browser sessions at the same time, and ends all of them when the context exits"""
+
+    results = await asyncio.gather(
+        *(AsyncBrowser.start(test) for _ in range(n)), return_exceptions=True
+    )
+    browsers = [b for b in results if isinstance(b, AsyncBrowser)]
+    try:
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        yield browsers
+    finally:
+        await asyncio.gather(*(browser.close() for browser in browsers))
@@ -1,25 +1,334 @@
 from __future__ import absolute_import, annotations
 
 import os
+import pkgutil
 import signal
+import sys
+import threading
 import time
+import traceback
+from concurrent.futures import Future
+from contextlib import contextmanager
+from functools import lru_cache
 from importlib import import_module
-from typing import TYPE_CHECKING
+from multiprocessing.util import Finalize
+from typing import TYPE_CHECKING, NamedTuple
+from unittest import SkipTest
 
 from django.conf import settings
 from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.sessions.backends.base import CreateError
+from django.contrib.staticfiles.handlers import StaticFilesHandler
 from django.contrib.staticfiles.testing import StaticLiveServerTestCase
+from django.core.handlers.wsgi import get_path_info
+from django.core.management import call_command
+from django.db import connections
 from django.http import HttpRequest
 
-from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
+from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 
+from .artifacts import FailureArtifacts, FailureArtifactWriter
+from .instrumentation import CommandRecorder
+from .live_server import ConcurrentLiveServerThread, static_file_cache
+from .snapshot import take_snapshot
+
 if TYPE_CHECKING:
-    from typing import Any, Optional
+    from types import TracebackType
+    from typing import (
+        Any,
+        Callable,
+        Dict,
+        Iterable,
+        Iterator,
+        List,
+        Optional,
+        Tuple,
+        Type,
+        Union,
+    )
 
     from django.contrib.auth.models import AbstractUser
+    from django.http import HttpResponse
 
     from selenium.webdriver.remote.webdriver import WebDriver
+    from selenium.webdriver.remote.webelement import WebElement
+
+    from .snapshot import DatabaseSnapshot
+
+
+BLANK_PAGE_PATH = "/__django_selenium_test__/blank/"
+
+# browsers that do not support the chromium devtools protocol, which are not asked at all
+_NO_DEVTOOLS_BROWSERS = {"firefox", "safari"}
+
+
+class LiveServerHandler(StaticFilesHandler):
+    """
+    Handler used by the live server of SeleniumTestCase.
+
+    In addition to serving static files, it serves an empty page at BLANK_PAGE_PATH.
+    The browser can load it to get onto the live server origin without rendering a real page.
+
+    Static files are served from memory with headers that let the browser cache them, see SELENIUM_STATIC_CACHE.
+    """
+
+    def __call__(
+        self, environ: Dict[str, Any], start_response: Callable
+    ) -> Iterable[bytes]:
+        if get_path_info(environ) == BLANK_PAGE_PATH:
+            start_response(
+                "200 OK", [("Content-Type", "text/html"), ("Content-Length", "0")]
+            )
+            return [b""]
+        return super().__call__(environ, start_response)
+
+    def serve(self, request: HttpRequest) -> HttpResponse:
+        if not getattr(settings, "SELENIUM_STATIC_CACHE", True):
+            return super().serve(request)
+        return static_file_cache.serve(request, self.file_path(request.path))
+
+
+class WebDriverPool(object):
+    """
+    Holds at most one WebDriver for every test process.
+
+    Drivers are created lazily the first time they are requested, and then kept
+    around for the entire lifetime of the process. When running tests using
+    'manage.py test --parallel' every worker process thus uses its own browser.
+    """
+
+    _drivers: Dict[int, WebDriver] = {}
+    _futures: Dict[int, Future] = {}  # drivers being started in the background
+    _lock = threading.Lock()
+
+    @staticmethod
+    def worker_id() -> int:
+        """Returns the id of the current parallel test worker, or 0 when not running in parallel"""
+        from django.test import runner
+
+        return getattr(runner, "_worker_id", 0)
+
+    @staticmethod
+    def driver_config() -> Optional[Dict[str, Any]]:
+        """Returns the configuration of the driver to use, or None if selenium is unconfigured"""
+        SELENIUM_WEBDRIVERS = getattr(settings, "SELENIUM_WEBDRIVERS", {})
+        if not SELENIUM_WEBDRIVERS:
+            return None
+        driver_id = os.environ.get("SELENIUM_WEBDRIVER", "default")
+        return SELENIUM_WEBDRIVERS[driver_id]
+
+    @classmethod
+    def start(cls) -> None:
+        """
+        Starts creating the driver of the current process in a background thread.
+        The next call to get() waits for the driver to become available.
+        """
+
+        pid = os.getpid()
+        with cls._lock:
+            if pid in cls._drivers or pid in cls._futures:
+                return
+            future = Future()
+            cls._futures[pid] = future
+            cls._register_quit()
+
+        thread = threading.Thread(
+            target=cls._create_in_background, args=(future,), daemon=True
+        )
+        thread.start()
+
+    @classmethod
+    def _create_in_background(cls, future: Future) -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(cls._create_driver())
+        except BaseException as e:
+            future.set_exception(e)
+
+    @classmethod
+    def get(cls) -> Optional[WebDriver]:
+        """Returns the driver of the current process, creating it if needed"""
+
+        # drivers are keyed by process, so that forked workers
+        # do not re-use the driver of their parent.
+        pid = os.getpid()
+        with cls._lock:
+            if pid not in cls._drivers:
+                # if the driver was started in the background, wait for it.
+                # a failed start leaves the future in place, so that the error is raised again on every call.
+                future = cls._futures.get(pid)
+                if future is not None:
+                    driver = future.result()
+                    del cls._futures[pid]
+                else:
+                    driver = cls._create_driver()
+                    cls._register_quit()
+
+                if driver is None:
+                    return None
+                cls._drivers[pid] = driver
+            return cls._drivers[pid]
+
+    @classmethod
+    def _register_quit(cls) -> None:
+        # quit the driver when the process exits.
+        # multiprocessing workers do not run 'atexit' hooks, but they do run finalizers.
+        Finalize(None, cls.quit, exitpriority=0)
+
+    @classmethod
+    def _create_driver(cls) -> Optional[WebDriver]:
+        config = cls.driver_config()
+        if config is None:
+            return None
+
+        callable = config["callable"]
+        args = config["args"]
+        kwargs = config["kwargs"]
+        start = time.perf_counter()
+        driver = callable(*args, **kwargs)
+
+        # e.g. url blocking set up by make_chrome_driver
+        for command, params in config.get("devtools", []):
+            driver.execute_cdp_cmd(command, params)
+
+        if CommandRecorder.enabled():
+            # report the time it took to start the browser like a command
+            CommandRecorder.record("startDriver", time.perf_counter() - start, 0, 0)
+            CommandRecorder.instrument(driver)
+        return driver
+
+    @classmethod
+    def quit(cls) -> None:
+        """Quits the driver of the current process, if any"""
+        pid = os.getpid()
+        driver = cls._drivers.pop(pid, None)
+
+        # a driver might still be starting in the background
+        future = cls._futures.pop(pid, None)
+        if driver is None and future is not None and future.exception() is None:
+            driver = future.result()
+
+        if driver is None:
+            return
+
+        # The way to exit the browser is selenium.driver.quit(), however we
+        # exit PhantomJS differently because of
+        # https://github.com/SeleniumHQ/selenium/issues/767
+        if driver.capabilities["browserName"] == "phantomjs":
+            driver.service.process.send_signal(signal.SIGTERM)
+        else:
+            driver.quit()
+
+
+# storage cleared by SeleniumWrapper.reset via devtools
+_RESET_STORAGE_TYPES = ",".join(
+    [
+        "cookies",
+        "local_storage",
+        "indexeddb",
+        "websql",
+        "service_workers",
+        "cache_storage",
+        "file_systems",
+    ]
+)
+
+# clears the storage of the current page, if it belongs to the origin arguments[0].
+# arguments[1] says if everything should be cleared, or just session storage.
+# calls back with false if the page does not belong to the origin.
+_RESET_SCRIPT = """/* django_selenium_test:reset */
+var origin = arguments[0];
+var everything = arguments[1];
+var done = arguments[arguments.length - 1];
+
+if (window.location.origin !== origin) {
+    done(false);
+    return;
+}
+
+try { window.sessionStorage.clear(); } catch (e) {}
+if (!everything) {
+    done(true);
+    return;
+}
+try { window.localStorage.clear(); } catch (e) {}
+
+function all(promise, map) {
+    return promise.then(function (items) { return Promise.all(items.map(map)); });
+}
+
+var pending = [];
+if (window.indexedDB && window.indexedDB.databases) {
+    pending.push(all(window.indexedDB.databases(), function (database) {
+        return new Promise(function (resolve) {
+            var request = window.indexedDB.deleteDatabase(database.name);
+            request.onsuccess = request.onerror = request.onblocked = resolve;
+        });
+    }));
+}
+if (navigator.serviceWorker) {
+    pending.push(all(navigator.serviceWorker.getRegistrations(), function (registration) {
+        return registration.unregister();
+    }));
+}
+if (window.caches) {
+    pending.push(all(window.caches.keys(), function (key) {
+        return window.caches.delete(key);
+    }));
+}
+
+Promise.all(pending.map(function (promise) {
+    return promise.catch(function () {});
+})).then(function () { done(true); });
+"""
+
+# remembers that the current page is unchanged, until anything changes the document or the user interacts with it
+_WATCH_PAGE_SCRIPT = """/* django_selenium_test:watch_page */
+var page = {url: window.location.href, changed: false};
+function changed() { page.changed = true; }
+
+new MutationObserver(changed).observe(document, {
+    childList: true, subtree: true, attributes: true, characterData: true
+});
+['input', 'change', 'submit', 'focusin'].forEach(function (name) {
+    window.addEventListener(name, changed, true);
+});
+window.__django_selenium_test_page = page;
+"""
+
+# checks that the page watched by _WATCH_PAGE_SCRIPT is still shown unchanged
+_IS_UNCHANGED_PAGE_SCRIPT = """/* django_selenium_test:is_unchanged_page */
+var page = window.__django_selenium_test_page;
+return !!page && !page.changed && page.url === window.location.href;
+"""
+
+
+class _SwitchTo(object):
+    """Passes on to the switch_to of the driver, and has the wrapper forget the page when it switches away"""
+
+    _switches = {"window", "new_window", "frame", "parent_frame", "default_content"}
+
+    def __init__(self, wrapper: SeleniumWrapper) -> None:
+        self._wrapper = wrapper
+
+    def __getattr__(self, name: str) -> Any:
+        value = getattr(self._wrapper.driver.switch_to, name)
+        if name not in self._switches:
+            return value
+
+        def switch(*args: Any, **kwargs: Any) -> Any:
+            self._wrapper._forget_page()
+            return value(*args, **kwargs)
+
+        return switch
 
 
 class SeleniumWrapper(object):
@@ -28,6 +337,9 @@ class SeleniumWrapper(object):
     _init_except = None  # was there an error while initializing?
     driver: WebDriver
 
+    # sessions created by force_login, keyed by user, backend and password hash
+    _session_cache: Dict[Tuple[Any, str, str], Tuple[str, Dict[str, Any]]] = {}
+
     def __new__(cls, *args: Any, **kwargs: Any) -> SeleniumWrapper:
         # if we aren't yet initialized, do it!
         if not cls._init_done:
@@ -45,15 +357,15 @@ class SeleniumWrapper(object):
         return cls._instance
 
     def __init__(self) -> None:
-        SELENIUM_WEBDRIVERS = getattr(settings, "SELENIUM_WEBDRIVERS", {})
-        if not SELENIUM_WEBDRIVERS:
+        driver = WebDriverPool.get()
+        if driver is None:
             return
-        driver_id = os.environ.get("SELENIUM_WEBDRIVER", "default")
-        driver = SELENIUM_WEBDRIVERS[driver_id]
-        callable = driver["callable"]
-        args = driver["args"]
-        kwargs = driver["kwargs"]
-        self.driver = callable(*args, **kwargs)
+
+        # e.g. after quit(), the new driver has a window of its own size
+        if self.__dict__.get("driver") is not driver:
+            super().__setattr__("_window_size", None)
+            super().__setattr__("_script_timeout", None)
+        self.driver = driver
 
     def __getattr__(self, name: str) -> Any:
         # always natively get the driver attribute!
@@ -67,11 +379,50 @@ class SeleniumWrapper(object):
             super().__setattr__(name, value)
             return
 
+        # e.g. selenium.timeouts = Timeouts(...) may change the script timeout
+        if name == "timeouts":
+            super().__setattr__("_script_timeout", None)
         setattr(self.driver, name, value)
 
     def __bool__(self) -> bool:
         return bool(self.driver)
 
+    @property
+    def switch_to(self) -> _SwitchTo:
+        """Like WebDriver.switch_to, but switching to another window or frame forgets the current page"""
+        return _SwitchTo(self)
+
+    def get(self, url: str) -> None:
+        """Loads a web page in the current browser session"""
+        self._forget_page()
+        self.driver.get(url)
+
+    def watch_page(self, url: str) -> None:
+        """
+        Remembers that the browser shows url as freshly loaded, so that is_unchanged_page() can tell it still does.
+        """
+        self.driver.execute_script(_WATCH_PAGE_SCRIPT)
+        super().__setattr__("_watched_page", url)
+
+    def is_unchanged_page(self, url: str) -> bool:
+        """
+        Checks if the browser still shows url exactly like watch_page() found it.
+
+        The page counts as changed once its document changes, the user interacts with it, or the wrapper navigates,
+        resets, logs in or out, or switches to another window or frame.
+        """
+        if self.__dict__.get("_watched_page") != url:
+            return False
+        return bool(self.driver.execute_script(_IS_UNCHANGED_PAGE_SCRIPT))
+
+    def _forget_page(self) -> None:
+        super().__setattr__("_watched_page", None)
+
+        # elements found by PageElement belong to the previous page
+        super().__setattr__(
+            "_page_generation", self.__dict__.get("_page_generation", 0) + 1
+        )
+
     def login(self, **credentials: Any) -> bool:
         """
         Sets selenium to appear as if a user has successfully signed in.
@@ -95,10 +446,23 @@ class SeleniumWrapper(object):
         else:
             return False
 
-    def force_login(self, user: AbstractUser, base_url: str) -> None:
+    def force_login(
+        self,
+        user: AbstractUser,
+        base_url: str,
+        refresh: bool = True,
+        backend: Optional[str] = None,
+    ) -> None:
         """
         Sets selenium to appear as if a user has successfully signed in.
 
+        The session cookie is set without loading a page where the browser supports it.
+        Pass refresh=False to skip reloading the current page, e.g. when the next step navigates anyway.
+
+        Sessions are cached and re-used for the same user and backend, as long as the session has not been changed
+        and the password of the user has not changed. A session that no longer exists, e.g. because the database
+        was flushed after the previous test, is written back under the same key.
+
         The user will have its backend attribute set to the value of the
         backend argument (which should be a dotted Python path string),
         or to settings.AUTHENTICATION_BACKENDS[0] if a value isn't
@@ -135,29 +499,206 @@ class SeleniumWrapper(object):
         #
         from django.conf import settings
 
+        self._forget_page()
         SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
-        selenium_login_start_page = getattr(
-            settings, "SELENIUM_LOGIN_START_PAGE", "/page_404/"
-        )
-        self.driver.get("{}{}".format(base_url, selenium_login_start_page))
+        if backend is None:
+            backend = settings.AUTHENTICATION_BACKENDS[0]
 
-        session = SessionStore()
-        session[SESSION_KEY] = user.id
-        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
-        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
-        session.save()
+        # the password is part of the key, so that changing it creates a new session
+        cache_key = (user.pk, backend, user.password)
+        session_key = None
+
+        # re-use a previous session, but only if it was not changed since
+        cached = self._session_cache.get(cache_key)
+        if cached is not None:
+            data = SessionStore(cached[0]).load()
+            if data == cached[1]:
+                session_key = cached[0]
+
+            # the database is flushed or restored after every test, write the session back
+            elif not data:
+                # don't touch the data through the session, loading the missing session would drop the key
+                session = SessionStore(cached[0])
+                session._session_cache = dict(cached[1])
+                try:
+                    session.save(must_create=True)
+                    session_key = cached[0]
+                except CreateError:
+                    pass
+
+        if session_key is None:
+            session = SessionStore()
+            session[SESSION_KEY] = user.id
+            session[BACKEND_SESSION_KEY] = backend
+            session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+            session.save()
+
+            session_key = session.session_key
+            self._session_cache[cache_key] = (session_key, dict(session.items()))
 
         cookie = {
             "name": settings.SESSION_COOKIE_NAME,
-            "value": session.session_key,
+            "value": session_key,
             "path": "/",
         }
+        self._add_cookie_without_navigation(cookie, base_url)
+        if refresh:
+            self.driver.refresh()
+
+    def _add_cookie_without_navigation(
+        self, cookie: Dict[str, Any], base_url: str
+    ) -> None:
+        """
+        Adds a cookie for the given base_url, avoiding to load a page where possible.
+        """
+
+        # chromium-based browsers can set cookies for any url via devtools.
+        if (
+            self._execute_cdp_cmd("Network.setCookie", dict(cookie, url=base_url))
+            is not None
+        ):
+            return
+
+        # other browsers only accept cookies for the current page.
+        # so load a page on the live server, unless we are already on one.
+        if not self.driver.current_url.startswith(base_url + "/"):
+            selenium_login_start_page = getattr(
+                settings, "SELENIUM_LOGIN_START_PAGE", BLANK_PAGE_PATH
+            )
+            self.driver.get("{}{}".format(base_url, selenium_login_start_page))
         self.driver.add_cookie(cookie)
-        self.driver.refresh()
+
+    def _execute_cdp_cmd(
+        self, command: str, params: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Runs a devtools command and returns its result, if the browser supports it.
+        Returns None if it does not; the command is then not attempted again for this browser.
+        """
+
+        driver = self.driver
+        if self.__dict__.get("_no_devtools") is driver:
+            return None
+
+        # newer selenium versions define execute_cdp_cmd on every driver,
+        # but other drivers fail with an AssertionError, a RuntimeError (firefox) or reject the command.
+        capabilities = getattr(driver, "capabilities", None)
+        browser = (
+            capabilities.get("browserName") if isinstance(capabilities, dict) else None
+        )
+        if (
+            hasattr(driver, "execute_cdp_cmd")
+            and str(browser).lower() not in _NO_DEVTOOLS_BROWSERS
+        ):
+            try:
+                return driver.execute_cdp_cmd(command, params)
+            except (WebDriverException, AssertionError, RuntimeError):
+                pass
+
+        super().__setattr__("_no_devtools", driver)
+        return None
+
+    def reset(self, base_url: str, cache: Optional[bool] = None) -> None:
+        """
+        Clears cookies and all storage of the origin at base_url, like a new browser would have them.
+        Pass cache=True to also clear the http cache, by default see the SELENIUM_RESET_CACHE setting.
+
+        Chromium-based browsers clear everything via devtools.
+        Other browsers can only clear storage from a page of the origin, and might load a blank page to do so.
+        """
+
+        self._forget_page()
+        if cache is None:
+            cache = getattr(settings, "SELENIUM_RESET_CACHE", False)
+        origin = base_url.rstrip("/")
+
+        if (
+            self._execute_cdp_cmd(
+                "Storage.clearDataForOrigin",
+                {"origin": origin, "storageTypes": _RESET_STORAGE_TYPES},
+            )
+            is not None
+        ):
+            if cache:
+                self.driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+
+            # session storage belongs to the window, not the origin
+            self.driver.execute_async_script(_RESET_SCRIPT, origin, False)
+            return
+
+        self.driver.delete_all_cookies()
+        if not self.driver.execute_async_script(_RESET_SCRIPT, origin, True):
+            selenium_login_start_page = getattr(
+                settings, "SELENIUM_LOGIN_START_PAGE", BLANK_PAGE_PATH
+            )
+            self.driver.get(origin + selenium_login_start_page)
+            self.driver.execute_async_script(_RESET_SCRIPT, origin, True)
+
+    def open_isolated_window(self, base_url: str) -> None:
+        """
+        Opens a new window that shares no state with the other windows, and switches to it.
+        close_isolated_window() closes it and switches back.
+
+        Chromium-based browsers open the window in a new browser context, which is like a new incognito profile.
+        Other browsers open a new tab, and clear the state of the origin at base_url using reset().
+        """
+
+        self._forget_page()
+        driver = self.driver
+        previous = driver.current_window_handle
+        size = self.__dict__.get("_window_size")
+
+        context = self._execute_cdp_cmd("Target.createBrowserContext", {})
+        if context is None:
+            driver.switch_to.new_window("tab")
+            self.reset(base_url)
+            super().__setattr__("_isolated_window", (previous, None, size))
+            return
+
+        context_id = context["browserContextId"]
+        target = driver.execute_cdp_cmd(
+            "Target.createTarget",
+            {"url": "about:blank", "browserContextId": context_id, "newWindow": True},
+        )
+        driver.switch_to.window(target["targetId"])
+        super().__setattr__("_isolated_window", (previous, context_id, size))
+
+        # e.g. url blocking only applies to the window the commands were sent to
+        config = WebDriverPool.driver_config()
+        for command, params in (config or {}).get("devtools", []):
+            driver.execute_cdp_cmd(command, params)
+
+        # the new window does not have the size of the previous one
+        if size is not None:
+            driver.set_window_size(*size)
+
+    def close_isolated_window(self) -> None:
+        """Closes the window opened by open_isolated_window(), and switches back to the previous window"""
+
+        isolated = self.__dict__.get("_isolated_window")
+        if isolated is None:
+            return
+        previous, context_id, size = isolated
+        super().__setattr__("_isolated_window", None)
+        self._forget_page()
+
+        driver = self.driver
+        if context_id is None:
+            driver.close()
+            driver.switch_to.window(previous)
+            return
+
+        # disposing of the context also closes its windows
+        driver.switch_to.window(previous)
+        driver.execute_cdp_cmd(
+            "Target.disposeBrowserContext", {"browserContextId": context_id}
+        )
+        super().__setattr__("_window_size", size)
 
     def _login(self, user: AbstractUser, backend: Optional[str] = None) -> None:
         from django.contrib.auth import login
 
+        self._forget_page()
         engine = import_module(settings.SESSION_ENGINE)
 
         # Create a fake request to store login details.
@@ -187,12 +728,53 @@ class SeleniumWrapper(object):
 
         Causes the authenticated user to be logged out.
         """
+        self._forget_page()
         session = import_module(settings.SESSION_ENGINE).SessionStore()
         session_cookie = self.get_cookie(settings.SESSION_COOKIE_NAME)
         if session_cookie:
             session.delete(session_key=session_cookie["value"])
             self.delete_cookie(settings.SESSION_COOKIE_NAME)
 
+    def set_window_size(
+        self, width: int, height: int, windowHandle: str = "current"
+    ) -> None:
+        """Sets the window size, and remembers it for the windows opened by the wrapper"""
+        self.driver.set_window_size(width, height, windowHandle)
+        super().__setattr__(
+            "_window_size", (width, height) if windowHandle == "current" else None
+        )
+
+    def script_timeout(self) -> float:
+        """Returns the script timeout in seconds, only asking the browser the first time"""
+        timeout = self.__dict__.get("_script_timeout")
+        if timeout is None:
+            timeout = self.driver.timeouts.script
+            super().__setattr__("_script_timeout", timeout)
+        return timeout
+
+    def set_script_timeout(self, time_to_wait: float) -> None:
+        """Sets the script timeout, and remembers it for script_timeout()"""
+        # if setting it fails, it is unknown
+        super().__setattr__("_script_timeout", None)
+        self.driver.set_script_timeout(time_to_wait)
+        super().__setattr__("_script_timeout", time_to_wait)
+
+    def set_window_rect(self, *args: Any, **kwargs: Any) -> Dict[str, int]:
+        super().__setattr__("_window_size", None)
+        return self.driver.set_window_rect(*args, **kwargs)
+
+    def maximize_window(self) -> None:
+        super().__setattr__("_window_size", None)
+        return self.driver.maximize_window()
+
+    def minimize_window(self) -> None:
+        super().__setattr__("_window_size", None)
+        return self.driver.minimize_window()
+
+    def fullscreen_window(self) -> None:
+        super().__setattr__("_window_size", None)
+        return self.driver.fullscreen_window()
+
     def wait_until_n_windows(self, n: int, timeout: int = 2) -> None:
         for i in range(timeout * 10):
             if len(self.window_handles) == n:
@@ -201,20 +783,21 @@ class SeleniumWrapper(object):
         raise AssertionError("Timeout while waiting for {0} windows".format(n))
 
     def quit(self) -> None:
-        # The way to exit the browser is selenium.driver.quit(), however we
-        # exit PhantomJS differently because of
-        # https://github.com/SeleniumHQ/selenium/issues/767
-        if self.driver.capabilities["browserName"] == "phantomjs":
-            self.driver.service.process.send_signal(signal.SIGTERM)
-        else:
-            self.driver.quit()
+        """Quits the browser; a new one is started when the wrapper is next created"""
+        WebDriverPool.quit()
 
 
 class SeleniumTestCase(StaticLiveServerTestCase):
     selenium: SeleniumWrapper
+    static_handler = LiveServerHandler
 
     @classmethod
     def setUpClass(cls) -> None:
+        # give every parallel worker its own live server port
+        SELENIUM_LIVE_SERVER_PORT = getattr(settings, "SELENIUM_LIVE_SERVER_PORT", None)
+        if SELENIUM_LIVE_SERVER_PORT is not None:
+            cls.port = SELENIUM_LIVE_SERVER_PORT + WebDriverPool.worker_id()
+
         super().setUpClass()
         cls.selenium = SeleniumWrapper()
         PageElement.selenium = cls.selenium
@@ -229,17 +812,245 @@ class SeleniumTestCase(StaticLiveServerTestCase):
             cls.server_thread.port,
         )
 
+    @classmethod
+    def _create_server_thread(cls, connections_override: Dict[str, Any]) -> Any:
+        # use a bounded pool of workers with keep-alive connections, if configured
+        SELENIUM_LIVE_SERVER_WORKERS = getattr(
+            settings, "SELENIUM_LIVE_SERVER_WORKERS", None
+        )
+        if SELENIUM_LIVE_SERVER_WORKERS is None:
+            return super()._create_server_thread(connections_override)
+        return ConcurrentLiveServerThread(
+            cls.host,
+            cls.static_handler,
+            connections_override=connections_override,
+            port=cls.port,
+            workers=SELENIUM_LIVE_SERVER_WORKERS,
+        )
+
     @classmethod
     def tearDownClass(cls) -> None:
-        cls.selenium.quit()
+        # the browser is kept for the next test class, so only reset the cookies
+        cls.selenium.delete_all_cookies()
         PageElement.selenium = None
         super().tearDownClass()
+        cls._discard_database_snapshots()
+
+    # run every test in a new window that shares no state with other tests,
+    # None to use the SELENIUM_ISOLATE_TESTS setting.
+    isolate_tests: Optional[bool] = None
+
+    @classmethod
+    def _isolate_tests(cls) -> bool:
+        if cls.isolate_tests is not None:
+            return cls.isolate_tests
+        return getattr(settings, "SELENIUM_ISOLATE_TESTS", False)
+
+    def _pre_setup(self) -> None:
+        super()._pre_setup()
+        if self._isolate_tests():
+            self.selenium.open_isolated_window(self.live_server_url)
+
+    def _post_teardown(self) -> None:
+        try:
+            if self._isolate_tests():
+                self.selenium.close_isolated_window()
+        finally:
+            super()._post_teardown()
+
+    # capture what the browser shows as soon as setUp, the test or tearDown fail.
+    # these are the hooks unittest itself calls them through.
+    def _callSetUp(self) -> None:
+        with self._capturing_failures():
+            super()._callSetUp()
+
+    def _callTestMethod(self, method: Callable) -> None:
+        with self._capturing_failures():
+            super()._callTestMethod(method)
+
+    def _callTearDown(self) -> None:
+        with self._capturing_failures():
+            super()._callTearDown()
+
+    @contextmanager
+    def _capturing_failures(self) -> Iterator[None]:
+        try:
+            yield
+        except SkipTest:
+            raise
+        except Exception:
+            outcome = getattr(self, "_outcome", None)
+            if not getattr(outcome, "expecting_failure", False):
+                # capturing must never replace the failure of the test
+                try:
+                    self._capture_failure_artifacts(sys.exc_info())
+                except Exception:
+                    pass
+            raise
+
+    def _capture_failure_artifacts(
+        self,
+        exc_info: Tuple[Type[BaseException], BaseException, TracebackType],
+    ) -> None:
+        """
+        Reads the screenshot, page source and console of the browser, and hands them to the writer
+        configured by SELENIUM_FAILURE_ARTIFACTS. Compressing and writing them happens in the background.
+        """
+
+        writer = FailureArtifactWriter.from_settings()
+        if writer is None or not getattr(self, "selenium", None):
+            return
+
+        def read(getter: Callable[[], Any]) -> Any:
+            # the browser might not support a command, or be gone along with its driver,
+            # which fails with a connection error rather than a WebDriverException
+            try:
+                return getter()
+            except Exception:
+                return None
+
+        get_log = getattr(self.selenium.driver, "get_log", None)
+        writer.submit(
+            FailureArtifacts(
+                test_id=self.id(),
+                traceback="".join(traceback.format_exception(*exc_info)),
+                url=read(lambda: self.selenium.current_url),
+                screenshot=read(self.selenium.get_screenshot_as_base64),
+                page_source=read(lambda: self.selenium.page_source),
+                console=read(lambda: get_log("browser")) if get_log else None,
+            )
+        )
+
+    # restore the databases from a snapshot taken before the first test,
+    # instead of flushing them and reloading fixtures after every test.
+    snapshot_databases = False
+
+    # snapshots by database alias; None until the first test of the class has set up its fixtures,
+    # empty if not all databases support snapshots.
+    _database_snapshots: Optional[Dict[str, DatabaseSnapshot]] = None
+
+    def _fixture_setup(self) -> None:
+        snapshots = self._database_snapshots
+        if snapshots:
+            for snapshot in snapshots.values():
+                snapshot.restore()
+            return
+
+        super()._fixture_setup()
+        if snapshots is None and self.snapshot_databases:
+            type(self)._database_snapshots = self._take_database_snapshots()
+
+    def _fixture_teardown(self) -> None:
+        # the next test restores the snapshot, tearDownClass flushes the database
+        if not self._database_snapshots:
+            super()._fixture_teardown()
+
+    @classmethod
+    def _take_database_snapshots(cls) -> Dict[str, DatabaseSnapshot]:
+        snapshots: Dict[str, DatabaseSnapshot] = {}
+        for db_name in cls._databases_names(include_mirrors=False):
+            snapshot = take_snapshot(connections[db_name])
+            if snapshot is None:
+                # not supported by the backend, flush and reload fixtures as usual
+                for snapshot in snapshots.values():
+                    snapshot.discard()
+                return {}
+            snapshots[db_name] = snapshot
+        return snapshots
+
+    @classmethod
+    def _discard_database_snapshots(cls) -> None:
+        snapshots = cls._database_snapshots
+        cls._database_snapshots = None
+        if not snapshots:
+            return
+
+        # leave the databases empty for the next test class, like _fixture_teardown
+        for db_name, snapshot in snapshots.items():
+            snapshot.discard()
+            call_command(
+                "flush",
+                verbosity=0,
+                interactive=False,
+                database=db_name,
+                reset_sequences=False,
+                allow_cascade=cls.available_apps is not None,
+                inhibit_post_migrate=cls.available_apps is not None
+                or (
+                    cls.serialized_rollback
+                    and hasattr(connections[db_name], "_test_serialized_contents")
+                ),
+            )
+
+    # the width this test is running at, if it is part of a matrix of widths
+    selenium_width: Optional[int] = None
+
+    # False if the previous test left the window at the right size, see SeleniumTestRunner
+    selenium_resize: bool = True
+
+    @staticmethod
+    def selenium_widths() -> List[int]:
+        """Returns the widths every test should be run at"""
+        return list(getattr(settings, "SELENIUM_WIDTHS", [1024]))
+
+    @staticmethod
+    def selenium_height() -> int:
+        """Returns the height of the browser window"""
+        return getattr(settings, "SELENIUM_HEIGHT", 1024)
+
+    def with_width(self, width: int) -> SeleniumTestCase:
+        """Returns a copy of this test that only runs at the given width"""
+        test = self.__class__(self._testMethodName)
+        test.selenium_width = width
+        test.selenium_resize = self.selenium_resize
+        return test
+
+    def id(self) -> str:
+        if self.selenium_width is None:
+            return super().id()
+        return "{}[width={}]".format(super().id(), self.selenium_width)
+
+    def __str__(self) -> str:
+        if self.selenium_width is None:
+            return super().__str__()
+        return "{} [width={}]".format(super().__str__(), self.selenium_width)
+
+    def run(self, result=None):
+        # attribute all browser commands to this test
+        with CommandRecorder.recording(self.id()):
+            return super().run(result)
 
     def __call__(self, result=None):
-        if hasattr(self, "selenium"):
-            for width in getattr(settings, "SELENIUM_WIDTHS", [1024]):
-                self.selenium.set_window_size(width, 1024)
-        return super().__call__(result)
+        if not hasattr(self, "selenium"):
+            return super().__call__(result)
+
+        # a single width was requested, either by the test or the settings
+        widths = self.selenium_widths()
+        if self.selenium_width is not None or len(widths) == 1:
+            width = (
+                self.selenium_width if self.selenium_width is not None else widths[0]
+            )
+
+            # the wrapper knows when the window was resized since, e.g. by maximize_window()
+            size = (width, self.selenium_height())
+            if (
+                self.selenium_resize
+                or self.selenium.__dict__.get("_window_size") != size
+            ):
+                self.selenium.set_window_size(*size)
+            return super().__call__(result)
+
+        # run the test once for every width, each with its own result.
+        # SeleniumTestRunner instead groups tests by width, to avoid resizing the window for every test.
+        for width in widths:
+            if result is not None and result.shouldStop:
+                break
+            self.selenium_width = width
+            try:
+                self.selenium.set_window_size(width, self.selenium_height())
+                super().__call__(result)
+            finally:
+                self.selenium_width = None
 
 
 class PageElement(object):
@@ -249,43 +1060,473 @@ class PageElement(object):
         if len(args) == 2:
             self.locator = args
 
-    def wait_until_exists(self, timeout: int = 10) -> None:
-        WebDriverWait(self.selenium, timeout).until(
-            EC.presence_of_element_located(self.locator)
+    def _wait(
+        self,
+        kind: str,
+        timeout: int,
+        text: Optional[str] = None,
+        negate: bool = False,
+    ) -> None:
+        _wait_for_conditions(
+            self.selenium, [(*self.locator, kind, text, negate)], timeout
         )
 
+    def wait_until_exists(self, timeout: int = 10) -> None:
+        self._wait("exists", timeout)
+
     def wait_until_not_exists(self, timeout: int = 10) -> None:
-        WebDriverWait(self.selenium, timeout).until_not(
-            EC.presence_of_element_located(self.locator)
-        )
+        self._wait("exists", timeout, negate=True)
 
     def wait_until_is_displayed(self, timeout: int = 10) -> None:
-        WebDriverWait(self.selenium, timeout).until(
-            EC.visibility_of_element_located(self.locator)
-        )
+        self._wait("displayed", timeout)
 
     def wait_until_not_displayed(self, timeout: int = 10) -> None:
-        WebDriverWait(self.selenium, timeout).until_not(
-            EC.visibility_of_element_located(self.locator)
-        )
+        self._wait("displayed", timeout, negate=True)
 
     def wait_until_contains(self, text: str, timeout: int = 10) -> None:
-        WebDriverWait(self.selenium, timeout).until(
-            EC.text_to_be_present_in_element(self.locator, text)
-        )
+        self._wait("contains", timeout, text=text)
 
     def wait_until_not_contains(self, text: str, timeout: int = 10) -> None:
-        WebDriverWait(self.selenium, timeout).until_not(
-            EC.text_to_be_present_in_element(self.locator, text)
-        )
+        self._wait("contains", timeout, text=text, negate=True)
 
     def wait_until_is_clickable(self, timeout: int = 10) -> None:
-        WebDriverWait(self.selenium, timeout).until(
-            EC.element_to_be_clickable(self.locator)
-        )
+        self._wait("clickable", timeout)
 
     def exists(self) -> bool:
         return len(self.selenium.find_elements(*self.locator)) > 0
 
+    def _find(self, again: bool = False) -> WebElement:
+        """
+        Returns the element, re-using the one found before until SeleniumWrapper navigates or again is True.
+        """
+
+        selenium = self.selenium
+        generation = getattr(selenium, "__dict__", {}).get("_page_generation")
+
+        cached = self.__dict__.get("_cached")
+        if not again and cached is not None:
+            cached_selenium, cached_generation, element = cached
+            if cached_selenium is selenium and cached_generation == generation:
+                return element
+
+        element = selenium.find_element(*self.locator)
+        self.__dict__["_cached"] = (selenium, generation, element)
+        return element
+
     def __getattr__(self, name: str) -> Any:
-        return getattr(self.selenium.find_element(*self.locator), name)
+        # properties talk to the browser right away, methods only once called.
+        # either fails for an element the page no longer contains, so find it again.
+        # (switching windows or frames through SeleniumWrapper finds it again anyway.)
+        try:
+            value = getattr(self._find(), name)
+        except StaleElementReferenceException:
+            value = getattr(self._find(again=True), name)
+        if not callable(value):
+            return value
+
+        def method(*args: Any, **kwargs: Any) -> Any:
+            try:
+                return value(*args, **kwargs)
+            except StaleElementReferenceException:
+                return getattr(self._find(again=True), name)(*args, **kwargs)
+
+        return method
+
+
+@lru_cache(maxsize=None)
+def _selenium_atom(name: str) -> str:
+    """Loads one of the javascript atoms selenium uses to implement WebElement methods"""
+    return pkgutil.get_data("selenium.webdriver.remote", name).decode("utf8")
+
+
+# finds the first element matching a locator, like find_element does
+_LOCATE_FUNCTION = """function locate(by, value) {
+    switch (by) {
+        case "id":
+            return document.querySelector("#" + CSS.escape(value));
+        case "name":
+            return document.querySelector('[name="' + CSS.escape(value) + '"]');
+        case "class name":
+            return document.querySelector("." + CSS.escape(value));
+        case "xpath":
+            return document.evaluate(value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        case "link text":
+        case "partial link text":
+            var links = document.getElementsByTagName("a");
+            for (var i = 0; i < links.length; i++) {
+                var text = links[i].innerText.trim();
+                if (by === "link text" ? text === value : text.indexOf(value) !== -1) {
+                    return links[i];
+                }
+            }
+            return null;
+        default:
+            return document.querySelector(value);
+    }
+}"""
+
+_WAIT_SCRIPT = """/* django_selenium_test:wait */
+var isDisplayed = (%s);
+%s
+var conditions = arguments[0];
+var mode = arguments[1];
+var timeout = arguments[2];
+var done = arguments[arguments.length - 1];
+
+function holds(condition) {
+    var element = locate(condition[0], condition[1]);
+    var ok = false;
+    if (element) {
+        switch (condition[2]) {
+            case "exists":
+                ok = true;
+                break;
+            case "displayed":
+                ok = !!isDisplayed(element);
+                break;
+            case "contains":
+                // like WebElement.text, only consider visible text
+                ok = !!isDisplayed(element) && element.innerText.indexOf(condition[3]) !== -1;
+                break;
+            case "clickable":
+                // unlike element.disabled, this includes the controls of a disabled fieldset
+                ok = !!isDisplayed(element) && !element.matches(":disabled");
+                break;
+        }
+    }
+    if (condition[4]) {
+        ok = !ok;
+    }
+    return [ok, ok ? element : null];
+}
+
+function check() {
+    var results = conditions.map(holds);
+    var matched = results.map(function(result) { return result[0]; });
+    var fired = mode === "any" ? matched.indexOf(true) !== -1 : matched.indexOf(false) === -1;
+    return fired ? [matched, results.map(function(result) { return result[1]; })] : null;
+}
+
+var result = check();
+if (result !== null || timeout <= 0) {
+    done(result);
+    return;
+}
+
+var finished = false;
+var frame = null;
+var interval = null;
+function finish(result) {
+    if (finished) {
+        return;
+    }
+    finished = true;
+    observer.disconnect();
+    clearTimeout(timer);
+    clearInterval(interval);
+    if (frame !== null) {
+        cancelAnimationFrame(frame);
+    }
+    done(result);
+}
+function poll() {
+    var result = check();
+    if (result !== null) {
+        finish(result);
+    }
+}
+
+// re-check whenever the page changes
+var observer = new MutationObserver(poll);
+observer.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+var timer = setTimeout(function() { finish(null); }, timeout);
+
+// visibility can also change without any mutation, e.g. when stylesheets load.
+// so check those conditions once per frame, and every now and then in case frames
+// are throttled, e.g. in a background window.
+var visual = conditions.some(function(condition) { return condition[2] !== "exists"; });
+if (visual) {
+    frame = requestAnimationFrame(function onFrame() {
+        poll();
+        if (!finished) {
+            frame = requestAnimationFrame(onFrame);
+        }
+    });
+    interval = setInterval(poll, %d);
+}"""
+
+# how often a wait re-checks visual conditions in case animation frames are throttled, in milliseconds
+_WAIT_SCRIPT_INTERVAL = 250
+
+# the longest a single wait script runs, well below the default script timeout of 30 seconds
+_WAIT_SCRIPT_SLICE = 5
+
+
+def _wait_script() -> str:
+    return _WAIT_SCRIPT % (
+        _selenium_atom("isDisplayed.js"),
+        _LOCATE_FUNCTION,
+        _WAIT_SCRIPT_INTERVAL,
+    )
+
+
+def _check_condition(
+    driver: WebDriver, condition: Tuple[str, str, str, Optional[str], bool]
+) -> Tuple[bool, Optional[WebElement]]:
+    """Checks a single wait condition using regular WebDriver commands"""
+    by, value, kind, text, negate = condition
+    try:
+        element = driver.find_element(by, value)
+        if kind == "exists":
+            ok = True
+        elif kind == "displayed":
+            ok = element.is_displayed()
+        elif kind == "contains":
+            ok = text in element.text
+        else:
+            ok = element.is_displayed() and element.is_enabled()
+    except (NoSuchElementException, StaleElementReferenceException):
+        element, ok = None, False
+
+    if negate:
+        ok = not ok
+    return ok, element if ok else None
+
+
+def _wait_for_conditions(
+    driver: WebDriver,
+    conditions: List[Tuple[str, str, str, Optional[str], bool]],
+    timeout: float,
+    mode: str = "all",
+) -> Tuple[List[bool], List[Optional[WebElement]]]:
+    """
+    Waits until any or all (depending on mode) of the given conditions hold.
+    Conditions are tuples (by, value, kind, text, negate), where kind is one of 'exists', 'displayed', 'contains'
+    (the visible text contains text) and 'clickable'.
+
+    Returns which conditions hold, along with the element each of them matched.
+    Raises TimeoutException if the conditions do not hold within timeout seconds.
+
+    Unless SELENIUM_WAIT_IN_BROWSER is False, the wait runs inside the page and returns as soon as the conditions hold.
+    If that fails, e.g. because the page navigates away, the conditions are polled instead.
+    """
+
+    deadline = time.monotonic() + timeout
+    conditions = [list(condition) for condition in conditions]
+
+    if getattr(settings, "SELENIUM_WAIT_IN_BROWSER", True):
+        script = _wait_script()
+        while True:
+            remaining = max(0, min(deadline - time.monotonic(), _WAIT_SCRIPT_SLICE))
+            try:
+                result = driver.execute_async_script(
+                    script, conditions, mode, int(remaining * 1000)
+                )
+            except WebDriverException:
+                break
+            if result is not None:
+                return result[0], result[1]
+            if time.monotonic() >= deadline:
+                raise TimeoutException()
+
+    def check(driver: WebDriver) -> Any:
+        results = [_check_condition(driver, condition) for condition in conditions]
+        matched = [ok for (ok, _) in results]
+        if (any if mode == "any" else all)(matched):
+            return matched, [element for (_, element) in results]
+        return False
+
+    return WebDriverWait(driver, max(0, deadline - time.monotonic())).until(check)
+
+
+# kinds of conditions accepted by wait_for_any() and wait_for_all()
+WAIT_CONDITIONS = (
+    "exists",
+    "not_exists",
+    "displayed",
+    "not_displayed",
+    "contains",
+    "not_contains",
+    "clickable",
+)
+
+
+class WaitResult(NamedTuple):
+    """The result of wait_for_any() or wait_for_all()"""
+
+    fired: str  # name of the first condition that holds
+    element: Optional[WebElement]  # element matched by the fired condition
+    matched: Dict[str, bool]
+    elements: Dict[str, Optional[WebElement]]
+
+
+def _parse_named_conditions(
+    conditions: Dict[str, Tuple[Any, ...]]
+) -> Tuple[List[str], List[Tuple[str, str, str, Optional[str], bool]]]:
+    """Turns named conditions as accepted by wait_for_any() into their names and the tuples of _wait_for_conditions()"""
+
+    # there is nothing to wait for, and no condition that could fire
+    if not conditions:
+        raise ValueError("At least one condition is needed to wait for")
+
+    names = list(conditions.keys())
+    parsed = []
+    for name in names:
+        element, kind, *text = conditions[name]
+        if kind not in WAIT_CONDITIONS:
+            raise ValueError("Unknown condition {!r} for {!r}".format(kind, name))
+
+        if isinstance(element, PageElement):
+            locator = element.locator
+        elif isinstance(element, str):
+            locator = (By.CSS_SELECTOR, element)
+        else:
+            locator = element
+
+        negate = kind.startswith("not_")
+        parsed.append(
+            (
+                *locator,
+                kind[4:] if negate else kind,
+                text[0] if text else None,
+                negate,
+            )
+        )
+
+    return names, parsed
+
+
+def _wait_result(
+    names: List[str], matched: List[bool], elements: List[Optional[WebElement]]
+) -> WaitResult:
+    fired = names[matched.index(True)]
+    return WaitResult(
+        fired=fired,
+        element=elements[names.index(fired)],
+        matched=dict(zip(names, matched)),
+        elements=dict(zip(names, elements)),
+    )
+
+
+def _wait_for_named_conditions(
+    conditions: Dict[str, Tuple[Any, ...]],
+    timeout: float,
+    mode: str,
+    selenium: Optional[WebDriver],
+) -> WaitResult:
+    if selenium is None:
+        selenium = PageElement.selenium
+
+    names, parsed = _parse_named_conditions(conditions)
+    matched, elements = _wait_for_conditions(selenium, parsed, timeout, mode)
+    return _wait_result(names, matched, elements)
+
+
+def wait_for_any(
+    conditions: Dict[str, Tuple[Any, ...]],
+    timeout: float = 10,
+    selenium: Optional[WebDriver] = None,
+) -> WaitResult:
+    """
+    Waits until any of the given conditions holds, and returns which one did.
+
+    Conditions are given by name, as tuples (element, kind) or (element, kind, text).
+    Elements are a PageElement, a locator tuple or a CSS selector; kind is one of WAIT_CONDITIONS.
+    All conditions are checked at once, and a TimeoutException is raised if none holds within timeout seconds.
+    """
+    return _wait_for_named_conditions(conditions, timeout, "any", selenium)
+
+
+def wait_for_all(
+    conditions: Dict[str, Tuple[Any, ...]],
+    timeout: float = 10,
+    selenium: Optional[WebDriver] = None,
+) -> WaitResult:
+    """Waits until all of the given conditions hold at the same time; see wait_for_any()"""
+    return _wait_for_named_conditions(conditions, timeout, "all", selenium)
+
+
+class ElementState(NamedTuple):
+    """The state of a single element, as read by PageElementGroup.snapshot()"""
+
+    exists: bool
+    displayed: bool
+    text: str
+    attributes: Dict[str, Optional[str]]
+
+
+class PageElementGroup(object):
+    """
+    A group of PageElements whose state can be read using a single call to the browser.
+
+    Elements are given by name, either as PageElement or as locator tuple.
+    """
+
+    _SNAPSHOT_SCRIPT = """/* django_selenium_test:snapshot */
+var isDisplayed = (%s);
+var getAttribute = (%s);
+var locators = arguments[0];
+var attributes = arguments[1];
+
+%s
+
+return locators.map(function(locator) {
+    var element = locate(locator[0], locator[1]);
+    if (!element) {
+        return null;
+    }
+
+    var displayed = !!isDisplayed(element);
+    var values = {};
+    attributes.forEach(function(name) {
+        values[name] = getAttribute(element, name);
+    });
+
+    // like WebElement.text, only report visible text
+    return [displayed, displayed ? element.innerText.trim() : "", values];
+});"""
+
+    def __init__(
+        self,
+        elements: Dict[str, Union[PageElement, Tuple[str, str]]],
+        attributes: Iterable[str] = (),
+    ) -> None:
+        self.locators = {
+            name: element.locator if isinstance(element, PageElement) else element
+            for (name, element) in elements.items()
+        }
+        self.attributes = list(attributes)
+
+    def snapshot(self, selenium: Optional[WebDriver] = None) -> Dict[str, ElementState]:
+        """
+        Reads existence, visibility, text and the requested attributes of every element.
+        Only the first element matching each locator is considered.
+        """
+        if selenium is None:
+            selenium = PageElement.selenium
+
+        names = list(self.locators.keys())
+        script = self._SNAPSHOT_SCRIPT % (
+            _selenium_atom("isDisplayed.js"),
+            _selenium_atom("getAttribute.js"),
+            _LOCATE_FUNCTION,
+        )
+        results = selenium.execute_script(
+            script, [list(self.locators[name]) for name in names], self.attributes
+        )
+
+        snapshot = {}
+        for name, result in zip(names, results):
+            if result is None:
+                snapshot[name] = ElementState(
+                    exists=False,
+                    displayed=False,
+                    text="",
+                    attributes={attribute: None for attribute in self.attributes},
+                )
+            else:
+                displayed, text, attributes = result
+                snapshot[name] = ElementState(
+                    exists=True, displayed=displayed, text=text, attributes=attributes
+                )
+        return snapshot
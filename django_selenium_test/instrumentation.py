@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from multiprocessing.util import Finalize
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, Iterator, List, Optional
+
+    from selenium.webdriver.remote.webdriver import WebDriver
+
+    Stats = Dict[str, Dict[str, Dict[str, Any]]]
+
+
+# upper bounds (in seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+
+# name commands are attributed to when no test is running, e.g. in setUpClass
+NO_TEST = "(no test)"
+
+
+def _new_command_stats() -> Dict[str, Any]:
+    return {
+        "count": 0,
+        "seconds": 0.0,
+        "bytes_sent": 0,
+        "bytes_received": 0,
+        "buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+    }
+
+
+def _payload_size(payload: Any) -> int:
+    if payload is None:
+        return 0
+    return len(json.dumps(payload, default=str))
+
+
+class CommandRecorder(object):
+    """
+    Records the WebDriver commands sent by instrumented drivers.
+
+    Every command is counted by type, together with its latency and payload size,
+    and attributed to the test running at the time.
+    Recording is enabled by setting SELENIUM_COMMAND_REPORT to the path (without extension) of the report to write.
+    """
+
+    _lock = threading.Lock()
+    _stats: Stats = {}
+
+    # commands are also sent from other threads and coroutines, which only belong to the test that started them
+    _current_test: ContextVar[str] = ContextVar(
+        "django_selenium_test_current_test", default=NO_TEST
+    )
+
+    @staticmethod
+    def report_path() -> Optional[str]:
+        """Returns the path to write the report to, or None if recording is disabled"""
+        return getattr(settings, "SELENIUM_COMMAND_REPORT", None)
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return cls.report_path() is not None
+
+    @classmethod
+    @contextmanager
+    def recording(cls, test_id: str) -> Iterator[None]:
+        """Attributes all commands sent within this context to the given test"""
+        token = cls._current_test.set(test_id)
+        try:
+            yield
+        finally:
+            cls._current_test.reset(token)
+
+    @classmethod
+    def instrument(cls, driver: WebDriver) -> None:
+        """Records all commands the driver sends from now on"""
+
+        executor = driver.command_executor
+        execute = executor.execute
+
+        def instrumented_execute(command: str, params: Optional[Dict] = None) -> Any:
+            start = time.perf_counter()
+            response = None
+            try:
+                response = execute(command, params)
+                return response
+            finally:
+                cls.record(
+                    command,
+                    time.perf_counter() - start,
+                    _payload_size(params),
+                    _payload_size(response),
+                )
+
+        executor.execute = instrumented_execute
+
+        # parallel workers hand their statistics to the main process using a file
+        from django.test import runner
+
+        if getattr(runner, "_worker_id", 0) != 0:
+            Finalize(None, cls._save_worker_stats, exitpriority=0)
+
+    @classmethod
+    def record(
+        cls, command: str, seconds: float, bytes_sent: int, bytes_received: int
+    ) -> None:
+        """Records a single command sent by the currently running test"""
+
+        bucket = len(LATENCY_BUCKETS)
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                bucket = index
+                break
+
+        with cls._lock:
+            commands = cls._stats.setdefault(cls._current_test.get(), {})
+            stats = commands.setdefault(command, _new_command_stats())
+            stats["count"] += 1
+            stats["seconds"] += seconds
+            stats["bytes_sent"] += bytes_sent
+            stats["bytes_received"] += bytes_received
+            stats["buckets"][bucket] += 1
+
+    @classmethod
+    def stats(cls) -> Stats:
+        """Returns a copy of the statistics recorded so far"""
+        with cls._lock:
+            return json.loads(json.dumps(cls._stats))
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            cls._stats = {}
+
+    @classmethod
+    def _worker_stats_path(cls, pid: Optional[int] = None) -> str:
+        return "{}.worker-{}.json".format(
+            cls.report_path(), pid if pid is not None else "*"
+        )
+
+    @classmethod
+    def _save_worker_stats(cls) -> None:
+        with open(cls._worker_stats_path(os.getpid()), "w") as f:
+            json.dump(cls.stats(), f)
+
+    @classmethod
+    def write_report(cls) -> None:
+        """
+        Writes the statistics of this process and any parallel workers to the report.
+        The report is written as '.json' and in OpenMetrics text format as '.prom'.
+        """
+
+        stats = cls.stats()
+        for path in glob.glob(cls._worker_stats_path()):
+            with open(path) as f:
+                merge_stats(stats, json.load(f))
+            os.remove(path)
+
+        path = cls.report_path()
+        with open(path + ".json", "w") as f:
+            json.dump(render_json(stats), f, indent=2, sort_keys=True)
+        with open(path + ".prom", "w") as f:
+            f.write(render_openmetrics(stats))
+
+
+def merge_stats(into: Stats, other: Stats) -> None:
+    """Adds the statistics in other to the ones in into"""
+    for test, commands in other.items():
+        for command, stats in commands.items():
+            target = into.setdefault(test, {}).setdefault(command, _new_command_stats())
+            for key in ["count", "seconds", "bytes_sent", "bytes_received"]:
+                target[key] += stats[key]
+            target["buckets"] = [
+                a + b for a, b in zip(target["buckets"], stats["buckets"])
+            ]
+
+
+def _bucket_labels() -> List[str]:
+    return [repr(float(bound)) for bound in LATENCY_BUCKETS] + ["+Inf"]
+
+
+def render_json(stats: Stats) -> Dict[str, Any]:
+    """Renders statistics into a json-serializable report, with cumulative buckets"""
+
+    tests = {}
+    for test, commands in stats.items():
+        rendered = {}
+        for command, command_stats in commands.items():
+            cumulative = 0
+            buckets = {}
+            for label, count in zip(_bucket_labels(), command_stats["buckets"]):
+                cumulative += count
+                buckets[label] = cumulative
+            rendered[command] = dict(command_stats, buckets=buckets)
+
+        tests[test] = {
+            "round_trips": sum(c["count"] for c in commands.values()),
+            "seconds": sum(c["seconds"] for c in commands.values()),
+            "commands": rendered,
+        }
+
+    return {"tests": tests}
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_openmetrics(stats: Stats) -> str:
+    """Renders statistics in the OpenMetrics text format"""
+
+    durations = [
+        "# TYPE selenium_command_duration_seconds histogram",
+        "# HELP selenium_command_duration_seconds Latency of WebDriver commands.",
+    ]
+    sent = [
+        "# TYPE selenium_command_sent_bytes counter",
+        "# HELP selenium_command_sent_bytes Size of WebDriver command payloads.",
+    ]
+    received = [
+        "# TYPE selenium_command_received_bytes counter",
+        "# HELP selenium_command_received_bytes Size of WebDriver response payloads.",
+    ]
+
+    for test in sorted(stats.keys()):
+        for command in sorted(stats[test].keys()):
+            command_stats = stats[test][command]
+            labels = 'test="{}",command="{}"'.format(
+                _escape_label(test), _escape_label(command)
+            )
+
+            cumulative = 0
+            for label, count in zip(_bucket_labels(), command_stats["buckets"]):
+                cumulative += count
+                durations.append(
+                    'selenium_command_duration_seconds_bucket{{{},le="{}"}} {}'.format(
+                        labels, label, cumulative
+                    )
+                )
+            durations.append(
+                "selenium_command_duration_seconds_count{{{}}} {}".format(
+                    labels, command_stats["count"]
+                )
+            )
+            durations.append(
+                "selenium_command_duration_seconds_sum{{{}}} {}".format(
+                    labels, repr(float(command_stats["seconds"]))
+                )
+            )
+            sent.append(
+                "selenium_command_sent_bytes_total{{{}}} {}".format(
+                    labels, command_stats["bytes_sent"]
+                )
+            )
+            received.append(
+                "selenium_command_received_bytes_total{{{}}} {}".format(
+                    labels, command_stats["bytes_received"]
+                )
+            )
+
+    return "\n".join(durations + sent + received + ["# EOF"]) + "\n"
@@ -1,28 +1,181 @@
 from __future__ import annotations
 
 import base64
-import time
-from typing import TYPE_CHECKING
+import tempfile
+from functools import lru_cache
+from typing import TYPE_CHECKING, NamedTuple
+from urllib.parse import urlencode
 
 from django.contrib.auth import get_user_model
 from django.core.management import call_command
-from django.urls import reverse
-
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import get_script_prefix, get_urlconf, reverse
+from django.utils.translation import get_language
+
+from selenium.common.exceptions import (
+    JavascriptException,
+    NoSuchElementException,
+    WebDriverException,
+)
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions
 from selenium.webdriver.support.ui import Select, WebDriverWait
 
-from .core import SeleniumTestCase
+from .core import (
+    PageElementGroup,
+    SeleniumTestCase,
+    _wait_for_conditions,
+    wait_for_all,
+    wait_for_any,
+)
 
 if TYPE_CHECKING:
-    from typing import IO, Any, Dict, List, Optional, Type, Union
+    from typing import IO, Any, Dict, Iterable, List, Optional, Tuple, Type, Union
 
     from django.contrib.auth.models import User
 
     from django_selenium_clean import SeleniumWrapper
     from selenium.webdriver.remote.webelement import WebElement
 
+    from django_selenium_test.core import WaitResult
+
+
+# marks the current page, to find out when load_live_url has replaced it
+_MARK_PAGE_SCRIPT = "window.__django_selenium_test_previous_page = true;"
+_IS_MARKED_SCRIPT = "return window.__django_selenium_test_previous_page === true;"
+
+# sets the values of all the fields given to fill_out_form() at once
+_FILL_OUT_FORM_SCRIPT = """/* django_selenium_test:fill_out_form */
+var keys = arguments[0];
+var dropdowns = arguments[1];
+var checkboxes = arguments[2];
+var values = arguments[3];
+
+// find all the elements before changing any of them
+var errors = [];
+function find(fields) {
+    return Object.keys(fields).map(function(id) {
+        var element = document.getElementById(id);
+        if (!element) {
+            errors.push("Unable to locate element with id " + JSON.stringify(id));
+        }
+        return [element, fields[id]];
+    });
+}
+keys = find(keys);
+dropdowns = find(dropdowns);
+checkboxes = find(checkboxes);
+values = find(values);
+if (errors.length > 0) {
+    return errors;
+}
+
+// tell input and change event handlers something happened
+function fire(element) {
+    element.dispatchEvent(new Event('input', {bubbles: true, cancelable: true}));
+    element.dispatchEvent(new Event('change', {bubbles: true, cancelable: true}));
+}
+
+function normalize(text) {
+    return text.replace(/\\s+/g, ' ').trim();
+}
+
+keys.concat(values).forEach(function(field) {
+    field[0].value = field[1];
+    fire(field[0]);
+});
+
+dropdowns.forEach(function(field) {
+    var select = field[0];
+    var value = field[1];
+    var options = Array.prototype.slice.call(select.options);
+
+    // like the Select helper, deselect everything in a multiple select first
+    if (select.multiple) {
+        options.forEach(function(option) { option.selected = false; });
+    }
+
+    if (value !== null) {
+        // select a single option by visible text, or many by value
+        var matches = typeof value === 'string' ?
+            options.filter(function(option) { return normalize(option.text) === normalize(value); }) :
+            options.filter(function(option) { return value.indexOf(option.value) !== -1; });
+        if (matches.length === 0) {
+            errors.push("Cannot locate option " + JSON.stringify(value) + " in select with id " + JSON.stringify(select.id));
+            return;
+        }
+        (select.multiple ? matches : matches.slice(0, 1)).forEach(function(option) { option.selected = true; });
+    }
+    fire(select);
+});
+
+checkboxes.forEach(function(field) {
+    if (field[0].checked !== field[1]) {
+        field[0].checked = field[1];
+        fire(field[0]);
+    }
+});
+
+return errors;"""
+
+
+@lru_cache(maxsize=1024)
+def _cached_reverse(
+    urlconf: Optional[str],
+    prefix: str,
+    language: Optional[str],
+    viewname: str,
+    args: Tuple[Any, ...],
+    kwargs: Tuple[Tuple[str, Any], ...],
+) -> str:
+    return reverse(viewname, urlconf=urlconf, args=args, kwargs=dict(kwargs))
+
+
+def _reverse(
+    viewname: str,
+    args: Optional[List[Any]] = None,
+    kwargs: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Like reverse(), but remembers the urls of patterns with only string and integer arguments"""
+
+    args = tuple(args or ())
+    kwargs = tuple(sorted((kwargs or {}).items()))
+
+    # other arguments might not be hashable, or turn into a different url for an equal value
+    if not all(type(v) in (str, int) for v in args + tuple(v for _, v in kwargs)):
+        return reverse(viewname, args=args, kwargs=dict(kwargs))
+
+    # e.g. i18n_patterns turn into a different url for every language
+    return _cached_reverse(
+        get_urlconf(), get_script_prefix(), get_language(), viewname, args, kwargs
+    )
+
+
+@receiver(setting_changed)
+def _clear_reverse_cache(*, setting: str, **kwargs: Any) -> None:
+    if setting == "ROOT_URLCONF":
+        _cached_reverse.cache_clear()
+
+
+class DownloadResponse(NamedTuple):
+    """A response intercepted by the download helpers"""
+
+    ok: bool
+    status: int
+    headers: Dict[str, str]
+    data: Optional[Union[bytes, IO[bytes]]]
+
+
+def _parse_xhr_headers(headers: str) -> Dict[str, str]:
+    """Parses the result of XMLHttpRequest.getAllResponseHeaders() into a dictionary with lowercase keys"""
+    result = {}
+    for line in headers.splitlines():
+        name, sep, value = line.partition(":")
+        if sep:
+            result[name.strip().lower()] = value.strip()
+    return result
+
 
 class DummyTestBase:
     """A dummy base class for type-hinting within integration tests"""
@@ -44,6 +197,9 @@ class DummyTestBase:
     def assertEqual(self, first: str, second: str, msg: Optional[str] = None) -> None:
         ...
 
+    def fail(self, msg: Optional[str] = None) -> None:
+        ...
+
 
 class ElementFindMixins(DummyTestBase):
     find_element_timeout: int
@@ -61,14 +217,30 @@ class ElementFindMixins(DummyTestBase):
                 raise Exception("find_element_selector may not be None")
             selector = self.__class__.find_element_selector
 
-        wait = WebDriverWait(self.selenium, timeout)
+        kind = "clickable" if clickable else "displayed"
+        _, elements = _wait_for_conditions(
+            self.selenium, [(By.CSS_SELECTOR, selector, kind, None, False)], timeout
+        )
+        return elements[0]
 
-        if clickable:
-            condition = expected_conditions.element_to_be_clickable
-        else:
-            condition = expected_conditions.visibility_of_element_located
+    def wait_for_any(
+        self, conditions: Dict[str, Tuple[Any, ...]], timeout: Optional[int] = None
+    ) -> WaitResult:
+        """
+        Waits until any of the given conditions holds, and returns which one did.
+        Conditions are given by name as (selector, kind) or (selector, kind, text), see django_selenium_test.wait_for_any.
+        """
+        if timeout is None:
+            timeout = self.__class__.find_element_timeout
+        return wait_for_any(conditions, timeout=timeout, selenium=self.selenium)
 
-        return wait.until(condition((By.CSS_SELECTOR, selector)))
+    def wait_for_all(
+        self, conditions: Dict[str, Tuple[Any, ...]], timeout: Optional[int] = None
+    ) -> WaitResult:
+        """Waits until all of the given conditions hold, see wait_for_any"""
+        if timeout is None:
+            timeout = self.__class__.find_element_timeout
+        return wait_for_all(conditions, timeout=timeout, selenium=self.selenium)
 
     def find_next_sibling(self, element: WebElement) -> Optional[WebElement]:
         """Finds the next sibling of an element"""
@@ -105,8 +277,62 @@ class ElementAssertionMixins(DummyTestBase):
         """Asserts that an element with the given selector is not displayed"""
         return self.assertFalse(self._element_displayed(selector), *args)
 
+    def assert_elements(
+        self,
+        exists: Iterable[str] = (),
+        not_exists: Iterable[str] = (),
+        displayed: Iterable[str] = (),
+        not_displayed: Iterable[str] = (),
+        msg: Optional[str] = None,
+    ) -> None:
+        """
+        Asserts the state of many elements with the given selectors at once.
+        All elements are checked using a single call to the browser, and all failures are reported together.
+        """
+
+        checks = [
+            ("should exist", list(exists), lambda state: state.exists),
+            ("should not exist", list(not_exists), lambda state: not state.exists),
+            ("should be displayed", list(displayed), lambda state: state.displayed),
+            (
+                "should not be displayed",
+                list(not_displayed),
+                lambda state: not state.displayed,
+            ),
+        ]
+
+        # read the state of every selector that is mentioned
+        group = PageElementGroup(
+            {
+                selector: (By.CSS_SELECTOR, selector)
+                for (_, selectors, _) in checks
+                for selector in selectors
+            }
+        )
+        snapshot = group.snapshot(self.selenium)
+
+        failures = [
+            "{} {}".format(selector, description)
+            for (description, selectors, check) in checks
+            for selector in selectors
+            if not check(snapshot[selector])
+        ]
+        if not failures:
+            return
+
+        message = "{} element assertion(s) failed:\n{}".format(
+            len(failures), "\n".join(failures)
+        )
+        if msg is not None:
+            message = "{} : {}".format(msg, message)
+        self.fail(message)
+
 
 class FormElementMixins(DummyTestBase):
+    fill_out_form_scripted: bool
+    download_timeout: int
+    download_chunk_size: int
+
     def fill_out_form(
         self,
         url_pattern: str,
@@ -120,6 +346,7 @@ class FormElementMixins(DummyTestBase):
         url_kwargs: Optional[Dict[str, Any]] = None,
         url_reverse_get_params: Optional[Dict[str, Any]] = None,
         selector_timeout: Optional[int] = None,
+        scripted: Optional[bool] = None,
     ) -> WebElement:
         """
         Loads a URL using selenium from the live server and waits for the element with the submit_button id to be
@@ -131,6 +358,9 @@ class FormElementMixins(DummyTestBase):
         dict.
         Next, directly set the value attribute of elements refered to by the script_value dict.
         Finally returns the button element.
+
+        When scripted is True (defaults to the fill_out_form_scripted attribute), all fields are filled by a single
+        injected script instead. The script only fires 'input' and 'change' events, not individual key events.
         """
         if submit_button is None:
             selector = None
@@ -148,6 +378,15 @@ class FormElementMixins(DummyTestBase):
             selector_clickable=True,
         )
 
+        # fill the entire form using a single script
+        if scripted is None:
+            scripted = self.__class__.fill_out_form_scripted
+        if scripted:
+            self.__fill_form_script(
+                send_form_keys, select_dropdowns, select_checkboxes, script_value
+            )
+            return button
+
         # send_keys to the specified form elements
         if send_form_keys is not None:
             for id_, value in send_form_keys.items():
@@ -187,6 +426,26 @@ class FormElementMixins(DummyTestBase):
         # return the button
         return button
 
+    def __fill_form_script(
+        self,
+        send_form_keys: Optional[Dict[str, str]],
+        select_dropdowns: Optional[Dict[str, str]],
+        select_checkboxes: Optional[Dict[str, bool]],
+        script_value: Optional[Dict[str, str]],
+    ) -> None:
+        """Sets the values of all the given form elements using a single script"""
+
+        errors = self.selenium.execute_script(
+            _FILL_OUT_FORM_SCRIPT,
+            send_form_keys or {},
+            select_dropdowns or {},
+            select_checkboxes or {},
+            script_value or {},
+        )
+
+        if errors:
+            raise NoSuchElementException("\n".join(errors))
+
     def submit_form(
         self,
         *args: Any,
@@ -217,62 +476,158 @@ class FormElementMixins(DummyTestBase):
         """
         )
 
-    def __intercept_xhr(self, code: str, *args: Any) -> [bool, IO[bytes]]:
+    def __intercept_xhr(
+        self,
+        code: str,
+        *args: Any,
+        timeout: Optional[int] = None,
+        stream: bool = False,
+    ) -> DownloadResponse:
         """Creates and then executes a script that
         programatically intercepts the provided file download.
         'code' should be a javascript code calling init_xhr_intercept() with appropriate functions.
+        The result is reported back as soon as the request finishes, or fails after timeout seconds.
+
+        When stream is True, the downloaded data is kept in the browser and
+        then transferred in chunks of download_chunk_size into a temporary file.
         """
 
-        self.selenium.execute_script(
-            """
-window.xhr_done = false;
-window.xhr_ok = null;
-window.xhr_data = null;
+        if timeout is None:
+            timeout = self.__class__.download_timeout
+
+        # allow the script to run slightly longer than the request itself
+        previous_timeout = self.selenium.script_timeout()
+        raise_timeout = timeout + 5 > previous_timeout
+        if raise_timeout:
+            self.selenium.set_script_timeout(timeout + 5)
+        try:
+            result = self.selenium.execute_async_script(
+                """/* django_selenium_test:intercept_xhr */
+const xhr_done = arguments[arguments.length - 1];
+const xhr_timeout = arguments[arguments.length - 2];
+const xhr_stream = arguments[arguments.length - 3];
 
 function init_xhr_intercept(callback) {
     const xhr = new XMLHttpRequest();
 
     xhr.responseType = 'blob';
+    xhr.timeout = xhr_timeout;
     xhr.onload = function() {
+        // keep the data around, so that it can be read in chunks
+        if (xhr_stream) {
+            const downloads = window.django_selenium_test_downloads = window.django_selenium_test_downloads || {};
+            const key = 'download-' + (window.django_selenium_test_download_count = (window.django_selenium_test_download_count || 0) + 1);
+            downloads[key] = xhr.response;
+            xhr_done({
+                'ok': xhr.status === 200,
+                'status': xhr.status,
+                'headers': xhr.getAllResponseHeaders(),
+                'data': null,
+                'key': key,
+                'size': xhr.response.size,
+            });
+            return;
+        }
+
         const reader  = new FileReader();
         reader.onloadend = function() {
-            window.xhr_data = reader.result;
-            window.xhr_ok = xhr.status === 200;
-            window.xhr_done = true;
+            xhr_done({
+                'ok': xhr.status === 200,
+                'status': xhr.status,
+                'headers': xhr.getAllResponseHeaders(),
+                'data': reader.result,
+            });
         };
         reader.readAsDataURL(xhr.response);
     };
+    xhr.onerror = xhr.ontimeout = xhr.onabort = function() {
+        xhr_done({'ok': false, 'status': xhr.status, 'headers': '', 'data': null});
+    };
 
     callback(xhr);
     return xhr;
 }"""
-            + code,
-            *args,
-        )
-
-        xhr_done = False
-        while xhr_done == False:
-            xhr_done = self.selenium.execute_script("return window.xhr_done;")
-            time.sleep(0.1)
+                + code,
+                *args,
+                stream,
+                timeout * 1000,
+            )
 
-        xhr_ok = self.selenium.execute_script("return window.xhr_ok;")
-        xhr_data = self.selenium.execute_script("return window.xhr_data; ")
+            # if there is some data, decode it
+            data = result["data"]
+            if data is not None:
+                data = base64.b64decode(data.partition(",")[2])
+            elif result.get("key") is not None:
+                data = self.__read_xhr_stream(result["key"], result["size"])
+        finally:
+            # e.g. after the page navigated away or the session died, which must not hide the original error
+            if raise_timeout:
+                try:
+                    self.selenium.set_script_timeout(previous_timeout)
+                except WebDriverException:
+                    pass
+
+        return DownloadResponse(
+            ok=result["ok"],
+            status=result["status"],
+            headers=_parse_xhr_headers(result["headers"]),
+            data=data,
+        )
 
-        # if there is some data, return it
-        if xhr_data is not None:
-            xhr_data = xhr_data.split(",")[1]
-            xhr_data = base64.b64decode(xhr_data)
+    def __read_xhr_stream(self, key: str, size: int) -> IO[bytes]:
+        """Reads data kept in the browser by a streaming download into a temporary file"""
+
+        chunk_size = self.__class__.download_chunk_size
+
+        # small downloads stay in memory, larger ones are written to disk
+        data = tempfile.SpooledTemporaryFile(max_size=chunk_size)
+        try:
+            for offset in range(0, size, chunk_size):
+                chunk = self.selenium.execute_async_script(
+                    """/* django_selenium_test:read_download */
+const done = arguments[arguments.length - 1];
+const blob = window.django_selenium_test_downloads[arguments[0]];
+
+const reader = new FileReader();
+reader.onloadend = function() {
+    done(reader.result);
+};
+reader.readAsDataURL(blob.slice(arguments[1], arguments[1] + arguments[2]));""",
+                    key,
+                    offset,
+                    chunk_size,
+                )
+                data.write(base64.b64decode(chunk.partition(",")[2]))
+        except BaseException:
+            data.close()
+            raise
+        finally:
+            # free the memory held by the browser, unless it is gone already
+            try:
+                self.selenium.execute_script(
+                    "delete window.django_selenium_test_downloads[arguments[0]];", key
+                )
+            except WebDriverException:
+                pass
 
-        return xhr_ok, xhr_data
+        data.seek(0)
+        return data
 
-    def get_url_download(
+    def get_url_response(
         self,
         url: str,
         args: Optional[List[Any]] = None,
         kwargs: Optional[Dict[str, Any]] = None,
         get_params: Option[Dict[str, str]] = None,
         reverse_get_params: Optional[Dict[str, Any]] = None,
-    ) -> [bool, IO[bytes]]:
+        timeout: Optional[int] = None,
+        stream: bool = False,
+    ) -> DownloadResponse:
+        """
+        Downloads a url from within the browser, and returns the entire response.
+        When stream is True, the data is returned as a file-like object and memory usage is bounded by
+        download_chunk_size.
+        """
         return self.__intercept_xhr(
             """
             var url = arguments[0];
@@ -282,10 +637,35 @@ function init_xhr_intercept(callback) {
             });
         """,
             self._resolve_url(url, args, kwargs, get_params, reverse_get_params),
+            timeout=timeout,
+            stream=stream,
         )
 
-    def get_form_download(self, form: WebElement) -> [bool, IO[bytes]]:
-        """Virtually submits a form and intercepts the resulting downloaded file as a BytesIO"""
+    def get_url_download(
+        self,
+        url: str,
+        args: Optional[List[Any]] = None,
+        kwargs: Optional[Dict[str, Any]] = None,
+        get_params: Option[Dict[str, str]] = None,
+        reverse_get_params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[int] = None,
+        stream: bool = False,
+    ) -> [bool, IO[bytes]]:
+        response = self.get_url_response(
+            url,
+            args,
+            kwargs,
+            get_params,
+            reverse_get_params,
+            timeout=timeout,
+            stream=stream,
+        )
+        return response.ok, response.data
+
+    def get_form_response(
+        self, form: WebElement, timeout: Optional[int] = None, stream: bool = False
+    ) -> DownloadResponse:
+        """Virtually submits a form, and returns the entire response; see get_url_response for stream"""
         return self.__intercept_xhr(
             """
             var form = arguments[0].form;
@@ -296,8 +676,17 @@ function init_xhr_intercept(callback) {
             });
         """,
             form,
+            timeout=timeout,
+            stream=stream,
         )
 
+    def get_form_download(
+        self, form: WebElement, timeout: Optional[int] = None, stream: bool = False
+    ) -> [bool, IO[bytes]]:
+        """Virtually submits a form and intercepts the resulting downloaded file as a BytesIO"""
+        response = self.get_form_response(form, timeout=timeout, stream=stream)
+        return response.ok, response.data
+
     def hover_element(self, id_: str) -> WebElement:
         """Hovers over an element with the given ID"""
         element = self.selenium.find_element(By.ID, id_)
@@ -356,7 +745,7 @@ class URLMixins(DummyTestBase):
             )
 
         # the url itself is resolved using 'reverse'
-        resolved = reverse(url, args=args, kwargs=kwargs)
+        resolved = _reverse(url, args=args, kwargs=kwargs)
 
         # extra get parameters
         extra_args = {}
@@ -371,15 +760,11 @@ class URLMixins(DummyTestBase):
         if reverse_get_params is not None:
             has_extra_args = True
             for k, v in reverse_get_params.items():
-                extra_args[k] = reverse(v)
+                extra_args[k] = _reverse(v)
 
-        # if we had some extra arguments
+        # if we had some extra arguments, encode them like django does for redirects
         if has_extra_args:
-            resolved = (
-                resolved
-                + "?"
-                + "&".join(["{}={}".format(k, v) for (k, v) in extra_args.items()])
-            )
+            resolved = resolved + "?" + urlencode(extra_args, doseq=True, safe="/")
 
         # and return the resolved url
         return resolved
@@ -403,10 +788,14 @@ class URLMixins(DummyTestBase):
         url_reverse_get_params: Optional[Dict[str, Any]] = None,
         selector_timeout: Optional[int] = None,
         selector_clickable: bool = False,
+        reuse_if_current: bool = False,
     ) -> WebElement:
         """
         Loads an url from the selenium from the live server and waits for the CSS selector (if any) to be available
         Returns the element selected, None if none is selected, or raises TimeoutException if a timeout occurs.
+
+        With reuse_if_current=True, the page is not loaded again if an earlier call with reuse_if_current=True loaded
+        it, and it has not changed since, see SeleniumWrapper.is_unchanged_page().
         """
 
         # resolve the url and load it
@@ -417,13 +806,41 @@ class URLMixins(DummyTestBase):
             get_params=url_get_params,
             reverse_get_params=url_reverse_get_params,
         )
-        self.selenium.get(self.live_server_url + url)
+        url = self.live_server_url + url
+
+        if reuse_if_current and self.selenium.is_unchanged_page(url):
+            return self.find_element(
+                selector, timeout=selector_timeout, clickable=selector_clickable
+            )
+
+        # with the "none" page load strategy, get() returns before the new page has replaced the current one.
+        # mark the current page, and wait for the mark to disappear.
+        # (the "eager" strategy returns once the new page is parsed, and the selector wait does the rest)
+        wait_for_navigation = (
+            self.selenium.capabilities.get("pageLoadStrategy") == "none"
+        )
+        if wait_for_navigation:
+            self.selenium.execute_script(_MARK_PAGE_SCRIPT)
+
+        self.selenium.get(url)
+
+        if wait_for_navigation:
+            WebDriverWait(
+                self.selenium,
+                selector_timeout or self.__class__.find_element_timeout,
+                ignored_exceptions=(JavascriptException,),
+            ).until_not(lambda driver: driver.execute_script(_IS_MARKED_SCRIPT))
 
         # wait for the element
-        return self.find_element(
+        element = self.find_element(
             selector, timeout=selector_timeout, clickable=selector_clickable
         )
 
+        # only start watching the page once it has been loaded
+        if reuse_if_current:
+            self.selenium.watch_page(url)
+        return element
+
     def assert_url_equal(self, url: str, *args: Any, **kwargs: Any) -> None:
         """Asserts that the current url is equal to the (pontially resolvable) url"""
 
@@ -483,16 +900,22 @@ class IntegrationTestBase(
     live_server_url: str = None
 
     find_element_timeout: int = 10
+    fill_out_form_scripted: bool = False
+    download_timeout: int = 30
+    download_chunk_size: int = 4 * 1024 * 1024
     find_element_selector: str  # to be overwritten by subclass
 
-    def login(self, username: str) -> User:
-        """Authenticates the user with the given username and returns the user object"""
+    def login(self, username: str, refresh: bool = True) -> User:
+        """
+        Authenticates the user with the given username and returns the user object.
+        The current page is reloaded to show the user as logged in, unless refresh is False.
+        """
 
         # grab the instance of the user we want to login
         user = get_user_model().objects.get(username=username)
 
         # and force the login
-        self.selenium.force_login(user, base_url=self.live_server_url)
+        self.selenium.force_login(user, base_url=self.live_server_url, refresh=refresh)
 
         # return the user
         return user
@@ -504,9 +927,12 @@ class IntegrationTest(SeleniumTestCase, IntegrationTestBase):
     def setUp(self) -> None:
         """Setups up this test class"""
 
-        # before each test case, we need to reset the cookies
-        self.selenium.delete_all_cookies()
+        # before each test case, we need to reset cookies and storage,
+        # unless the test runs in a window of its own
+        if not self._isolate_tests():
+            self.selenium.reset(self.live_server_url)
 
         user = self.__class__.user
         if user is not None:
-            self.user = self.login(user)  # type: User
+            # the test will navigate next, so don't refresh
+            self.user = self.login(user, refresh=False)  # type: User
@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import posixpath
+import selectors
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, NamedTuple
+
+from django.contrib.staticfiles import finders
+from django.core.servers.basehttp import WSGIServer
+from django.core.signals import setting_changed
+from django.db import connections
+from django.dispatch import receiver
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.test.testcases import LiveServerThread, QuietWSGIRequestHandler
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, Optional
+
+    from django.db.backends.base.base import BaseDatabaseWrapper
+    from django.http import HttpRequest
+
+
+class KeepAliveRequestHandler(QuietWSGIRequestHandler):
+    """
+    Handles requests of a connection, until the client closes it or it is idle for timeout seconds.
+
+    An idle connection is closed early when another connection waits for a worker, like browsers expect servers to.
+    """
+
+    timeout = 5
+
+    # how often an idle connection checks for connections waiting for a worker
+    idle_poll_interval = 0.05
+
+    server: ConcurrentWSGIServer
+
+    # responses are written in several parts, don't let them wait for an ACK
+    disable_nagle_algorithm = True
+
+    def handle(self) -> None:
+        self.close_connection = True
+        self.handle_one_request()
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.connection, selectors.EVENT_READ)
+            while not self.close_connection and self._wait_for_request(selector):
+                self.handle_one_request()
+        try:
+            self.connection.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+
+    def _wait_for_request(self, selector: selectors.BaseSelector) -> bool:
+        """Waits until the next request arrives, and returns False if the connection should be closed instead"""
+
+        deadline = time.monotonic() + self.timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            # browsers don't pipeline requests, so the next one is never left in rfile
+            if selector.select(min(remaining, self.idle_poll_interval)):
+                return True
+            if self.server.release_idle_worker():
+                return False
+
+    def handle_one_request(self) -> None:
+        try:
+            super().handle_one_request()
+        except OSError:
+            # the connection timed out or was closed by either side
+            self.close_connection = True
+
+
+class ConcurrentWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+    """
+    A WSGI server handling connections using a bounded pool of worker threads.
+
+    Connections are kept alive between requests, so that the browser does not need to open a new connection
+    for every asset of a page.
+    """
+
+    daemon_threads = True
+    block_on_close = False
+    request_queue_size = 64
+
+    def __init__(
+        self,
+        *args: Any,
+        connections_override: Optional[Dict[str, BaseDatabaseWrapper]] = None,
+        workers: int = 8,
+        **kwargs: Any,
+    ) -> None:
+        self.connections_override = connections_override or {}
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="live-server"
+        )
+
+        # connections that are open, i.e. (possibly idle) in a worker
+        self.open_requests = set()
+        self.open_requests_lock = threading.Lock()
+
+        # connections waiting for a worker, and idle connections closed to make one available for them
+        self.pending_requests = 0
+        self.releasing_workers = 0
+
+        # a database connection shared with the test thread (e.g. in-memory sqlite)
+        # must only be used by one request at a time.
+        self.shared_connection_lock = (
+            threading.Lock() if self.connections_override else None
+        )
+
+        # binds the socket, and calls server_close() if that fails
+        super().__init__(*args, **kwargs)
+
+    def process_request(self, request: socket.socket, client_address: Any) -> None:
+        with self.open_requests_lock:
+            self.open_requests.add(request)
+            self.pending_requests += 1
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def release_idle_worker(self) -> bool:
+        """Returns True if an idle connection should be closed, because another connection waits for its worker"""
+        with self.open_requests_lock:
+            if self.pending_requests > self.releasing_workers:
+                self.releasing_workers += 1
+                return True
+        return False
+
+    def process_request_thread(
+        self, request: socket.socket, client_address: Any
+    ) -> None:
+        with self.open_requests_lock:
+            self.pending_requests -= 1
+            self.releasing_workers = min(self.releasing_workers, self.pending_requests)
+
+        for alias, conn in self.connections_override.items():
+            connections[alias] = conn
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            with self.open_requests_lock:
+                self.open_requests.discard(request)
+
+    def close_request(self, request: socket.socket) -> None:
+        # like django's server, don't leave database connections of worker threads around
+        connections.close_all()
+        super().close_request(request)
+
+    def get_app(self) -> Callable:
+        app = super().get_app()
+        if self.shared_connection_lock is None:
+            return app
+
+        def serialized_app(environ: Dict[str, Any], start_response: Callable) -> Any:
+            with self.shared_connection_lock:
+                return app(environ, start_response)
+
+        return serialized_app
+
+    def server_close(self) -> None:
+        super().server_close()
+
+        # wake up workers waiting for the next request on an idle connection
+        with self.open_requests_lock:
+            requests = list(self.open_requests)
+        for request in requests:
+            try:
+                request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.executor.shutdown(wait=True)
+
+
+class ConcurrentLiveServerThread(LiveServerThread):
+    """A live server thread using ConcurrentWSGIServer"""
+
+    server_class = ConcurrentWSGIServer
+
+    def __init__(self, *args: Any, workers: int = 8, **kwargs: Any) -> None:
+        self.workers = workers
+        super().__init__(*args, **kwargs)
+
+    def _create_server(self, connections_override: Any = None) -> ConcurrentWSGIServer:
+        return self.server_class(
+            (self.host, self.port),
+            KeepAliveRequestHandler,
+            # the server closes idle connections itself, which leaves them in TIME_WAIT.
+            # allow a fixed port to be bound again by the next test class anyway
+            # (on windows, this would allow binding a port that is in use).
+            allow_reuse_address=os.name != "nt",
+            connections_override=self.connections_override,
+            workers=self.workers,
+        )
+
+
+# content types worth compressing, in addition to text/*
+COMPRESSIBLE_CONTENT_TYPES = {
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "image/svg+xml",
+}
+
+# static files don't change while tests are running, so browsers never need to revalidate them
+STATIC_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class StaticFile(NamedTuple):
+    """A static file held in memory"""
+
+    content: bytes
+    gzipped: Optional[bytes]
+    content_type: str
+    etag: str
+
+
+class StaticFileCache(object):
+    """
+    Keeps static files found by the staticfiles finders in memory.
+
+    Every file is read only once per process, together with its ETag and a gzip variant.
+    Paths that were not found are looked up again, as the file might be created later.
+    """
+
+    def __init__(self) -> None:
+        # path => file
+        self.files: Dict[str, StaticFile] = {}
+
+    def clear(self) -> None:
+        self.files.clear()
+
+    def get(self, path: str) -> Optional[StaticFile]:
+        """Returns the static file at path (relative to STATIC_URL), or None if it does not exist"""
+
+        path = posixpath.normpath(path).lstrip("/")
+        try:
+            return self.files[path]
+        except KeyError:
+            pass
+
+        # two threads might read the same file at the same time, which is harmless
+        file = self.load(path)
+        if file is not None:
+            self.files[path] = file
+        return file
+
+    @staticmethod
+    def load(path: str) -> Optional[StaticFile]:
+        absolute_path = finders.find(path)
+        if not absolute_path:
+            return None
+        try:
+            with open(absolute_path, "rb") as f:
+                content = f.read()
+        except OSError:
+            # e.g. a directory
+            return None
+
+        content_type, encoding = mimetypes.guess_type(absolute_path)
+        content_type = content_type or "application/octet-stream"
+
+        # only keep a compressed variant if it is worth it
+        gzipped = None
+        if encoding is None and (
+            content_type.startswith("text/")
+            or content_type in COMPRESSIBLE_CONTENT_TYPES
+        ):
+            gzipped = gzip.compress(content, mtime=0)
+            if len(gzipped) >= len(content):
+                gzipped = None
+
+        etag = '"%s"' % hashlib.sha1(content).hexdigest()
+        return StaticFile(content, gzipped, content_type, etag)
+
+    def serve(self, request: HttpRequest, path: str) -> HttpResponse:
+        """Serves the static file at path, like django.contrib.staticfiles.views.serve"""
+
+        file = self.get(path)
+        if file is None:
+            raise Http404("'%s' could not be found" % path)
+
+        content = file.content
+        gzipped = file.gzipped is not None and "gzip" in request.META.get(
+            "HTTP_ACCEPT_ENCODING", ""
+        )
+        etag = file.etag
+        if gzipped:
+            content = file.gzipped
+            # the variants differ byte for byte, so they need different strong ETags
+            etag = etag[:-1] + '-gzip"'
+
+        if etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type=file.content_type)
+            if gzipped:
+                response["Content-Encoding"] = "gzip"
+
+        # without a length, django's server closes the connection after the response
+        response["Content-Length"] = str(len(content))
+        response["ETag"] = etag
+        response["Cache-Control"] = STATIC_CACHE_CONTROL
+        if file.gzipped is not None:
+            patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+
+
+static_file_cache = StaticFileCache()
+
+
+@receiver(setting_changed)
+def _clear_static_file_cache(*, setting: str, **kwargs: Any) -> None:
+    if setting in {"STATICFILES_DIRS", "STATICFILES_FINDERS", "STATIC_ROOT"}:
+        static_file_cache.clear()
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import copy
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+
+from selenium import webdriver
+
+if TYPE_CHECKING:
+    from typing import Any
+
+    from selenium.webdriver.common.options import ArgOptions
+
+# lock files a browser leaves in its profile, which must not be copied
+PROFILE_LOCK_FILES = ["Singleton*", "lock", ".parentlock", "parent.lock"]
+
+
+def copy_profile_template(template: str) -> str:
+    """Copies a profile template into a new directory, in memory where possible, and returns its path"""
+
+    # /dev/shm is a tmpfs on most linux systems
+    parent = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    directory = tempfile.mkdtemp(prefix="django-selenium-test-profile-", dir=parent)
+    shutil.copytree(
+        template,
+        directory,
+        symlinks=True,
+        ignore=shutil.ignore_patterns(*PROFILE_LOCK_FILES),
+        dirs_exist_ok=True,
+    )
+    return directory
+
+
+class ProfileTemplateMixin(ABC):
+    """
+    Starts the browser using a copy of a pre-built profile, instead of a new empty one.
+    The copy is deleted once the browser quits.
+    """
+
+    profile_directory: str
+
+    def __init__(self, *args: Any, profile_template: str, **kwargs: Any) -> None:
+        self.profile_directory = copy_profile_template(profile_template)
+
+        # the options are shared between all drivers created from the same settings
+        options = copy.deepcopy(kwargs.pop("options"))
+        self.use_profile(options, self.profile_directory)
+        try:
+            super().__init__(*args, options=options, **kwargs)
+        except BaseException:
+            shutil.rmtree(self.profile_directory, ignore_errors=True)
+            raise
+
+    @abstractmethod
+    def use_profile(self, options: ArgOptions, directory: str) -> None:
+        """Changes options to start the browser with the profile in directory"""
+
+    def quit(self) -> None:
+        try:
+            super().quit()
+        finally:
+            shutil.rmtree(self.profile_directory, ignore_errors=True)
+
+
+class TemplateProfileChrome(ProfileTemplateMixin, webdriver.Chrome):
+    def use_profile(self, options: ArgOptions, directory: str) -> None:
+        options.add_argument("--user-data-dir=" + directory)
+
+
+class TemplateProfileFirefox(ProfileTemplateMixin, webdriver.Firefox):
+    def use_profile(self, options: ArgOptions, directory: str) -> None:
+        # geckodriver uses the profile given in the arguments instead of creating one
+        options.add_argument("-profile")
+        options.add_argument(directory)
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import itertools
+import warnings
+from typing import TYPE_CHECKING
+from unittest import TestSuite
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner, ParallelTestSuite, _init_worker
+
+from .artifacts import FailureArtifactWriter
+from .core import SeleniumTestCase, WebDriverPool
+from .instrumentation import CommandRecorder
+
+if TYPE_CHECKING:
+    from typing import Any, Iterator
+    from unittest import TestCase
+
+
+def _iter_test_cases(suite: TestSuite) -> Iterator[TestCase]:
+    """Iterates over all test cases of the given suite"""
+    for test in suite:
+        if isinstance(test, TestSuite):
+            yield from _iter_test_cases(test)
+        else:
+            yield test
+
+
+def _expand_widths(suite: TestSuite) -> TestSuite:
+    """
+    Expands every SeleniumTestCase into one test per entry of SELENIUM_WIDTHS.
+    Tests of the same class are grouped by width, so that the browser window is only resized when the width changes.
+    """
+
+    widths = SeleniumTestCase.selenium_widths()
+    if len(widths) > 1:
+        tests = []
+        for test_class, group in itertools.groupby(_iter_test_cases(suite), type):
+            group = list(group)
+            if not issubclass(test_class, SeleniumTestCase):
+                tests.extend(group)
+                continue
+
+            for width in widths:
+                tests.extend(test.with_width(width) for test in group)
+        suite = type(suite)(tests)
+
+    # only the first test of a class at every width resizes the window.
+    # a new class might have changed it in setUpClass, or use another window.
+    previous = None
+    for test in _iter_test_cases(suite):
+        if not isinstance(test, SeleniumTestCase):
+            previous = None
+            continue
+        group = (type(test), test.selenium_width)
+        test.selenium_resize = group != previous
+        previous = group
+    return suite
+
+
+def _eager_start_enabled() -> bool:
+    return getattr(settings, "SELENIUM_EAGER_START", True)
+
+
+def _init_selenium_worker(*args: Any, **kwargs: Any) -> None:
+    """Initializes a parallel test worker, and starts its browser in the background"""
+
+    # This helper lives at module-level because of the multiprocessing module's requirements.
+    _init_worker(*args, **kwargs)
+    if _eager_start_enabled():
+        WebDriverPool.start()
+
+
+# the pool initializer can only be replaced where django lets subclasses choose it
+_PARALLEL_INIT_WORKER_SUPPORTED = hasattr(ParallelTestSuite, "init_worker")
+
+
+class SeleniumParallelTestSuite(ParallelTestSuite):
+    init_worker = _init_selenium_worker
+
+
+class SeleniumTestRunner(DiscoverRunner):
+    """
+    A test runner that starts the browser in the background as soon as the tests are loaded.
+    This way the browser starts up while the test databases are being set up.
+    Set SELENIUM_EAGER_START = False to disable this behavior.
+
+    It also runs selenium tests once per entry of SELENIUM_WIDTHS, grouped by width.
+    When SELENIUM_COMMAND_REPORT is set, a report of all WebDriver commands is written at the end of the run.
+    Artifacts of failed tests (see SELENIUM_FAILURE_ARTIFACTS) are all written before the run ends.
+    """
+
+    parallel_test_suite = SeleniumParallelTestSuite
+
+    def build_suite(self, *args: Any, **kwargs: Any) -> TestSuite:
+        suite = super().build_suite(*args, **kwargs)
+
+        # parallel workers start their own browser, see _init_selenium_worker.
+        # the main process must not start any threads before forking them.
+        if isinstance(suite, ParallelTestSuite):
+            if not _PARALLEL_INIT_WORKER_SUPPORTED:
+                warnings.warn(
+                    "This version of Django does not support ParallelTestSuite.init_worker, "
+                    "parallel workers start their browser with their first test",
+                    RuntimeWarning,
+                )
+            suite.subsuites = [_expand_widths(subsuite) for subsuite in suite.subsuites]
+            return suite
+
+        suite = _expand_widths(suite)
+
+        if _eager_start_enabled() and any(
+            isinstance(test, SeleniumTestCase) for test in _iter_test_cases(suite)
+        ):
+            WebDriverPool.start()
+        return suite
+
+    def run_suite(self, suite: TestSuite, **kwargs: Any) -> Any:
+        try:
+            return super().run_suite(suite, **kwargs)
+        finally:
+            FailureArtifactWriter.flush_all()
+            if CommandRecorder.enabled():
+                CommandRecorder.write_report()
@@ -6,47 +6,163 @@ from selenium import webdriver
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
 
+from .profiles import TemplateProfileChrome, TemplateProfileFirefox
+
 if TYPE_CHECKING:
-    from typing import Any, Dict, List
+    from typing import Any, Dict, List, Optional
+
+# url patterns for use with block_urls, by type of resource
+BLOCK_IMAGES = ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.ico"]
+BLOCK_FONTS = ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"]
+BLOCK_MEDIA = ["*.mp3", "*.mp4", "*.ogg", "*.webm"]
+
+# switches used by fast=True, turning off chrome features that tests don't need
+FAST_CHROME_ARGUMENTS = [
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--disable-search-engine-choice-screen",
+    "--disable-extensions",
+    "--disable-component-extensions-with-background-pages",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-background-networking",
+    "--disable-client-side-phishing-detection",
+    "--disable-domain-reliability",
+    "--disable-breakpad",
+    "--metrics-recording-only",
+    "--disable-gpu",
+    "--mute-audio",
+    "--password-store=basic",
+    "--use-mock-keychain",
+    # tests don't run in the foreground, don't slow them down for it
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+    "--disable-features=Translate,OptimizationHints,MediaRouter,AutofillServerCommunication,CertificateTransparencyComponentUpdater",
+]
+
+# preferences used by fast=True, turning off firefox features that tests don't need
+FAST_FIREFOX_PREFERENCES = {
+    "app.update.disabledForTesting": True,
+    "browser.aboutwelcome.enabled": False,
+    "browser.discovery.enabled": False,
+    "browser.newtabpage.enabled": False,
+    "browser.safebrowsing.blockedURIs.enabled": False,
+    "browser.safebrowsing.downloads.enabled": False,
+    "browser.safebrowsing.malware.enabled": False,
+    "browser.safebrowsing.phishing.enabled": False,
+    "browser.sessionstore.resume_from_crash": False,
+    "browser.shell.checkDefaultBrowser": False,
+    "browser.startup.homepage_override.mstone": "ignore",
+    "datareporting.healthreport.uploadEnabled": False,
+    "datareporting.policy.dataSubmissionEnabled": False,
+    "extensions.getAddons.cache.enabled": False,
+    "extensions.update.enabled": False,
+    "layers.acceleration.disabled": True,
+    "media.autoplay.default": 5,
+    "network.captive-portal-service.enabled": False,
+    "network.connectivity-service.enabled": False,
+    "toolkit.telemetry.enabled": False,
+    "toolkit.telemetry.reportingpolicy.firstRun": False,
+}
 
 
 def make_chrome_driver(
-    args: List[Any], kwargs: Dict[str, Any], headless=False
+    args: List[Any],
+    kwargs: Dict[str, Any],
+    headless=False,
+    page_load_strategy: Optional[str] = None,
+    block_urls: Optional[List[str]] = None,
+    fast: bool = False,
+    profile_template: Optional[str] = None,
 ) -> Dict[str, Any]:
-    """Makes a new chrome driver settings instance"""
-    kwargs.update({"options": _make_chrome_options(headless)})
+    """
+    Makes a new chrome driver settings instance.
 
-    return {
-        "callable": webdriver.Chrome,
+    page_load_strategy is one of "normal" (the default), "eager" or "none".
+    block_urls is a list of url patterns, where "*" matches any number of characters.
+    The browser does not load any resources matching them.
+    fast turns off browser features tests don't need, see FAST_CHROME_ARGUMENTS.
+    profile_template is the path to a user data directory, which is copied for every browser started.
+    """
+    kwargs.update({"options": _make_chrome_options(headless, page_load_strategy, fast)})
+
+    callable = webdriver.Chrome
+    if profile_template is not None:
+        callable = TemplateProfileChrome
+        kwargs.update({"profile_template": profile_template})
+
+    config = {
+        "callable": callable,
         "args": args,
         "kwargs": kwargs,
     }
+    if block_urls:
+        # devtools commands to run once the browser has started
+        config["devtools"] = [
+            ("Network.enable", {}),
+            ("Network.setBlockedURLs", {"urls": list(block_urls)}),
+        ]
+    return config
 
 
-def _make_chrome_options(headless: bool) -> ChromeOptions:
+def _make_chrome_options(
+    headless: bool, page_load_strategy: Optional[str] = None, fast: bool = False
+) -> ChromeOptions:
     """Creates a new options instance for the chrome webdriver"""
     chrome_options = ChromeOptions()
     if headless:
         chrome_options.add_argument("--headless")
+    if fast:
+        for argument in FAST_CHROME_ARGUMENTS:
+            chrome_options.add_argument(argument)
+    if page_load_strategy is not None:
+        chrome_options.page_load_strategy = page_load_strategy
     return chrome_options
 
 
 def make_firefox_driver(
-    args: List[Any], kwargs: Dict[str, Any], headless=False
+    args: List[Any],
+    kwargs: Dict[str, Any],
+    headless=False,
+    page_load_strategy: Optional[str] = None,
+    fast: bool = False,
+    profile_template: Optional[str] = None,
 ) -> Dict[str, Any]:
-    """Makes a new chrome driver settings instance"""
-    kwargs.update({"options": _make_firefox_options(headless)})
+    """
+    Makes a new firefox driver settings instance.
+
+    page_load_strategy is one of "normal" (the default), "eager" or "none".
+    fast turns off browser features tests don't need, see FAST_FIREFOX_PREFERENCES.
+    profile_template is the path to a profile directory, which is copied for every browser started.
+    """
+    kwargs.update(
+        {"options": _make_firefox_options(headless, page_load_strategy, fast)}
+    )
+
+    callable = webdriver.Firefox
+    if profile_template is not None:
+        callable = TemplateProfileFirefox
+        kwargs.update({"profile_template": profile_template})
 
     return {
-        "callable": webdriver.Firefox,
+        "callable": callable,
         "args": args,
         "kwargs": kwargs,
     }
 
 
-def _make_firefox_options(headless: bool) -> FirefoxOptions:
+def _make_firefox_options(
+    headless: bool, page_load_strategy: Optional[str] = None, fast: bool = False
+) -> FirefoxOptions:
     """Creates a new options instance for the firefox webdriver"""
     firefox_options = FirefoxOptions()
     if headless:
         firefox_options.add_argument("--headless")
+    if fast:
+        for name, value in FAST_FIREFOX_PREFERENCES.items():
+            firefox_options.set_preference(name, value)
+    if page_load_strategy is not None:
+        firefox_options.page_load_strategy = page_load_strategy
     return firefox_options
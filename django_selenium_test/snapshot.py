@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import sqlite3
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Optional
+
+    from django.db.backends.base.base import BaseDatabaseWrapper
+
+
+class DatabaseSnapshot(ABC):
+    """A copy of the contents of a test database, which can be restored many times"""
+
+    def __init__(self, connection: BaseDatabaseWrapper) -> None:
+        self.connection = connection
+
+    @abstractmethod
+    def restore(self) -> None:
+        """Puts the contents of the database back to what they were when the snapshot was taken"""
+
+    def discard(self) -> None:
+        pass
+
+
+class SQLiteSnapshot(DatabaseSnapshot):
+    """Copies an sqlite database into memory using the backup api, keeping the connection open"""
+
+    def __init__(self, connection: BaseDatabaseWrapper) -> None:
+        super().__init__(connection)
+        self.copy = sqlite3.connect(":memory:", check_same_thread=False)
+        self.connection.ensure_connection()
+        self.connection.connection.backup(self.copy)
+
+    def restore(self) -> None:
+        self.connection.ensure_connection()
+        self.copy.backup(self.connection.connection)
+
+    def discard(self) -> None:
+        self.copy.close()
+
+
+class PostgreSQLSnapshot(DatabaseSnapshot):
+    """Copies a postgres database into a template database, and re-creates the database from it to restore"""
+
+    def __init__(self, connection: BaseDatabaseWrapper) -> None:
+        super().__init__(connection)
+        self.name = connection.settings_dict["NAME"]
+        # database names are limited to 63 characters
+        self.template = self.name[:54] + "_snapshot"
+        self.execute("DROP DATABASE IF EXISTS {template}")
+        self.execute("CREATE DATABASE {template} TEMPLATE {name}", disconnect=True)
+
+    def execute(self, sql: str, disconnect: bool = False) -> None:
+        """Runs sql without being connected to the database, and first disconnects everyone else if disconnect is True"""
+        quote_name = self.connection.ops.quote_name
+
+        # databases can only be copied or dropped while nobody is connected to them
+        self.connection.close()
+        with self.connection._nodb_cursor() as cursor:
+            if disconnect:
+                # e.g. connections left open by the live server
+                cursor.execute(
+                    "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                    "WHERE datname = %s AND pid <> pg_backend_pid()",
+                    [self.name],
+                )
+            cursor.execute(
+                sql.format(
+                    name=quote_name(self.name), template=quote_name(self.template)
+                )
+            )
+
+    def restore(self) -> None:
+        # postgres 13 can close the connections of others itself
+        if self.connection.pg_version >= 130000:
+            self.execute("DROP DATABASE {name} WITH (FORCE)")
+        else:
+            self.execute("DROP DATABASE {name}", disconnect=True)
+        self.execute("CREATE DATABASE {name} TEMPLATE {template}")
+
+    def discard(self) -> None:
+        self.execute("DROP DATABASE IF EXISTS {template}")
+
+
+def take_snapshot(connection: BaseDatabaseWrapper) -> Optional[DatabaseSnapshot]:
+    """Takes a snapshot of the database behind connection, or returns None if its backend is not supported"""
+
+    if connection.vendor == "sqlite":
+        return SQLiteSnapshot(connection)
+    if connection.vendor == "postgresql":
+        return PostgreSQLSnapshot(connection)
+    return None
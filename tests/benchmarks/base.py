@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.client import HTTPConnection, HTTPException
+from typing import TYPE_CHECKING
+from unittest import SkipTest
+from urllib.parse import urlsplit
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.test import override_settings
+
+from django_selenium_test import IntegrationTest, WebDriverPool
+
+from ..webdriver_stub import StubWebDriverServer, create_stub_driver
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, Optional
+
+# results of all benchmarks run in this process, by name
+RESULTS: Dict[str, Dict[str, Any]] = {}
+
+# results of all throughput benchmarks run in this process, by name
+THROUGHPUT: Dict[str, Dict[str, Any]] = {}
+
+
+# keep-alive connections to django's own live server stall on every response, see bench_live_server
+@override_settings(SELENIUM_LIVE_SERVER_WORKERS=8)
+class BenchmarkTestCase(IntegrationTest):
+    """
+    Measures operations of django_selenium_test against the stub WebDriver server.
+
+    Every operation is run a number of times, and the WebDriver round trips and wall time it takes are reported.
+    Set the BENCHMARK_ITERATIONS environment variable to change the number of runs,
+    and BENCHMARK_REPORT to a path to also write the results as json.
+    """
+
+    find_element_selector = "main"
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        config = WebDriverPool.driver_config()
+        if config is None or config["callable"] is not create_stub_driver:
+            raise SkipTest("Benchmarks need SELENIUM_WEBDRIVER=stub")
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        # django's live server can only close idle keep-alive connections while it is running
+        StubWebDriverServer.instance().close_connections()
+        super().tearDownClass()
+        report_benchmarks()
+
+    def setUp(self) -> None:
+        User.objects.create(
+            username="alice", password=make_password("topsecret"), is_active=True
+        )
+        super().setUp()
+
+    def benchmark(
+        self,
+        name: str,
+        operation: Callable[[], Any],
+        setup: Optional[Callable[[], Any]] = None,
+    ) -> None:
+        """Runs operation (preceded by setup, which is not measured) and records the results under name"""
+
+        server = StubWebDriverServer.instance()
+        iterations = int(os.environ.get("BENCHMARK_ITERATIONS", "20"))
+
+        round_trips = []
+        seconds = []
+        for i in range(iterations + 1):
+            if setup is not None:
+                setup()
+
+            before = server.request_count
+            start = time.perf_counter()
+            operation()
+            end = time.perf_counter()
+
+            # the first run only warms up
+            if i == 0:
+                continue
+            seconds.append(end - start)
+            round_trips.append(server.request_count - before)
+
+        RESULTS[name] = {
+            "iterations": iterations,
+            "round_trips": max(round_trips),
+            "median_ms": statistics.median(seconds) * 1000,
+            "min_ms": min(seconds) * 1000,
+        }
+
+    def benchmark_throughput(
+        self,
+        name: str,
+        path: str,
+        clients: int = 6,
+        keep_alive: bool = True,
+        idle_connections: int = 0,
+    ) -> None:
+        """
+        Requests path from the live server using several concurrent clients, and records requests per second.
+        idle_connections are opened before, and kept open without being used, like a browser does.
+        """
+
+        parts = urlsplit(self.live_server_url)
+        requests = int(os.environ.get("BENCHMARK_ITERATIONS", "20")) * 10
+
+        def get(connection: Optional[HTTPConnection]) -> Optional[HTTPConnection]:
+            # like browsers, try again on a new connection if the server closed an idle one
+            for retry in (False, True):
+                if connection is None:
+                    connection = HTTPConnection(parts.hostname, parts.port, timeout=30)
+                try:
+                    connection.request("GET", path)
+                    response = connection.getresponse()
+                    response.read()
+                    break
+                except (ConnectionError, HTTPException):
+                    connection.close()
+                    connection = None
+                    if retry:
+                        raise
+            if not keep_alive or response.will_close:
+                connection.close()
+                connection = None
+            return connection
+
+        def client() -> None:
+            connection = None
+            for _ in range(requests):
+                connection = get(connection)
+            if connection is not None:
+                connection.close()
+
+        idle = [get(None) for _ in range(idle_connections)]
+
+        threads = [threading.Thread(target=client) for _ in range(clients)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - start
+
+        for connection in idle:
+            if connection is not None:
+                connection.close()
+
+        THROUGHPUT[name] = {
+            "clients": clients,
+            "requests": clients * requests,
+            "requests_per_second": clients * requests / seconds,
+        }
+
+
+def report_benchmarks() -> None:
+    """Prints the results so far, and writes them to BENCHMARK_REPORT if set"""
+
+    lines = [
+        "",
+        "{:<45} {:>11} {:>11} {:>9}".format(
+            "operation", "round trips", "median ms", "min ms"
+        ),
+    ]
+    for name in sorted(RESULTS.keys()):
+        result = RESULTS[name]
+        lines.append(
+            "{:<45} {:>11} {:>11.2f} {:>9.2f}".format(
+                name, result["round_trips"], result["median_ms"], result["min_ms"]
+            )
+        )
+
+    if THROUGHPUT:
+        lines.append("")
+        lines.append(
+            "{:<45} {:>11} {:>11}".format("live server", "clients", "requests/s")
+        )
+        for name in sorted(THROUGHPUT.keys()):
+            result = THROUGHPUT[name]
+            lines.append(
+                "{:<45} {:>11} {:>11.0f}".format(
+                    name, result["clients"], result["requests_per_second"]
+                )
+            )
+    sys.stderr.write("\n".join(lines) + "\n")
+
+    path = os.environ.get("BENCHMARK_REPORT")
+    if path:
+        with open(path, "w") as f:
+            json.dump(
+                {"operations": RESULTS, "throughput": THROUGHPUT},
+                f,
+                indent=2,
+                sort_keys=True,
+            )
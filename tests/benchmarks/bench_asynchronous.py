@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import asyncio
+
+from django_selenium_test import AsyncBrowser
+
+from .base import BenchmarkTestCase
+
+
+class AsyncBrowserBenchmark(BenchmarkTestCase):
+    sessions = 4
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        # browsers keep their connection open, so all iterations run in the same loop
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+        self.browsers = [
+            self.loop.run_until_complete(AsyncBrowser.start(self))
+            for _ in range(self.sessions)
+        ]
+        for browser in self.browsers:
+            self.addCleanup(self.loop.run_until_complete, browser.close())
+
+    def gather(self, *coroutines) -> None:
+        async def gather() -> None:
+            await asyncio.gather(*coroutines)
+
+        self.loop.run_until_complete(gather())
+
+    def test_load_live_url(self) -> None:
+        def load_sequentially() -> None:
+            for _ in range(self.sessions):
+                self.load_live_url("integration")
+
+        self.benchmark(
+            "load_live_url x{} (one after another)".format(self.sessions),
+            load_sequentially,
+        )
+        self.benchmark(
+            "AsyncBrowser.load_live_url x{} (at once)".format(self.sessions),
+            lambda: self.gather(
+                *(browser.load_live_url("integration") for browser in self.browsers)
+            ),
+        )
+
+    def test_fill_out_form(self) -> None:
+        browser = self.browsers[0]
+        self.benchmark(
+            "AsyncBrowser.fill_out_form",
+            lambda: self.gather(
+                browser.fill_out_form(
+                    "integration", "input_id_submit", send_form_keys={"id_a": "Hello"}
+                )
+            ),
+        )
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from django.contrib.auth.models import User
+
+from selenium.webdriver.common.by import By
+
+from django_selenium_test import (
+    PageElement,
+    PageElementGroup,
+    SeleniumWrapper,
+    wait_for_any,
+)
+
+from .base import BenchmarkTestCase
+
+
+class PageElementBenchmark(BenchmarkTestCase):
+    test = PageElement(By.ID, "test")
+    displayed = PageElement(By.ID, "displayed")
+    not_displayed = PageElement(By.ID, "not_displayed")
+    not_exists = PageElement(By.ID, "not_exists")
+    submit = PageElement(By.ID, "input_id_submit")
+    group = PageElementGroup(
+        {
+            "test": test,
+            "displayed": displayed,
+            "not_displayed": not_displayed,
+            "not_exists": not_exists,
+        },
+        attributes=["id"],
+    )
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.load_live_url("integration")
+
+    def test_properties(self) -> None:
+        def read() -> None:
+            self.test.is_displayed()
+            self.test.text
+
+        self.benchmark("PageElement.is_displayed() and .text", read)
+
+    def test_wait_until_exists(self) -> None:
+        self.benchmark("PageElement.wait_until_exists", self.test.wait_until_exists)
+
+    def test_wait_until_not_exists(self) -> None:
+        self.benchmark(
+            "PageElement.wait_until_not_exists", self.not_exists.wait_until_not_exists
+        )
+
+    def test_wait_until_is_displayed(self) -> None:
+        self.benchmark(
+            "PageElement.wait_until_is_displayed",
+            self.displayed.wait_until_is_displayed,
+        )
+
+    def test_wait_until_not_displayed(self) -> None:
+        self.benchmark(
+            "PageElement.wait_until_not_displayed",
+            self.not_displayed.wait_until_not_displayed,
+        )
+
+    def test_wait_until_contains(self) -> None:
+        self.benchmark(
+            "PageElement.wait_until_contains",
+            lambda: self.test.wait_until_contains("Test Element"),
+        )
+
+    def test_wait_until_is_clickable(self) -> None:
+        self.benchmark(
+            "PageElement.wait_until_is_clickable", self.submit.wait_until_is_clickable
+        )
+
+    def test_wait_for_any(self) -> None:
+        self.benchmark(
+            "wait_for_any",
+            lambda: wait_for_any(
+                {
+                    "missing": (self.not_exists, "displayed"),
+                    "test": (self.test, "contains", "Test Element"),
+                }
+            ),
+        )
+
+    def test_snapshot(self) -> None:
+        self.benchmark("PageElementGroup.snapshot", self.group.snapshot)
+
+
+class ForceLoginBenchmark(BenchmarkTestCase):
+    def test_force_login(self) -> None:
+        alice = User.objects.get(username="alice")
+
+        def force_login():
+            self.selenium.force_login(alice, base_url=self.live_server_url)
+
+        def clear():
+            self.selenium.delete_all_cookies()
+            SeleniumWrapper._session_cache.clear()
+
+        self.benchmark("SeleniumWrapper.force_login", force_login, setup=clear)
+        self.benchmark(
+            "SeleniumWrapper.force_login (cached session)",
+            force_login,
+            setup=self.selenium.delete_all_cookies,
+        )
+
+    def test_force_login_no_refresh(self) -> None:
+        alice = User.objects.get(username="alice")
+        self.benchmark(
+            "SeleniumWrapper.force_login (refresh=False)",
+            lambda: self.selenium.force_login(
+                alice, base_url=self.live_server_url, refresh=False
+            ),
+            setup=self.selenium.delete_all_cookies,
+        )
+
+
+class ResetBenchmark(BenchmarkTestCase):
+    def test_reset(self) -> None:
+        self.load_live_url("integration")
+        self.benchmark(
+            "SeleniumWrapper.reset",
+            lambda: self.selenium.reset(self.live_server_url),
+        )
+
+    def test_isolated_window(self) -> None:
+        self.load_live_url("integration")
+
+        def isolated_window():
+            self.selenium.open_isolated_window(self.live_server_url)
+            self.selenium.close_isolated_window()
+
+        self.benchmark("SeleniumWrapper.open/close_isolated_window", isolated_window)
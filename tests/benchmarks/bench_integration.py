@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from .base import BenchmarkTestCase
+
+FORM = {
+    "url_pattern": "integration",
+    "submit_button": "input_id_submit",
+    "send_form_keys": {"id_a": "Filled A", "id_c": "Filled C"},
+    "select_dropdowns": {"id_b": "b"},
+}
+
+
+class URLBenchmark(BenchmarkTestCase):
+    def test_load_live_url(self) -> None:
+        self.benchmark("load_live_url", lambda: self.load_live_url("integration"))
+
+    def test_load_live_url_reuse_if_current(self) -> None:
+        self.benchmark(
+            "load_live_url (reuse_if_current)",
+            lambda: self.load_live_url("integration", reuse_if_current=True),
+        )
+
+    def test_assert_elements(self) -> None:
+        self.load_live_url("integration")
+        self.benchmark(
+            "assert_elements",
+            lambda: self.assert_elements(
+                exists=["#exists", "#displayed"],
+                not_exists=["#not_exists"],
+                displayed=["#displayed"],
+                not_displayed=["#not_displayed"],
+            ),
+        )
+
+
+class FormBenchmark(BenchmarkTestCase):
+    def test_fill_out_form(self) -> None:
+        self.benchmark("fill_out_form", lambda: self.fill_out_form(**FORM))
+
+    def test_fill_out_form_scripted(self) -> None:
+        self.benchmark(
+            "fill_out_form (scripted)",
+            lambda: self.fill_out_form(scripted=True, **FORM),
+        )
+
+    def test_submit_form(self) -> None:
+        self.benchmark(
+            "submit_form (scripted)",
+            lambda: self.submit_form(scripted=True, **FORM),
+        )
+
+
+class DownloadBenchmark(BenchmarkTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.load_live_url("integration")
+
+    def test_get_url_download(self) -> None:
+        self.benchmark(
+            "get_url_download", lambda: self.get_url_download("integrationdownload")
+        )
+
+    def test_get_url_download_stream(self) -> None:
+        def download():
+            ok, data = self.get_url_download("integrationdownload", stream=True)
+            data.close()
+
+        self.benchmark("get_url_download (stream)", download)
+
+    def test_get_form_download(self) -> None:
+        button = self.find_element("#input_id_download")
+        self.benchmark("get_form_download", lambda: self.get_form_download(button))
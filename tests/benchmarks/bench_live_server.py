@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from django.test import override_settings
+
+from .base import BenchmarkTestCase
+
+
+@override_settings(SELENIUM_LIVE_SERVER_WORKERS=None)
+class LiveServerBenchmark(BenchmarkTestCase):
+    server = "django"
+
+    def test_page(self) -> None:
+        self.benchmark_throughput("{}: page".format(self.server), "/core/")
+
+    def test_page_without_keep_alive(self) -> None:
+        self.benchmark_throughput(
+            "{}: page, new connections".format(self.server),
+            "/core/",
+            keep_alive=False,
+        )
+
+    def test_page_with_idle_connections(self) -> None:
+        # more clients than workers, and a browser keeping connections open
+        self.benchmark_throughput(
+            "{}: page, 8 idle connections".format(self.server),
+            "/core/",
+            clients=12,
+            idle_connections=8,
+        )
+
+    def test_load_live_url(self) -> None:
+        self.benchmark(
+            "load_live_url ({} server)".format(self.server),
+            lambda: self.load_live_url("integration"),
+        )
+
+
+@override_settings(SELENIUM_LIVE_SERVER_WORKERS=8)
+class ConcurrentLiveServerBenchmark(LiveServerBenchmark):
+    server = "8 workers"
+
+
+class StaticFilesBenchmark(BenchmarkTestCase):
+    def test_static_file(self) -> None:
+        self.benchmark_throughput("static file", "/static/tests/style.css")
+
+    @override_settings(SELENIUM_STATIC_CACHE=False)
+    def test_static_file_without_cache(self) -> None:
+        self.benchmark_throughput(
+            "static file, SELENIUM_STATIC_CACHE=False", "/static/tests/style.css"
+        )
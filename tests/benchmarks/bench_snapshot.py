@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from .base import BenchmarkTestCase
+
+
+class FixturesBenchmark(BenchmarkTestCase):
+    fixtures = ["users"]
+    name = "flush and load fixtures"
+
+    def test_fixtures(self) -> None:
+        def reset():
+            self._fixture_teardown()
+            self._fixture_setup()
+
+        self.benchmark("{} (200 users)".format(self.name), reset)
+
+
+class SnapshotBenchmark(FixturesBenchmark):
+    snapshot_databases = True
+    name = "restore snapshot"
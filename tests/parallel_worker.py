@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+import os
+
+from django.test import SimpleTestCase
+
+from django_selenium_test import WebDriverPool
+
+
+class WorkerTest(SimpleTestCase):
+    """Run inside a parallel test worker by the runner tests, and not collected on its own"""
+
+    def test_browser_started(self):
+        # a forked worker inherits the drivers of its parent, but under another pid
+        self.assertIn(os.getpid(), WebDriverPool._futures)
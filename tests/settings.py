@@ -5,10 +5,14 @@ from selenium import webdriver
 
 from django_selenium_test.settings import make_chrome_driver, make_firefox_driver
 
+from .webdriver_stub import make_stub_driver
+
 DEBUG = False
 
 ROOT_URLCONF = "tests.urls"
 
+TEST_RUNNER = "django_selenium_test.runner.SeleniumTestRunner"
+
 SECRET_KEY = "topsecret"
 
 ALLOWED_HOSTS = ["*"]
@@ -28,6 +32,9 @@ DATABASES = {
 }
 
 STATIC_URL = "/static/"
+STATICFILES_DIRS = [os.path.join(os.path.dirname(__file__), "static")]
+
+FIXTURE_DIRS = [os.path.join(os.path.dirname(__file__), "fixtures")]
 
 INSTALLED_APPS = [
     "django.contrib.contenttypes",
@@ -51,4 +58,7 @@ SELENIUM_WEBDRIVERS = {
     "default": make_chrome_driver([], {}, headless=headless),
     "chrome": make_chrome_driver([], {}, headless=headless),
     "firefox": make_firefox_driver([], {}, headless=headless),
+    # runs without a browser, see tests/webdriver_stub.py
+    "stub": make_stub_driver([], {}),
+    "stub-no-wait": make_stub_driver([], {}, page_load_strategy="none"),
 }
@@ -1,13 +1,42 @@
-from unittest import SkipTest
+import multiprocessing
+import os
+import tempfile
+from unittest import SkipTest, TestResult, TestSuite, mock
 
 import django
 from django.core import management
-from django.test import TestCase, override_settings
-
-from selenium.common.exceptions import TimeoutException
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from selenium.common.exceptions import (
+    JavascriptException,
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+)
+from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.common.by import By
 
-from django_selenium_test import PageElement, SeleniumTestCase
+from django_selenium_test import (
+    BLANK_PAGE_PATH,
+    LiveServerHandler,
+    PageElement,
+    PageElementGroup,
+    SeleniumTestCase,
+    SeleniumWrapper,
+    WebDriverPool,
+    wait_for_all,
+    wait_for_any,
+)
+from django_selenium_test.profiles import ProfileTemplateMixin, TemplateProfileChrome
+from django_selenium_test.runner import SeleniumParallelTestSuite, _expand_widths
+from django_selenium_test.settings import (
+    BLOCK_IMAGES,
+    FAST_CHROME_ARGUMENTS,
+    make_chrome_driver,
+    make_firefox_driver,
+)
+
+from ..parallel_worker import WorkerTest
 
 
 class DjangoSeleniumCleanTestCase(SeleniumTestCase):
@@ -20,6 +49,15 @@ class DjangoSeleniumCleanTestCase(SeleniumTestCase):
     button_toggle_message = PageElement(By.ID, "toggle-message")
     togglable = PageElement(By.ID, "togglable")
     message = PageElement(By.ID, "message")
+    headings = PageElementGroup(
+        {
+            "earth": heading_earth,
+            "world": heading_world,
+            "togglable": togglable,
+            "button": (By.CSS_SELECTOR, "#toggle-heading"),
+        },
+        attributes=["id"],
+    )
 
     def _load_core_page(self):
         self.selenium.get(self.live_server_url + "/core")
@@ -43,6 +81,37 @@ class DjangoSeleniumCleanTestCase(SeleniumTestCase):
         self.assertTrue(self.heading_earth.is_displayed())
         self.assertFalse(self.heading_world.is_displayed())
 
+    def test_snapshot(self):
+        self._load_core_page()
+
+        snapshot = self.headings.snapshot()
+        self.assertEqual(
+            set(snapshot.keys()), {"earth", "world", "togglable", "button"}
+        )
+
+        self.assertTrue(snapshot["earth"].exists)
+        self.assertTrue(snapshot["earth"].displayed)
+        self.assertEqual(snapshot["earth"].text, "Greetings to earth")
+        self.assertEqual(snapshot["earth"].attributes, {"id": "earth"})
+
+        self.assertTrue(snapshot["world"].exists)
+        self.assertFalse(snapshot["world"].displayed)
+        self.assertEqual(snapshot["world"].text, "")
+
+        self.assertFalse(snapshot["togglable"].exists)
+        self.assertEqual(snapshot["togglable"].attributes, {"id": None})
+
+        self.assertTrue(snapshot["button"].displayed)
+
+        # toggle and check that the snapshot changes
+        self.button_toggle_heading.click()
+        self.heading_world.wait_until_is_displayed()
+
+        snapshot = self.headings.snapshot()
+        self.assertFalse(snapshot["earth"].displayed)
+        self.assertTrue(snapshot["world"].displayed)
+        self.assertEqual(snapshot["world"].text, "Hello, world!")
+
     def test_login(self):
         from django.contrib.auth.hashers import make_password
         from django.contrib.auth.models import User
@@ -225,3 +294,660 @@ class DjangoSeleniumCleanSkipTestCase(TestCase):
         # use case because the Selenium test might be skipped). Therefore the
         # "executing" of the test case should raise no error.
         instance()
+
+
+class FakeDriverError(Exception):
+    pass
+
+
+def make_broken_driver():
+    raise FakeDriverError("browser did not start")
+
+
+class FakeDriver(object):
+    """A fake driver that does not start any browser"""
+
+    capabilities = {"browserName": "fake"}
+
+    def __init__(self):
+        self.quit_called = False
+        self.cdp_commands = []
+
+    def execute_cdp_cmd(self, command, params):
+        self.cdp_commands.append((command, params))
+
+    def quit(self):
+        self.quit_called = True
+
+
+class FakeOptionsDriver(object):
+    def __init__(self, options):
+        self.options = options
+
+    def quit(self):
+        pass
+
+
+class FakeTemplateProfileDriver(ProfileTemplateMixin, FakeOptionsDriver):
+    def use_profile(self, options, directory):
+        options.add_argument("--user-data-dir=" + directory)
+
+
+class ProfileTemplateTestCase(SimpleTestCase):
+    def test_profile_template(self):
+        template = tempfile.TemporaryDirectory()
+        self.addCleanup(template.cleanup)
+        os.mkdir(os.path.join(template.name, "Default"))
+        for name in ["Default/Preferences", "SingletonLock"]:
+            with open(os.path.join(template.name, name), "w") as f:
+                f.write("{}")
+
+        options = ChromeOptions()
+        driver = FakeTemplateProfileDriver(
+            options=options, profile_template=template.name
+        )
+
+        # the template is copied, without lock files
+        directory = driver.profile_directory
+        self.assertTrue(os.path.isfile(os.path.join(directory, "Default/Preferences")))
+        self.assertFalse(os.path.exists(os.path.join(directory, "SingletonLock")))
+        self.assertEqual(driver.options.arguments, ["--user-data-dir=" + directory])
+        self.assertEqual(options.arguments, [])
+
+        # and removed once the browser quits
+        driver.quit()
+        self.assertFalse(os.path.exists(directory))
+
+
+@override_settings(
+    SELENIUM_WEBDRIVERS={
+        "default": {"callable": FakeDriver, "args": [], "kwargs": {}},
+    }
+)
+@mock.patch.dict(os.environ, {"SELENIUM_WEBDRIVER": "default"})
+class WebDriverPoolTestCase(SimpleTestCase):
+    def setUp(self):
+        # use an empty pool, so that we don't touch any real browser
+        for name in ["_drivers", "_futures"]:
+            patcher = mock.patch.object(WebDriverPool, name, {})
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_driver_is_reused(self):
+        driver = WebDriverPool.get()
+        self.assertIsInstance(driver, FakeDriver)
+        self.assertIs(WebDriverPool.get(), driver)
+
+        # quitting creates a new driver on next use
+        WebDriverPool.quit()
+        self.assertTrue(driver.quit_called)
+        self.assertIsNot(WebDriverPool.get(), driver)
+
+    def test_driver_per_process(self):
+        with mock.patch("os.getpid", return_value=1):
+            first = WebDriverPool.get()
+        with mock.patch("os.getpid", return_value=2):
+            second = WebDriverPool.get()
+        self.assertIsNot(first, second)
+
+    def test_driver_started_in_background(self):
+        WebDriverPool.start()
+        driver = WebDriverPool.get()
+        self.assertIsInstance(driver, FakeDriver)
+        self.assertIs(WebDriverPool.get(), driver)
+
+    @override_settings(
+        SELENIUM_WEBDRIVERS={
+            "default": {
+                "callable": FakeDriver,
+                "args": [],
+                "kwargs": {},
+                "devtools": [("Network.setBlockedURLs", {"urls": ["*.png"]})],
+            },
+        }
+    )
+    def test_devtools_commands(self):
+        driver = WebDriverPool.get()
+        self.assertEqual(
+            driver.cdp_commands, [("Network.setBlockedURLs", {"urls": ["*.png"]})]
+        )
+
+    def test_driver_settings(self):
+        config = make_chrome_driver(
+            [], {}, page_load_strategy="eager", block_urls=BLOCK_IMAGES
+        )
+        self.assertEqual(config["kwargs"]["options"].page_load_strategy, "eager")
+        self.assertEqual(
+            config["devtools"],
+            [
+                ("Network.enable", {}),
+                ("Network.setBlockedURLs", {"urls": BLOCK_IMAGES}),
+            ],
+        )
+
+        # by default, nothing changes
+        config = make_chrome_driver([], {})
+        self.assertEqual(config["kwargs"]["options"].page_load_strategy, "normal")
+        self.assertNotIn("devtools", config)
+
+        config = make_firefox_driver([], {}, page_load_strategy="none")
+        self.assertEqual(config["kwargs"]["options"].page_load_strategy, "none")
+        with self.assertRaises(ValueError):
+            make_firefox_driver([], {}, page_load_strategy="fast")
+
+    def test_fast_driver_settings(self):
+        config = make_chrome_driver([], {}, headless=True, fast=True)
+        arguments = config["kwargs"]["options"].arguments
+        self.assertEqual(arguments, ["--headless"] + FAST_CHROME_ARGUMENTS)
+
+        config = make_firefox_driver([], {}, fast=True)
+        preferences = config["kwargs"]["options"].preferences
+        self.assertIs(preferences["browser.shell.checkDefaultBrowser"], False)
+
+        config = make_chrome_driver([], {}, profile_template="/profiles/chrome")
+        self.assertIs(config["callable"], TemplateProfileChrome)
+        self.assertEqual(config["kwargs"]["profile_template"], "/profiles/chrome")
+
+    @override_settings(
+        SELENIUM_WEBDRIVERS={
+            "default": {"callable": make_broken_driver, "args": [], "kwargs": {}},
+        }
+    )
+    def test_background_error_is_raised(self):
+        WebDriverPool.start()
+
+        # the error is raised on every attempt to get the driver
+        with self.assertRaises(FakeDriverError):
+            WebDriverPool.get()
+        with self.assertRaises(FakeDriverError):
+            WebDriverPool.get()
+
+
+class LiveServerHandlerTestCase(SimpleTestCase):
+    def test_blank_page(self):
+        application = mock.Mock()
+        start_response = mock.Mock()
+        handler = LiveServerHandler(application)
+
+        environ = RequestFactory().get(BLANK_PAGE_PATH).environ
+        body = handler(environ, start_response)
+
+        self.assertEqual(b"".join(body), b"")
+        self.assertEqual(start_response.call_args[0][0], "200 OK")
+        application.assert_not_called()
+
+    def test_other_pages(self):
+        application = mock.Mock(return_value=[b"hello"])
+        start_response = mock.Mock()
+        handler = LiveServerHandler(application)
+
+        environ = RequestFactory().get("/core/").environ
+        body = handler(environ, start_response)
+
+        self.assertEqual(body, [b"hello"])
+        application.assert_called_once_with(environ, start_response)
+
+
+class ForceLoginSessionCacheTestCase(TestCase):
+    def setUp(self):
+        from django.contrib.auth.hashers import make_password
+        from django.contrib.auth.models import User
+
+        self.alice = User.objects.create(
+            username="alice", password=make_password("topsecret"), is_active=True
+        )
+
+        # use an empty cache
+        patcher = mock.patch.object(SeleniumWrapper, "_session_cache", {})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # create a wrapper around a fake driver, bypassing the browser singleton
+        self.selenium = object.__new__(SeleniumWrapper)
+        self.selenium.driver = mock.Mock()
+
+    def _force_login(self):
+        """Logs alice in and returns the session key that was set"""
+        self.selenium.force_login(self.alice, base_url="http://localhost")
+        return self.selenium.driver.execute_cdp_cmd.call_args[0][1]["value"]
+
+    def test_session_is_reused(self):
+        first = self._force_login()
+        self.assertEqual(self._force_login(), first)
+
+    def test_password_change(self):
+        first = self._force_login()
+
+        self.alice.set_password("newsecret")
+        self.alice.save()
+
+        self.assertNotEqual(self._force_login(), first)
+
+    def test_session_change(self):
+        from django.contrib.sessions.backends.db import SessionStore
+
+        first = self._force_login()
+
+        session = SessionStore(first)
+        session["something"] = "else"
+        session.save()
+
+        self.assertNotEqual(self._force_login(), first)
+
+    def test_session_delete(self):
+        from django.contrib.sessions.backends.db import SessionStore
+
+        first = self._force_login()
+        SessionStore(first).delete()
+
+        # e.g. the database was flushed, the session is written back
+        self.assertEqual(self._force_login(), first)
+        self.assertIsNotNone(SessionStore(first).load().get("_auth_user_id"))
+
+
+class ResetTestCase(SimpleTestCase):
+    def setUp(self):
+        # create a wrapper around a fake driver, bypassing the browser singleton
+        self.selenium = object.__new__(SeleniumWrapper)
+        self.selenium.driver = mock.Mock()
+
+    def cdp_commands(self):
+        return [c[0][0] for c in self.selenium.driver.execute_cdp_cmd.call_args_list]
+
+    def test_reset_devtools(self):
+        self.selenium.reset("http://localhost:1234/")
+        self.selenium.driver.execute_cdp_cmd.assert_called_once()
+        command, params = self.selenium.driver.execute_cdp_cmd.call_args[0]
+        self.assertEqual(command, "Storage.clearDataForOrigin")
+        self.assertEqual(params["origin"], "http://localhost:1234")
+        self.assertIn("local_storage", params["storageTypes"].split(","))
+
+        # session storage is cleared using a script
+        args = self.selenium.driver.execute_async_script.call_args[0]
+        self.assertEqual(args[1:], ("http://localhost:1234", False))
+        self.selenium.driver.delete_all_cookies.assert_not_called()
+
+    def test_reset_cache(self):
+        self.selenium.reset("http://localhost:1234", cache=True)
+        self.assertEqual(
+            self.cdp_commands(),
+            ["Storage.clearDataForOrigin", "Network.clearBrowserCache"],
+        )
+
+        with override_settings(SELENIUM_RESET_CACHE=True):
+            self.selenium.reset("http://localhost:1234")
+        self.assertEqual(self.cdp_commands()[-1], "Network.clearBrowserCache")
+
+    def test_reset_without_devtools(self):
+        driver = self.selenium.driver
+        driver.execute_cdp_cmd.side_effect = AssertionError("Unrecognised command")
+
+        # not on the live server yet, so a page is loaded first
+        driver.execute_async_script.side_effect = [False, True]
+        self.selenium.reset("http://localhost:1234")
+        driver.delete_all_cookies.assert_called_once()
+        driver.get.assert_called_once_with("http://localhost:1234" + BLANK_PAGE_PATH)
+        self.assertEqual(driver.execute_async_script.call_count, 2)
+
+        # devtools are not tried again
+        driver.execute_async_script.side_effect = [True]
+        self.selenium.reset("http://localhost:1234")
+        self.assertEqual(driver.execute_cdp_cmd.call_count, 1)
+        self.assertEqual(driver.get.call_count, 1)
+
+    def test_reset_firefox(self):
+        # selenium defines execute_cdp_cmd on every driver, but fails with a RuntimeError for firefox
+        driver = self.selenium.driver
+        driver.execute_cdp_cmd.side_effect = RuntimeError(
+            "CDP support for Firefox has been removed."
+        )
+        driver.execute_async_script.side_effect = [True]
+        self.selenium.reset("http://localhost:1234")
+        driver.delete_all_cookies.assert_called_once()
+        self.assertEqual(driver.execute_cdp_cmd.call_count, 1)
+
+        # a browser known to lack devtools is not asked at all
+        self.selenium.driver = driver = mock.Mock(
+            capabilities={"browserName": "firefox"}
+        )
+        driver.execute_async_script.side_effect = [True]
+        self.selenium.reset("http://localhost:1234")
+        driver.delete_all_cookies.assert_called_once()
+        driver.execute_cdp_cmd.assert_not_called()
+
+
+class IsolatedWindowTestCase(SimpleTestCase):
+    def setUp(self):
+        # create a wrapper around a fake driver, bypassing the browser singleton
+        self.selenium = object.__new__(SeleniumWrapper)
+        self.selenium.driver = mock.Mock()
+        self.selenium.driver.current_window_handle = "previous"
+
+    def test_isolated_window_devtools(self):
+        driver = self.selenium.driver
+        results = {
+            "Target.createBrowserContext": {"browserContextId": "context"},
+            "Target.createTarget": {"targetId": "target"},
+        }
+        driver.execute_cdp_cmd.side_effect = lambda command, params: results.get(
+            command, {}
+        )
+        self.selenium.set_window_size(1024, 768)
+
+        self.selenium.open_isolated_window("http://localhost:1234")
+        driver.switch_to.window.assert_called_once_with("target")
+        self.assertEqual(
+            driver.execute_cdp_cmd.call_args_list[1][0][1]["browserContextId"],
+            "context",
+        )
+
+        # the new window gets the size of the previous one
+        self.assertEqual(driver.set_window_size.call_count, 2)
+
+        self.selenium.close_isolated_window()
+        driver.switch_to.window.assert_called_with("previous")
+        driver.execute_cdp_cmd.assert_called_with(
+            "Target.disposeBrowserContext", {"browserContextId": "context"}
+        )
+        driver.close.assert_not_called()
+
+        # nothing left to close
+        self.selenium.close_isolated_window()
+        self.assertEqual(driver.switch_to.window.call_count, 2)
+
+    def test_isolated_window_blocks_urls(self):
+        driver = self.selenium.driver
+        results = {
+            "Target.createBrowserContext": {"browserContextId": "context"},
+            "Target.createTarget": {"targetId": "target"},
+        }
+        commands = []
+        driver.execute_cdp_cmd.side_effect = lambda command, params: commands.append(
+            command
+        ) or results.get(command, {})
+        driver.switch_to.window.side_effect = lambda handle: commands.append(handle)
+        config = make_chrome_driver([], {}, block_urls=BLOCK_IMAGES)
+
+        # the commands are sent again once the new window is current
+        with mock.patch.object(WebDriverPool, "driver_config", return_value=config):
+            self.selenium.open_isolated_window("http://localhost:1234")
+        self.assertEqual(
+            commands,
+            [
+                "Target.createBrowserContext",
+                "Target.createTarget",
+                "target",
+                "Network.enable",
+                "Network.setBlockedURLs",
+            ],
+        )
+        self.assertEqual(driver.execute_cdp_cmd.call_args[0][1], {"urls": BLOCK_IMAGES})
+
+    def test_isolated_window_without_devtools(self):
+        driver = self.selenium.driver
+        driver.execute_cdp_cmd.side_effect = AssertionError("Unrecognised command")
+        driver.execute_async_script.return_value = True
+
+        # a new tab is opened, and the state of the origin cleared
+        self.selenium.open_isolated_window("http://localhost:1234")
+        driver.switch_to.new_window.assert_called_once_with("tab")
+        driver.delete_all_cookies.assert_called_once()
+
+        self.selenium.close_isolated_window()
+        driver.close.assert_called_once()
+        driver.switch_to.window.assert_called_once_with("previous")
+
+
+@override_settings(SELENIUM_WIDTHS=[1024, 350])
+class WidthMatrixTestCase(SimpleTestCase):
+    def test_expand_widths(self):
+        class ExampleTestCase(SeleniumTestCase):
+            def test_a(self):
+                pass
+
+            def test_b(self):
+                pass
+
+        suite = TestSuite([ExampleTestCase("test_a"), ExampleTestCase("test_b"), self])
+        expanded = list(_expand_widths(suite))
+
+        # tests are grouped by width, other tests are left alone
+        self.assertEqual(
+            [(test._testMethodName, test.selenium_width) for test in expanded[:4]],
+            [("test_a", 1024), ("test_b", 1024), ("test_a", 350), ("test_b", 350)],
+        )
+        self.assertIs(expanded[4], self)
+        self.assertTrue(expanded[0].id().endswith("test_a[width=1024]"))
+
+        # only the first test of every width resizes the window
+        self.assertEqual(
+            [test.selenium_resize for test in expanded[:4]], [True, False, True, False]
+        )
+
+    @override_settings(SELENIUM_WIDTHS=[1024])
+    def test_resize_only_on_change(self):
+        class ExampleTestCase(SeleniumTestCase):
+            def test_a(self):
+                pass
+
+            def test_b(self):
+                pass
+
+        ExampleTestCase.selenium = object.__new__(SeleniumWrapper)
+        ExampleTestCase.selenium.driver = driver = mock.Mock()
+        tests = list(
+            _expand_widths(
+                TestSuite([ExampleTestCase("test_a"), ExampleTestCase("test_b")])
+            )
+        )
+
+        # bypass setUpClass, which would use the real browser
+        for test in tests:
+            test(TestResult())
+        self.assertEqual(driver.set_window_size.call_count, 1)
+
+        # unless the window was changed by the wrapper since
+        ExampleTestCase.selenium.maximize_window()
+        tests[1](TestResult())
+        self.assertEqual(driver.set_window_size.call_count, 2)
+
+    def test_new_driver_forgets_size(self):
+        selenium = object.__new__(SeleniumWrapper)
+        selenium.driver = mock.Mock()
+        selenium.set_window_size(1024, 768)
+
+        with mock.patch.object(WebDriverPool, "get", return_value=mock.Mock()):
+            selenium.__init__()
+        self.assertIsNone(selenium.__dict__["_window_size"])
+
+
+def _create_no_driver():
+    return None
+
+
+class ParallelWorkerTestCase(SimpleTestCase):
+    def test_worker_starts_browser(self):
+        if multiprocessing.get_start_method() != "fork":
+            raise SkipTest("the worker needs to inherit the patched driver pool")
+
+        # run a test in an actual worker process, which fails unless the worker started its browser
+        suite = SeleniumParallelTestSuite(
+            [TestSuite([WorkerTest("test_browser_started")])], processes=1
+        )
+        result = TestResult()
+        with mock.patch.object(WebDriverPool, "_create_driver", _create_no_driver):
+            suite.run(result)
+        self.assertEqual(result.errors + result.failures, [])
+        self.assertEqual(result.testsRun, 1)
+
+
+class PageElementCacheTestCase(SimpleTestCase):
+    def setUp(self):
+        # create a wrapper around a fake driver, bypassing the browser singleton
+        self.selenium = object.__new__(SeleniumWrapper)
+        self.selenium.driver = mock.Mock()
+        self.selenium.driver.find_element.side_effect = lambda *locator: mock.Mock()
+
+        self.addCleanup(setattr, PageElement, "selenium", PageElement.selenium)
+        PageElement.selenium = self.selenium
+        self.heading = PageElement(By.ID, "earth")
+
+    def test_element_is_found_once_per_page(self):
+        self.heading.is_displayed()
+        self.heading.text
+        self.assertEqual(self.selenium.driver.find_element.call_count, 1)
+
+        # navigating finds it again
+        self.selenium.get("http://localhost/")
+        self.heading.text
+        self.assertEqual(self.selenium.driver.find_element.call_count, 2)
+
+    def test_stale_element_is_found_again(self):
+        stale = mock.Mock()
+        stale.click.side_effect = StaleElementReferenceException()
+        type(stale).text = mock.PropertyMock(
+            side_effect=StaleElementReferenceException()
+        )
+        fresh = mock.Mock(text="Hello")
+        self.selenium.driver.find_element.side_effect = [stale, fresh, stale, fresh]
+
+        # methods fail once called
+        self.heading.click()
+        fresh.click.assert_called_once_with()
+
+        # properties right away
+        self.selenium.get("http://localhost/")
+        self.assertEqual(self.heading.text, "Hello")
+        self.assertEqual(self.selenium.driver.find_element.call_count, 4)
+
+    def test_element_is_found_again_in_another_frame(self):
+        self.heading.text
+        self.assertEqual(self.selenium.driver.find_element.call_count, 1)
+
+        # switching through the wrapper finds it again
+        self.selenium.switch_to.frame("inner")
+        self.selenium.driver.switch_to.frame.assert_called_once_with("inner")
+        self.heading.text
+        self.assertEqual(self.selenium.driver.find_element.call_count, 2)
+
+    def test_missing_child_is_not_retried(self):
+        element = mock.Mock()
+        element.find_element.side_effect = NoSuchElementException()
+        self.selenium.driver.find_element.side_effect = [element]
+
+        # the element itself is still there, only the child is missing
+        with self.assertRaises(NoSuchElementException):
+            self.heading.find_element(By.ID, "missing")
+        self.assertEqual(self.selenium.driver.find_element.call_count, 1)
+        self.assertEqual(element.find_element.call_count, 1)
+
+
+class BrowserWaitTestCase(SimpleTestCase):
+    def setUp(self):
+        self.driver = mock.Mock()
+        self.element = mock.Mock()
+        self.element.is_displayed.return_value = True
+        self.driver.find_element.return_value = self.element
+        self.addCleanup(setattr, PageElement, "selenium", PageElement.selenium)
+
+    def test_wait_in_browser(self):
+        self.driver.execute_async_script.return_value = [[True], [self.element]]
+
+        PageElement.selenium = self.driver
+        PageElement(By.ID, "earth").wait_until_is_displayed(timeout=1)
+
+        # a single call, and no polling
+        self.assertEqual(self.driver.execute_async_script.call_count, 1)
+        args = self.driver.execute_async_script.call_args[0]
+        self.assertIn("django_selenium_test:wait", args[0])
+        self.assertEqual(
+            args[1:3], ([["id", "earth", "displayed", None, False]], "all")
+        )
+        self.assertLessEqual(args[3], 1000)
+        self.driver.find_element.assert_not_called()
+
+    def test_timeout_in_browser(self):
+        self.driver.execute_async_script.return_value = None
+
+        PageElement.selenium = self.driver
+        with self.assertRaises(TimeoutException):
+            PageElement(By.ID, "earth").wait_until_exists(timeout=0)
+
+    def test_fallback_to_polling(self):
+        # e.g. the page navigated away while waiting
+        self.driver.execute_async_script.side_effect = JavascriptException(
+            "document unloaded while waiting for result"
+        )
+
+        PageElement.selenium = self.driver
+        PageElement(By.ID, "earth").wait_until_is_displayed(timeout=1)
+        self.driver.find_element.assert_called_with("id", "earth")
+
+    def test_wait_for_any(self):
+        self.driver.execute_async_script.return_value = [
+            [False, True],
+            [None, self.element],
+        ]
+
+        result = wait_for_any(
+            {
+                "success": (PageElement(By.ID, "success"), "displayed"),
+                "errors": ("#errors", "not_contains", "None"),
+            },
+            selenium=self.driver,
+        )
+        self.assertEqual(result.fired, "errors")
+        self.assertIs(result.element, self.element)
+        self.assertEqual(result.matched, {"success": False, "errors": True})
+
+        args = self.driver.execute_async_script.call_args[0]
+        self.assertEqual(
+            args[1:3],
+            (
+                [
+                    ["id", "success", "displayed", None, False],
+                    ["css selector", "#errors", "contains", "None", True],
+                ],
+                "any",
+            ),
+        )
+
+        with self.assertRaises(ValueError):
+            wait_for_all({"bad": ("#errors", "visible")}, selenium=self.driver)
+
+        # there must be something to wait for
+        for wait in [wait_for_any, wait_for_all]:
+            with self.assertRaisesMessage(ValueError, "At least one condition"):
+                wait({}, selenium=self.driver)
+        self.assertEqual(self.driver.execute_async_script.call_count, 1)
+
+    @override_settings(SELENIUM_WAIT_IN_BROWSER=False)
+    def test_polling_any(self):
+        self.driver.find_element.side_effect = lambda by, value: {
+            "#exists": self.element
+        }.get(value) or mock.Mock(
+            is_displayed=mock.Mock(side_effect=StaleElementReferenceException())
+        )
+
+        result = wait_for_any(
+            {"missing": ("#missing", "displayed"), "exists": ("#exists", "exists")},
+            timeout=1,
+            selenium=self.driver,
+        )
+        self.assertEqual(result.fired, "exists")
+        self.assertEqual(result.elements, {"missing": None, "exists": self.element})
+
+        with self.assertRaises(TimeoutException):
+            wait_for_all(
+                {"missing": ("#missing", "displayed"), "exists": ("#exists", "exists")},
+                timeout=0.1,
+                selenium=self.driver,
+            )
+
+    @override_settings(SELENIUM_WAIT_IN_BROWSER=False)
+    def test_polling(self):
+        self.element.is_displayed.return_value = False
+
+        PageElement.selenium = self.driver
+        PageElement(By.ID, "earth").wait_until_not_displayed(timeout=1)
+        self.driver.execute_async_script.assert_not_called()
@@ -2,7 +2,15 @@ from __future__ import annotations
 
 from unittest import mock
 
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils import translation
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.remote.command import Command
+
 from django_selenium_test import IntegrationTest
+from django_selenium_test.integration import _cached_reverse, _reverse
 
 
 class ExampleIntegrationTest(IntegrationTest):
@@ -25,6 +33,36 @@ class ExampleIntegrationTest(IntegrationTest):
             "Checks that find_next_sibling works as expected",
         )
 
+        # wait for whichever condition holds first
+        result = self.wait_for_any(
+            {
+                "missing": ("#not_exists", "exists"),
+                "hidden": ("#not_displayed", "displayed"),
+                "test": ("#test", "contains", "Test Element"),
+            }
+        )
+        self.assertEqual(result.fired, "test")
+        self.assertEqual(result.element, test_element)
+        self.assertEqual(
+            result.matched, {"missing": False, "hidden": False, "test": True}
+        )
+
+        result = self.wait_for_all(
+            {"missing": ("#not_exists", "not_exists"), "test": ("#test", "clickable")}
+        )
+        self.assertEqual(result.fired, "missing")
+        self.assertEqual(result.elements["test"], test_element)
+
+        # controls of a disabled fieldset are not clickable
+        result = self.wait_for_any(
+            {
+                "clickable": ("#fieldset_button", "clickable"),
+                "displayed": ("#fieldset_button", "displayed"),
+            }
+        )
+        self.assertEqual(result.fired, "displayed")
+        self.assertEqual(result.matched, {"clickable": False, "displayed": True})
+
     def test_element_assertions(self) -> None:
         """Checks that the element assertions work as intended"""
 
@@ -37,6 +75,25 @@ class ExampleIntegrationTest(IntegrationTest):
         self.assert_element_not_displayed("#not_displayed")
         self.assert_element_not_displayed("#not_exists")
 
+        # check all of them at once
+        self.assert_elements(
+            exists=["#exists", "#displayed", "#not_displayed"],
+            not_exists=["#not_exists"],
+            displayed=["#displayed"],
+            not_displayed=["#not_displayed", "#not_exists"],
+        )
+
+        # every failure should be reported
+        with self.assertRaises(AssertionError) as cm:
+            self.assert_elements(
+                exists=["#exists", "#not_exists"],
+                displayed=["#displayed", "#not_displayed"],
+            )
+        message = str(cm.exception)
+        self.assertIn("#not_exists should exist", message)
+        self.assertIn("#not_displayed should be displayed", message)
+        self.assertNotIn("#exists should", message)
+
     def test_urls(self) -> None:
         # check that load_live_url and assert_url_equal work
         self.load_live_url(
@@ -53,6 +110,104 @@ class ExampleIntegrationTest(IntegrationTest):
         # check that the follow function works
         self.assert_url_follow("integrationredirect", "integration")
 
+    def test_resolve_url(self) -> None:
+        # get parameters are encoded, but keep paths readable like django's redirects
+        self.assertEqual(
+            self._resolve_url(
+                "integration",
+                get_params={"q": "a b&c", "tag": ["x", "y"]},
+                reverse_get_params={"next": "integrationsubmit"},
+            ),
+            "/integration/?q=a+b%26c&tag=x&tag=y&next=/integration/submit/",
+        )
+
+        # urls are resolved only once
+        _cached_reverse.cache_clear()
+        for _ in range(3):
+            self._resolve_url("integrationparams", args=[12])
+            self._resolve_url("integrationparams", kwargs={"parameter": 12})
+        self.assertEqual(_cached_reverse.cache_info().misses, 2)
+        self.assertEqual(_cached_reverse.cache_info().hits, 4)
+
+        # and again once the urlconf is changed
+        with override_settings(ROOT_URLCONF="tests.urls"):
+            self.assertEqual(_cached_reverse.cache_info().currsize, 0)
+
+    def test_reuse_if_current(self) -> None:
+        with mock.patch.object(
+            self.selenium.driver, "get", wraps=self.selenium.driver.get
+        ) as get:
+            self.load_live_url("integration", reuse_if_current=True)
+            self.assertEqual(get.call_count, 1)
+
+            # the page is unchanged, and is not loaded again
+            self.load_live_url("integration", "#test", reuse_if_current=True)
+            self.assertEqual(get.call_count, 1)
+
+            # unless it was not asked for
+            self.load_live_url("integration")
+            self.assertEqual(get.call_count, 2)
+
+            # or the page was changed
+            self.load_live_url("integration", reuse_if_current=True)
+            self.find_element("#id_a").send_keys("changed")
+            self.load_live_url("integration", reuse_if_current=True)
+            self.assertEqual(get.call_count, 4)
+            self.assertEqual(self.find_element("#id_a").get_property("value"), "")
+
+            # or the session was reset
+            self.selenium.reset(self.live_server_url)
+            self.load_live_url("integration", reuse_if_current=True)
+            self.assertEqual(get.call_count, 5)
+
+    def test_download_script_timeout(self) -> None:
+        self.load_live_url("integration")
+        self.selenium.set_script_timeout(30)
+
+        with mock.patch.object(
+            self.selenium.driver, "execute", wraps=self.selenium.driver.execute
+        ) as execute:
+            # the script timeout is long enough, and left alone
+            response = self.get_url_response("integrationdownload", timeout=5)
+            self.assertEqual(response.ok, True)
+            commands = [call.args[0] for call in execute.call_args_list]
+            self.assertEqual(commands, [Command.W3C_EXECUTE_SCRIPT_ASYNC])
+
+            # otherwise it is raised for the download, and then set back
+            execute.reset_mock()
+            self.get_url_response("integrationdownload", timeout=60)
+            commands = [call.args[0] for call in execute.call_args_list]
+            self.assertEqual(
+                commands,
+                [
+                    Command.SET_TIMEOUTS,
+                    Command.W3C_EXECUTE_SCRIPT_ASYNC,
+                    Command.SET_TIMEOUTS,
+                ],
+            )
+        self.assertEqual(self.selenium.script_timeout(), 30)
+
+    def test_download_cleanup_errors(self) -> None:
+        self.load_live_url("integration")
+        self.selenium.set_script_timeout(30)
+        self.addCleanup(self.selenium.set_script_timeout, 30)
+
+        # the error of the download is raised, rather than the one of setting the timeout back
+        with mock.patch.object(
+            self.selenium.driver,
+            "execute_async_script",
+            side_effect=TimeoutException("download timed out"),
+        ), mock.patch.object(
+            self.selenium.driver,
+            "set_script_timeout",
+            side_effect=[None, WebDriverException("session is gone")],
+        ):
+            with self.assertRaisesMessage(TimeoutException, "download timed out"):
+                self.get_url_response("integrationdownload", timeout=60)
+
+        # and the timeout is asked for again
+        self.assertIsNone(self.selenium.__dict__["_script_timeout"])
+
     @mock.patch("tests.views.cleaned_data_check", return_value=1)
     def test_fill_form(self, cmock: mock.Mock) -> None:
         # fill in the form normally
@@ -68,6 +223,21 @@ class ExampleIntegrationTest(IntegrationTest):
             [mock.call({"a": "Filled in A", "b": "b", "c": "Filled in C"})]
         )
 
+        # fill in the form using a single script
+        cmock.reset_mock()
+        self.submit_form(
+            "integration",
+            "input_id_submit",
+            send_form_keys={"id_a": "Filled in A"},
+            select_dropdowns={"id_b": "b"},
+            script_value={"id_c": "Filled in C"},
+            scripted=True,
+        )
+        self.assert_url_equal("integrationsubmit")
+        cmock.assert_has_calls(
+            [mock.call({"a": "Filled in A", "b": "b", "c": "Filled in C"})]
+        )
+
         # fill in the form, but set b manually
         cmock.reset_mock()
         submit = self.fill_out_form(
@@ -111,8 +281,34 @@ class ExampleIntegrationTest(IntegrationTest):
         self.assertEqual(ok2, True)
         self.assertEqual(data2, b"content of example.txt, but via get")
 
+        # downloading a file including status and headers
+        response = self.get_url_response("integrationdownload", timeout=5)
+        self.assertEqual(response.ok, True)
+        self.assertEqual(response.status, 200)
+        self.assertEqual(
+            response.headers["content-disposition"], "inline; filename=example.txt"
+        )
+        self.assertEqual(response.data, b"content of example.txt, but via get")
+
+        # downloading a file in chunks
+        with mock.patch.object(self.__class__, "download_chunk_size", 8):
+            ok3, data3 = self.get_url_download("integrationdownload", stream=True)
+        self.assertEqual(ok3, True)
+        with data3:
+            self.assertEqual(data3.read(), b"content of example.txt, but via get")
+
         # hover an element
         self.hover_element("hoverable")
         self.assertEqual(
             self.find_element("#hoverable").get_attribute("data-hovered"), "true"
         )
+
+
+@override_settings(ROOT_URLCONF="tests.urls_i18n")
+class ReverseCacheTestCase(SimpleTestCase):
+    def test_language(self):
+        # every language has urls of its own
+        for language in ["en", "de", "en"]:
+            with translation.override(language):
+                self.assertEqual(_reverse("core"), reverse("core"))
+                self.assertEqual(_reverse("core"), "/{}/core/".format(language))
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
-from unittest import mock
+import threading
+from unittest import TestCase, TestResult, TestSuite, mock
 
-from django_selenium_test import IntegrationTest
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+
+from django_selenium_test import IntegrationTest, SeleniumWrapper
 
 
 class ExampleIntegrationTest(IntegrationTest):
@@ -26,3 +30,65 @@ class ExampleIntegrationTest(IntegrationTest):
         element = self.load_live_url("core", selector="#user")
         self.assertEqual(element.text, "The logged on user is alice.")
         self.assertIsNone(self.user.last_login)
+
+
+class FixtureUserIntegrationTest(IntegrationTest):
+    fixtures = ["users.json"]
+    user = "user-001"
+
+    def test_first(self):
+        element = self.load_live_url("core", selector="#user")
+        self.assertEqual(element.text, "The logged on user is user-001.")
+
+    def test_second(self):
+        element = self.load_live_url("core", selector="#user")
+        self.assertEqual(element.text, "The logged on user is user-001.")
+
+    def test_login_refreshes(self):
+        self.load_live_url("core", selector="#user")
+
+        # logging in as someone else shows them right away
+        with mock.patch.object(
+            self.selenium.driver, "refresh", wraps=self.selenium.driver.refresh
+        ) as refresh:
+            self.login("user-002")
+        refresh.assert_called_once_with()
+        self.assertEqual(
+            self.find_element("#user").text, "The logged on user is user-002."
+        )
+
+
+class SessionCacheAcrossTestsTestCase(TestCase):
+    """Runs tests that flush the database in between, like the test runner does"""
+
+    def test_session_is_reused(self):
+        # the live server checks the hash of every request, only count logins
+        logins = []
+
+        def get_session_auth_hash(user):
+            if threading.current_thread() is threading.main_thread():
+                logins.append(user)
+            return original(user)
+
+        original = User.get_session_auth_hash
+        with mock.patch.object(
+            SeleniumWrapper, "_session_cache", {}
+        ), mock.patch.object(
+            User, "get_session_auth_hash", get_session_auth_hash
+        ), mock.patch.object(
+            SessionStore, "create", autospec=True, side_effect=SessionStore.create
+        ) as create:
+            result = TestResult()
+            TestSuite(
+                [
+                    FixtureUserIntegrationTest("test_first"),
+                    FixtureUserIntegrationTest("test_second"),
+                ]
+            ).run(result)
+
+        self.assertEqual(result.errors + result.failures, [])
+        self.assertEqual(result.testsRun, 2)
+
+        # only the first test created a session
+        self.assertEqual(len(logins), 1)
+        self.assertEqual(create.call_count, 1)
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import tempfile
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from django_selenium_test import WebDriverPool
+from django_selenium_test.instrumentation import NO_TEST, CommandRecorder
+
+
+class FakeCommandExecutor(object):
+    def execute(self, command, params):
+        return {"value": "x" * 10}
+
+
+class FakeDriver(object):
+    def __init__(self):
+        self.command_executor = FakeCommandExecutor()
+
+
+class CommandRecorderTestCase(SimpleTestCase):
+    def setUp(self):
+        # use empty statistics
+        patcher = mock.patch.object(CommandRecorder, "_stats", {})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_commands_are_recorded(self):
+        driver = FakeDriver()
+        CommandRecorder.instrument(driver)
+
+        with CommandRecorder.recording("first"):
+            driver.command_executor.execute("findElement", {"using": "id"})
+            driver.command_executor.execute("findElement", {"using": "id"})
+        with CommandRecorder.recording("second"):
+            driver.command_executor.execute("get", {"url": "/"})
+
+        stats = CommandRecorder.stats()
+        self.assertEqual(set(stats.keys()), {"first", "second"})
+        self.assertEqual(stats["first"]["findElement"]["count"], 2)
+        self.assertEqual(
+            stats["first"]["findElement"]["bytes_sent"],
+            2 * len(json.dumps({"using": "id"})),
+        )
+        self.assertEqual(
+            stats["first"]["findElement"]["bytes_received"],
+            2 * len(json.dumps({"value": "x" * 10})),
+        )
+        self.assertEqual(sum(stats["first"]["findElement"]["buckets"]), 2)
+        self.assertEqual(stats["second"]["get"]["count"], 1)
+
+    def test_commands_of_other_threads(self):
+        # e.g. a driver started in the background, while a test is running
+        with CommandRecorder.recording("test"):
+            thread = threading.Thread(
+                target=CommandRecorder.record, args=("startDriver", 1, 0, 0)
+            )
+            thread.start()
+            thread.join()
+            CommandRecorder.record("get", 0.1, 0, 0)
+
+        stats = CommandRecorder.stats()
+        self.assertEqual(list(stats[NO_TEST].keys()), ["startDriver"])
+        self.assertEqual(list(stats["test"].keys()), ["get"])
+
+    def test_commands_of_coroutines(self):
+        async def run(test_id, started, other_started):
+            with CommandRecorder.recording(test_id):
+                # both tests are running at the same time
+                started.set()
+                await other_started.wait()
+                CommandRecorder.record("get", 0.1, 0, 0)
+
+        async def main():
+            first, second = asyncio.Event(), asyncio.Event()
+            await asyncio.gather(
+                run("first", first, second), run("second", second, first)
+            )
+
+        asyncio.run(main())
+        stats = CommandRecorder.stats()
+        self.assertEqual(stats["first"]["get"]["count"], 1)
+        self.assertEqual(stats["second"]["get"]["count"], 1)
+
+    def test_driver_startup_is_recorded(self):
+        path = os.path.join(self.directory.name, "report")
+        with mock.patch.object(WebDriverPool, "driver_config") as driver_config:
+            driver_config.return_value = {
+                "callable": FakeDriver,
+                "args": [],
+                "kwargs": {},
+            }
+            with override_settings(SELENIUM_COMMAND_REPORT=path):
+                WebDriverPool._create_driver()
+
+        stats = CommandRecorder.stats()
+        self.assertEqual(stats[NO_TEST]["startDriver"]["count"], 1)
+
+    def test_write_report(self):
+        path = os.path.join(self.directory.name, "report")
+
+        with CommandRecorder.recording('with "quotes"'):
+            CommandRecorder.record("executeScript", 0.002, 10, 20)
+            CommandRecorder.record("executeScript", 20, 10, 20)
+
+        # statistics of a parallel worker
+        with open(path + ".worker-1.json", "w") as f:
+            json.dump(
+                {
+                    "other": {
+                        "get": {
+                            "count": 1,
+                            "seconds": 0.5,
+                            "bytes_sent": 1,
+                            "bytes_received": 2,
+                            "buckets": [0] * 8 + [1] + [0] * 5,
+                        }
+                    }
+                },
+                f,
+            )
+
+        with override_settings(SELENIUM_COMMAND_REPORT=path):
+            CommandRecorder.write_report()
+        self.assertFalse(os.path.exists(path + ".worker-1.json"))
+
+        with open(path + ".json") as f:
+            report = json.load(f)
+        script = report["tests"]['with "quotes"']
+        self.assertEqual(script["round_trips"], 2)
+        self.assertEqual(script["commands"]["executeScript"]["buckets"]["0.001"], 0)
+        self.assertEqual(script["commands"]["executeScript"]["buckets"]["0.0025"], 1)
+        self.assertEqual(script["commands"]["executeScript"]["buckets"]["10.0"], 1)
+        self.assertEqual(script["commands"]["executeScript"]["buckets"]["+Inf"], 2)
+        self.assertEqual(report["tests"]["other"]["round_trips"], 1)
+
+        with open(path + ".prom") as f:
+            metrics = f.read()
+        self.assertIn(
+            'selenium_command_duration_seconds_bucket{test="with \\"quotes\\"",command="executeScript",le="+Inf"} 2',
+            metrics,
+        )
+        self.assertIn(
+            'selenium_command_sent_bytes_total{test="other",command="get"} 1',
+            metrics,
+        )
+        self.assertTrue(metrics.endswith("# EOF\n"))
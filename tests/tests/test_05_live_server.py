@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import gzip
+import os
+import tempfile
+import time
+from http.client import HTTPConnection
+
+from django.test import SimpleTestCase, override_settings
+
+from django_selenium_test import BLANK_PAGE_PATH, LiveServerHandler
+from django_selenium_test.live_server import (
+    ConcurrentLiveServerThread,
+    static_file_cache,
+)
+
+
+class ConcurrentLiveServerTestCase(SimpleTestCase):
+    def setUp(self):
+        self.thread = ConcurrentLiveServerThread(
+            "localhost", LiveServerHandler, connections_override={}, workers=2
+        )
+        self.thread.daemon = True
+        self.thread.start()
+        self.thread.is_ready.wait()
+        if self.thread.error:
+            raise self.thread.error
+
+    def tearDown(self):
+        self.thread.terminate()
+
+    def test_keep_alive(self):
+        connection = HTTPConnection("localhost", self.thread.port, timeout=5)
+        self.addCleanup(connection.close)
+
+        # all requests are served using a single connection
+        for _ in range(3):
+            connection.request("GET", BLANK_PAGE_PATH)
+            response = connection.getresponse()
+            self.assertEqual(response.status, 200)
+            response.read()
+            self.assertFalse(response.will_close)
+        self.assertEqual(len(self.thread.httpd.open_requests), 1)
+
+    def test_idle_connections_make_way(self):
+        # keep both workers busy with idle connections
+        idle = []
+        for _ in range(2):
+            connection = HTTPConnection("localhost", self.thread.port, timeout=5)
+            self.addCleanup(connection.close)
+            connection.request("GET", BLANK_PAGE_PATH)
+            connection.getresponse().read()
+            idle.append(connection)
+
+        # a new connection does not wait for them to time out
+        start = time.perf_counter()
+        response, _ = self.get(BLANK_PAGE_PATH)
+        self.assertEqual(response.status, 200)
+        self.assertLess(time.perf_counter() - start, 1)
+
+        # only one of them was closed
+        self.assertEqual(len(self.thread.httpd.open_requests), 2)
+
+    def test_terminate_closes_idle_connections(self):
+        connection = HTTPConnection("localhost", self.thread.port, timeout=5)
+        self.addCleanup(connection.close)
+        connection.request("GET", BLANK_PAGE_PATH)
+        connection.getresponse().read()
+
+        self.thread.terminate()
+        self.assertEqual(self.thread.httpd.open_requests, set())
+
+    def get(self, path, **headers):
+        connection = HTTPConnection("localhost", self.thread.port, timeout=5)
+        self.addCleanup(connection.close)
+        connection.request("GET", path, headers=headers)
+        response = connection.getresponse()
+        return response, response.read()
+
+    def test_static_file(self):
+        response, content = self.get("/static/tests/style.css")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader("Content-Type"), "text/css")
+        self.assertIn("immutable", response.getheader("Cache-Control"))
+        self.assertIsNone(response.getheader("Content-Encoding"))
+        self.assertFalse(response.will_close)
+        self.assertIn(b"#hoverable", content)
+
+        # the second response comes from memory
+        self.assertIn("tests/style.css", static_file_cache.files)
+        etag = response.getheader("ETag")
+        response, _ = self.get("/static/tests/style.css")
+        self.assertEqual(response.getheader("ETag"), etag)
+
+    def test_static_file_gzip(self):
+        response, content = self.get(
+            "/static/tests/style.css", **{"Accept-Encoding": "gzip, deflate"}
+        )
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader("Content-Encoding"), "gzip")
+        self.assertEqual(response.getheader("Vary"), "Accept-Encoding")
+        self.assertIn(b"#hoverable", gzip.decompress(content))
+
+        # the variants have different ETags
+        identity, _ = self.get("/static/tests/style.css")
+        self.assertNotEqual(response.getheader("ETag"), identity.getheader("ETag"))
+        response, _ = self.get(
+            "/static/tests/style.css",
+            **{
+                "Accept-Encoding": "gzip",
+                "If-None-Match": identity.getheader("ETag"),
+            },
+        )
+        self.assertEqual(response.status, 200)
+
+    def test_static_file_not_modified(self):
+        response, _ = self.get("/static/tests/style.css")
+        response, content = self.get(
+            "/static/tests/style.css",
+            **{"If-None-Match": response.getheader("ETag")},
+        )
+        self.assertEqual(response.status, 304)
+        self.assertFalse(response.will_close)
+        self.assertEqual(content, b"")
+
+    def test_static_file_not_found(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        with override_settings(STATICFILES_DIRS=[directory.name]):
+            response, _ = self.get("/static/missing.css")
+            self.assertEqual(response.status, 404)
+            self.assertNotIn("missing.css", static_file_cache.files)
+
+            # the file is found once it exists
+            with open(os.path.join(directory.name, "missing.css"), "w") as f:
+                f.write("main {}")
+            response, content = self.get("/static/missing.css")
+            self.assertEqual(response.status, 200)
+            self.assertEqual(content, b"main {}")
+
+    @override_settings(SELENIUM_STATIC_CACHE=False)
+    def test_static_file_without_cache(self):
+        static_file_cache.clear()
+        response, content = self.get("/static/tests/style.css")
+        self.assertEqual(response.status, 200)
+        self.assertIsNone(response.getheader("Cache-Control"))
+        self.assertIn(b"#hoverable", content)
+        self.assertEqual(static_file_cache.files, {})
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test import SimpleTestCase, TransactionTestCase
+
+from django_selenium_test import SeleniumTestCase
+from django_selenium_test.snapshot import (
+    PostgreSQLSnapshot,
+    SQLiteSnapshot,
+    take_snapshot,
+)
+
+
+class SnapshotTestCase(TransactionTestCase):
+    def usernames(self):
+        return list(
+            User.objects.order_by("username").values_list("username", flat=True)
+        )
+
+    def test_sqlite_snapshot(self):
+        User.objects.create(username="alice")
+        snapshot = take_snapshot(connections["default"])
+        self.addCleanup(snapshot.discard)
+        self.assertIsInstance(snapshot, SQLiteSnapshot)
+
+        # the snapshot can be restored many times
+        for username in ["bob", "carol"]:
+            User.objects.create(username=username)
+            User.objects.filter(username="alice").delete()
+            snapshot.restore()
+            self.assertEqual(self.usernames(), ["alice"])
+
+    def test_snapshot_databases(self):
+        class ExampleSnapshotTestCase(SeleniumTestCase):
+            snapshot_databases = True
+
+            def test_nothing(self):
+                pass
+
+        test = ExampleSnapshotTestCase("test_nothing")
+        self.addCleanup(ExampleSnapshotTestCase._discard_database_snapshots)
+
+        # created during class-level setup
+        User.objects.create(username="alice")
+
+        # the first test takes the snapshot
+        test._fixture_setup()
+        self.assertEqual(
+            list(ExampleSnapshotTestCase._database_snapshots.keys()), ["default"]
+        )
+        User.objects.create(username="bob")
+
+        # tests do not flush, but restore the snapshot
+        test._fixture_teardown()
+        self.assertEqual(self.usernames(), ["alice", "bob"])
+        test._fixture_setup()
+        self.assertEqual(self.usernames(), ["alice"])
+
+        # the database is empty after the class
+        ExampleSnapshotTestCase._discard_database_snapshots()
+        self.assertIsNone(ExampleSnapshotTestCase._database_snapshots)
+        self.assertEqual(self.usernames(), [])
+
+
+class PostgreSQLSnapshotTestCase(SimpleTestCase):
+    def statements(self, pg_version):
+        connection = mock.MagicMock(
+            pg_version=pg_version, settings_dict={"NAME": "test"}
+        )
+        connection.ops.quote_name = lambda name: '"{}"'.format(name)
+        cursor = connection._nodb_cursor.return_value.__enter__.return_value
+
+        snapshot = PostgreSQLSnapshot(connection)
+        snapshot.restore()
+        return [c[0][0] for c in cursor.execute.call_args_list]
+
+    def test_restore_before_13(self):
+        # there is no FORCE, so the connections of the live server are closed first
+        statements = self.statements(120000)
+        self.assertEqual(
+            [s.split(" ")[0] for s in statements],
+            ["DROP", "SELECT", "CREATE", "SELECT", "DROP", "CREATE"],
+        )
+        self.assertIn("pg_terminate_backend", statements[3])
+        self.assertEqual(statements[4], 'DROP DATABASE "test"')
+
+    def test_restore(self):
+        statements = self.statements(130000)
+        self.assertEqual(statements[-2], 'DROP DATABASE "test" WITH (FORCE)')
+        self.assertNotIn("pg_terminate_backend", statements[-3])
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.test import LiveServerTestCase, SimpleTestCase, override_settings
+
+from selenium.common.exceptions import (
+    InvalidSessionIdException,
+    NoSuchElementException,
+    TimeoutException,
+)
+from selenium.webdriver.common.by import By
+
+from django_selenium_test import (
+    AsyncBrowser,
+    IntegrationTestBase,
+    LiveServerHandler,
+    PageElement,
+    WebDriverPool,
+    async_browsers,
+)
+from django_selenium_test.asynchronous import AsyncWebDriverConnection
+from django_selenium_test.live_server import ConcurrentLiveServerThread
+
+from ..webdriver_stub import StubWebDriverServer, create_stub_driver
+
+
+@override_settings(SELENIUM_WEBDRIVERS=False)
+class AsyncBrowserTestCase(LiveServerTestCase, IntegrationTestBase):
+    """Drives the stub server, without going through the driver of the process"""
+
+    server_thread_class = ConcurrentLiveServerThread
+    static_handler = LiveServerHandler
+    find_element_selector = "main"
+    find_element_timeout = 1
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.selenium = create_stub_driver()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.selenium.quit()
+        StubWebDriverServer.instance().close_connections()
+        super().tearDownClass()
+
+    async def test_load_live_url(self):
+        async with AsyncBrowser.attach(self) as browser:
+            element = await browser.load_live_url("integration", "#test")
+            self.assertEqual(await element.text(), "Test Element")
+            self.assertEqual(
+                await browser.current_url(), self.live_server_url + "/integration/"
+            )
+
+        # the session is shared with the synchronous driver, and stays around
+        self.assertEqual(
+            self.selenium.current_url, self.live_server_url + "/integration/"
+        )
+
+    async def test_concurrent_sessions(self):
+        server = StubWebDriverServer.instance()
+        sessions = len(server.sessions)
+
+        async with async_browsers(self, 2) as (first, second):
+            self.assertEqual(len(server.sessions), sessions + 2)
+            await asyncio.gather(
+                first.load_live_url("integration"),
+                second.load_live_url("integrationparams", url_args=[1]),
+            )
+            self.assertEqual(
+                await first.current_url(), self.live_server_url + "/integration/"
+            )
+            self.assertEqual(
+                await second.current_url(),
+                self.live_server_url + "/integration/parameter/1/",
+            )
+
+        self.assertEqual(len(server.sessions), sessions)
+
+    async def test_sessions_make_progress_at_the_same_time(self):
+        def slow(session, script, args):
+            time.sleep(0.2)
+            return True
+
+        StubWebDriverServer.instance().register_script("/* async slow */", slow)
+
+        async with async_browsers(self, 3) as browsers:
+            start = time.perf_counter()
+            results = await asyncio.gather(
+                *(browser.execute_script("/* async slow */") for browser in browsers)
+            )
+            seconds = time.perf_counter() - start
+        self.assertEqual(results, [True, True, True])
+        self.assertLess(seconds, 0.5)
+
+    async def test_firefox(self):
+        # geckodriver only allows a single session, so a driver of its own is started
+        server = StubWebDriverServer.instance()
+        sessions = len(server.sessions)
+        config = {"callable": create_stub_driver, "args": [], "kwargs": {}}
+
+        with mock.patch.dict(
+            self.selenium.capabilities, {"browserName": "firefox"}
+        ), mock.patch.object(WebDriverPool, "driver_config", return_value=config):
+            async with await AsyncBrowser.start(self) as browser:
+                self.assertIsNotNone(browser.driver)
+                self.assertEqual(len(server.sessions), sessions + 1)
+                await browser.load_live_url("integration")
+                self.assertEqual(
+                    await browser.current_url(), self.live_server_url + "/integration/"
+                )
+
+        self.assertIsNone(browser.driver)
+        self.assertEqual(len(server.sessions), sessions)
+
+    async def test_page_load_strategy_none(self):
+        driver = create_stub_driver(page_load_strategy="none")
+        self.addCleanup(driver.quit)
+
+        async with AsyncBrowser(
+            self,
+            AsyncWebDriverConnection(StubWebDriverServer.instance().url),
+            driver.session_id,
+            driver.capabilities,
+        ) as browser:
+            await browser.load_live_url("integration")
+            await browser.load_live_url("integrationparams", "#test", url_args=[2])
+            self.assertEqual(
+                await browser.current_url(),
+                self.live_server_url + "/integration/parameter/2/",
+            )
+
+    async def test_fill_out_form(self):
+        async with AsyncBrowser.attach(self) as browser:
+            button = await browser.fill_out_form(
+                "integration",
+                "input_id_submit",
+                send_form_keys={"id_a": "Hello"},
+                select_dropdowns={"id_b": "b"},
+            )
+            self.assertEqual(await button.get_property("value"), "Submit")
+            field = await browser.locate(By.ID, "id_a")
+            self.assertEqual(await field.get_property("value"), "Hello")
+
+            with self.assertRaises(NoSuchElementException):
+                await browser.fill_out_form(
+                    "integration", "input_id_submit", send_form_keys={"missing": "x"}
+                )
+
+    async def test_waits(self):
+        async with AsyncBrowser.attach(self) as browser:
+            await browser.load_live_url("integration")
+
+            result = await browser.wait_for_any(
+                {
+                    "missing": ("#not_exists", "exists"),
+                    "test": (PageElement(By.ID, "test"), "contains", "Test"),
+                }
+            )
+            self.assertEqual(result.fired, "test")
+            self.assertEqual(result.element, await browser.locate(By.ID, "test"))
+
+            self.assertIsNone(await browser.wait_until("#not_exists", "not_exists"))
+            with self.assertRaises(TimeoutException):
+                await browser.wait_until("#not_exists", "exists", timeout=0.1)
+            with self.assertRaises(TimeoutException):
+                await browser.find_element("#not_displayed", timeout=0.1)
+            with self.assertRaisesMessage(ValueError, "At least one condition"):
+                await browser.wait_for_all({})
+
+    @override_settings(SELENIUM_WAIT_IN_BROWSER=False)
+    async def test_polling(self):
+        async with AsyncBrowser.attach(self) as browser:
+            await browser.load_live_url("integration", "#test")
+            element = await browser.wait_until("#test", "clickable")
+            self.assertEqual(await element.text(), "Test Element")
+            with self.assertRaises(TimeoutException):
+                await browser.wait_until("#test", "not_exists", timeout=0.1)
+
+    async def test_connection(self):
+        connection = AsyncWebDriverConnection(StubWebDriverServer.instance().url)
+        try:
+            await connection.request(
+                "getCurrentUrl", "GET", "/session/" + self.selenium.session_id + "/url"
+            )
+            http_connection = connection.connection
+
+            # the connection is kept alive
+            await connection.request(
+                "getTitle", "GET", "/session/" + self.selenium.session_id + "/title"
+            )
+            self.assertIs(connection.connection, http_connection)
+
+            # and opened again once it is closed
+            http_connection.sock.shutdown(socket.SHUT_RDWR)
+            await connection.request(
+                "getTitle", "GET", "/session/" + self.selenium.session_id + "/title"
+            )
+            self.assertIsNot(connection.connection, http_connection)
+
+            with self.assertRaises(InvalidSessionIdException):
+                await connection.request("getTitle", "GET", "/session/missing/title")
+        finally:
+            await connection.close()
+
+
+class ResponseHandler(BaseHTTPRequestHandler):
+    """Answers every request with the value {"path": path}, framed as the path says"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = json.dumps({"value": {"path": self.path}}).encode("utf8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if self.path == "/chunked":
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i in range(0, len(body), 5):
+                chunk = body[i : i + 5]
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+        elif self.path == "/close":
+            # no length, the response ends with the connection
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(body)
+            self.close_connection = True
+        else:
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+
+class AsyncWebDriverConnectionTestCase(SimpleTestCase):
+    """Talks to a plain http.server, rather than the stub WebDriver server"""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), ResponseHandler)
+        self.server.daemon_threads = True
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.connection = AsyncWebDriverConnection(
+            "http://127.0.0.1:{}/".format(self.server.server_address[1])
+        )
+
+    async def request(self, path):
+        return await self.connection.request("test", "GET", path)
+
+    async def test_responses(self):
+        try:
+            self.assertEqual(await self.request("/chunked"), {"path": "/chunked"})
+            self.assertIsNotNone(self.connection.connection)
+
+            # a connection closed by the server is opened again
+            self.assertEqual(await self.request("/close"), {"path": "/close"})
+            self.assertIsNone(self.connection.connection)
+            self.assertEqual(await self.request("/length"), {"path": "/length"})
+            self.assertIsNotNone(self.connection.connection)
+        finally:
+            await self.connection.close()
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+import zipfile
+from unittest import TestResult, expectedFailure, mock
+
+from django.test import SimpleTestCase, override_settings
+
+from selenium.common.exceptions import WebDriverException
+
+from django_selenium_test import SeleniumTestCase, SeleniumWrapper
+from django_selenium_test.artifacts import FailureArtifacts, FailureArtifactWriter
+
+from ..webdriver_stub import SCREENSHOT
+
+
+def make_artifacts(test_id="tests.Example.test_fail", **kwargs):
+    return FailureArtifacts(
+        **dict(
+            {
+                "test_id": test_id,
+                "traceback": "AssertionError: broken",
+                "url": "http://localhost/page/",
+                "screenshot": SCREENSHOT,
+                "page_source": "<html><body>Hello</body></html>",
+                "console": [{"level": "SEVERE", "message": "oops"}],
+            },
+            **kwargs,
+        )
+    )
+
+
+class FailureArtifactWriterTestCase(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def make_writer(self, max_size=1024 * 1024, max_total_size=1024 * 1024):
+        writer = FailureArtifactWriter(self.directory.name, max_size, max_total_size)
+        self.addCleanup(writer.close)
+        return writer
+
+    def test_write(self):
+        writer = self.make_writer()
+        self.assertTrue(writer.submit(make_artifacts()))
+        self.assertTrue(writer.submit(make_artifacts()))
+        writer.flush()
+
+        self.assertEqual(
+            sorted(os.listdir(self.directory.name)),
+            ["tests.Example.test_fail-2.zip", "tests.Example.test_fail.zip"],
+        )
+        path = os.path.join(self.directory.name, "tests.Example.test_fail.zip")
+        with zipfile.ZipFile(path) as archive:
+            self.assertEqual(
+                sorted(archive.namelist()),
+                ["console.json", "failure.txt", "page.html", "screenshot.png"],
+            )
+            self.assertTrue(archive.read("screenshot.png").startswith(b"\x89PNG"))
+            self.assertEqual(
+                archive.getinfo("page.html").compress_type, zipfile.ZIP_DEFLATED
+            )
+            self.assertIn(
+                "http://localhost/page/", archive.read("failure.txt").decode()
+            )
+        self.assertEqual(writer.written, 2)
+
+    def test_size_limits(self):
+        writer = self.make_writer(max_size=20)
+        path = writer.write(make_artifacts(console=None))
+        with zipfile.ZipFile(path) as archive:
+            self.assertEqual(sorted(archive.namelist()), ["failure.txt", "page.html"])
+            self.assertEqual(archive.read("page.html"), b"<html><body>Hello</b")
+            failure = archive.read("failure.txt").decode()
+            self.assertIn("page source cut from 31 to 20 bytes", failure)
+            self.assertIn("screenshot of 70 bytes omitted", failure)
+
+        # nothing is written once the total size is reached
+        writer = self.make_writer(
+            max_size=20, max_total_size=os.path.getsize(path) + 100
+        )
+        self.assertIsNotNone(writer.write(make_artifacts(console=None)))
+        self.assertIsNone(writer.write(make_artifacts(console=None)))
+        self.assertEqual(writer.dropped, 1)
+
+    def test_submit_never_blocks(self):
+        writer = self.make_writer()
+        release = threading.Event()
+        write = writer.write
+        writer.write = lambda artifacts: release.wait(5) and write(artifacts)
+
+        # one capture is being written, max_pending wait, the rest is dropped
+        submitted = [writer.submit(make_artifacts()) for _ in range(12)]
+        self.assertFalse(all(submitted))
+        release.set()
+        writer.flush()
+
+        self.assertEqual(writer.written, submitted.count(True))
+        self.assertEqual(writer.dropped, submitted.count(False))
+        self.assertGreaterEqual(writer.written, writer.max_pending)
+
+
+class FailureCaptureTestCase(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+        patcher = override_settings(SELENIUM_FAILURE_ARTIFACTS=self.directory.name)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+
+        # create a wrapper around a fake driver, bypassing the browser singleton
+        self.selenium = object.__new__(SeleniumWrapper)
+        self.selenium.driver = mock.Mock()
+        self.selenium.driver.current_url = "http://localhost/page/"
+        self.selenium.driver.page_source = "<html></html>"
+        self.selenium.driver.get_screenshot_as_base64.return_value = SCREENSHOT
+        self.selenium.driver.get_log.return_value = []
+
+    def run_tests(self, *names):
+        class ExampleTestCase(SeleniumTestCase):
+            def test_fail(self):
+                self.fail("broken")
+
+            def test_pass(self):
+                pass
+
+            def test_skip(self):
+                self.skipTest("not today")
+
+            @expectedFailure
+            def test_expected_failure(self):
+                self.fail("broken")
+
+        ExampleTestCase.selenium = self.selenium
+        result = TestResult()
+        for name in names:
+            ExampleTestCase(name).run(result)
+        FailureArtifactWriter.flush_all()
+        return result, os.listdir(self.directory.name)
+
+    def test_failure_is_captured(self):
+        result, files = self.run_tests("test_fail")
+        self.assertEqual(len(result.failures), 1)
+        self.assertEqual(len(files), 1)
+
+        with zipfile.ZipFile(os.path.join(self.directory.name, files[0])) as archive:
+            self.assertIn("test_fail", files[0])
+            self.assertIn(
+                "AssertionError: broken", archive.read("failure.txt").decode()
+            )
+            self.assertEqual(archive.read("page.html"), b"<html></html>")
+
+    def test_other_outcomes_are_not_captured(self):
+        result, files = self.run_tests(
+            "test_pass", "test_skip", "test_expected_failure"
+        )
+        self.assertEqual(len(result.skipped), 1)
+        self.assertEqual(len(result.expectedFailures), 1)
+        self.assertEqual(files, [])
+
+    def test_browser_errors_are_ignored(self):
+        self.selenium.driver.get_screenshot_as_base64.side_effect = WebDriverException()
+        result, files = self.run_tests("test_fail")
+
+        # the test still fails for its own reason
+        self.assertIn("broken", result.failures[0][1])
+        with zipfile.ZipFile(os.path.join(self.directory.name, files[0])) as archive:
+            self.assertNotIn("screenshot.png", archive.namelist())
+
+    def test_dead_browser_is_ignored(self):
+        # e.g. the driver process died, and selenium fails to connect to it
+        type(self.selenium.driver).current_url = mock.PropertyMock(
+            side_effect=ConnectionRefusedError()
+        )
+        self.selenium.driver.get_screenshot_as_base64.side_effect = (
+            ConnectionRefusedError()
+        )
+        result, files = self.run_tests("test_fail")
+
+        self.assertEqual(result.errors, [])
+        self.assertIn("broken", result.failures[0][1])
+        with zipfile.ZipFile(os.path.join(self.directory.name, files[0])) as archive:
+            self.assertNotIn("screenshot.png", archive.namelist())
+
+    def test_capture_errors_are_ignored(self):
+        with mock.patch.object(
+            FailureArtifactWriter, "submit", side_effect=RuntimeError("queue is gone")
+        ):
+            result, files = self.run_tests("test_fail")
+
+        self.assertEqual(result.errors, [])
+        self.assertIn("broken", result.failures[0][1])
+        self.assertEqual(files, [])
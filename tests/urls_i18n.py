@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+from django.conf.urls.i18n import i18n_patterns
+from django.urls import path
+from django.views.generic import TemplateView
+
+# urls that differ by language, for the reverse cache tests
+urlpatterns = i18n_patterns(
+    path("core/", TemplateView.as_view(template_name="core.html"), name="core"),
+)
@@ -0,0 +1,1472 @@
+"""
+An in-process stub of the W3C WebDriver protocol.
+
+The stub does not run a browser, nor any javascript.
+Pages are fetched from the live server and parsed into a small fake DOM.
+The scripts injected by django_selenium_test are recognised by their marker comment and emulated in python.
+Tests may register handlers for further scripts using StubWebDriverServer.register_script().
+
+The stub is used to measure the overhead of the library itself, see tests/benchmarks.
+"""
+
+from __future__ import annotations
+
+import base64
+import email.utils
+import json
+import re
+import threading
+import time
+import uuid
+from html.parser import HTMLParser
+from http.client import HTTPConnection, HTTPException, HTTPResponse
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING
+from urllib.parse import urlencode, urljoin, urlsplit
+
+from selenium import webdriver
+from selenium.webdriver.common.options import ArgOptions
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+    from selenium.webdriver.remote.webdriver import WebDriver
+
+    ScriptHandler = Callable[["StubSession", str, List[Any]], Any]
+
+
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+
+# elements that never have children
+VOID_ELEMENTS = {
+    "area",
+    "base",
+    "br",
+    "col",
+    "embed",
+    "hr",
+    "img",
+    "input",
+    "link",
+    "meta",
+    "source",
+    "track",
+    "wbr",
+}
+
+# elements disabled by a disabled fieldset
+FORM_CONTROLS = {"button", "fieldset", "input", "select", "textarea"}
+
+# elements that are never rendered
+HIDDEN_ELEMENTS = {"head", "link", "meta", "script", "style", "template", "title"}
+
+# attributes reported as "true" or null by 'Get Element Attribute'
+BOOLEAN_ATTRIBUTES = {
+    "autofocus",
+    "checked",
+    "disabled",
+    "hidden",
+    "multiple",
+    "readonly",
+    "required",
+    "selected",
+}
+
+# every screenshot is a single transparent pixel
+SCREENSHOT = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+
+# HTTP status codes of WebDriver errors
+ERROR_STATUS = {
+    "invalid argument": 400,
+    "invalid cookie domain": 400,
+    "invalid selector": 400,
+    "invalid session id": 404,
+    "javascript error": 500,
+    "no such cookie": 404,
+    "no such element": 404,
+    "no such window": 404,
+    "stale element reference": 404,
+    "unknown command": 404,
+    "unsupported operation": 500,
+}
+
+
+class WebDriverError(Exception):
+    """An error reported to the client using a WebDriver error code"""
+
+    def __init__(self, error: str, message: str) -> None:
+        super().__init__(message)
+        self.error = error
+        self.message = message
+
+
+#
+# Fake DOM
+#
+
+
+class FakeElement(object):
+    """An element of the fake DOM"""
+
+    def __init__(
+        self,
+        tag: str,
+        attributes: Dict[str, str],
+        parent: Optional[FakeElement] = None,
+    ) -> None:
+        self.id = uuid.uuid4().hex
+        self.tag = tag
+        self.attributes = attributes
+        self.parent = parent
+        self.children: List[Union[FakeElement, str]] = []
+
+        # state of form controls
+        self.value = attributes.get("value", "")
+        self.checked = "checked" in attributes
+        self.selected = "selected" in attributes
+
+    def __repr__(self) -> str:
+        return "<FakeElement {}>".format(self.tag)
+
+    def elements(self) -> Iterator[FakeElement]:
+        """Iterates over all descendant elements in document order"""
+        for child in self.children:
+            if isinstance(child, FakeElement):
+                yield child
+                yield from child.elements()
+
+    def ancestors(self) -> Iterator[FakeElement]:
+        parent = self.parent
+        while parent is not None:
+            yield parent
+            parent = parent.parent
+
+    @property
+    def form(self) -> Optional[FakeElement]:
+        for ancestor in self.ancestors():
+            if ancestor.tag == "form":
+                return ancestor
+        return None
+
+    @property
+    def next_sibling(self) -> Optional[FakeElement]:
+        if self.parent is None:
+            return None
+        siblings = [c for c in self.parent.children if isinstance(c, FakeElement)]
+        index = siblings.index(self)
+        return siblings[index + 1] if index + 1 < len(siblings) else None
+
+    @property
+    def options(self) -> List[FakeElement]:
+        return [e for e in self.elements() if e.tag == "option"]
+
+    @property
+    def is_hidden(self) -> bool:
+        """Checks if this element itself (not considering its ancestors) is hidden"""
+        if self.tag in HIDDEN_ELEMENTS or "hidden" in self.attributes:
+            return True
+        if self.tag == "input" and self.attributes.get("type") == "hidden":
+            return True
+        style = re.sub(r"\s+", "", self.attributes.get("style", "")).lower()
+        return "display:none" in style.split(";")
+
+    @property
+    def disabled(self) -> bool:
+        """Checks if this form control matches :disabled, which includes controls in a disabled fieldset"""
+        if "disabled" in self.attributes:
+            return True
+        if self.tag not in FORM_CONTROLS:
+            return False
+        child = self
+        for ancestor in self.ancestors():
+            if ancestor.tag == "fieldset" and "disabled" in ancestor.attributes:
+                # except for the contents of its first legend
+                legends = [
+                    c
+                    for c in ancestor.children
+                    if isinstance(c, FakeElement) and c.tag == "legend"
+                ]
+                if not legends or legends[0] is not child:
+                    return True
+            child = ancestor
+        return False
+
+    @property
+    def displayed(self) -> bool:
+        if self.tag == "option":
+            return True
+        return not any(e.is_hidden for e in [self] + list(self.ancestors()))
+
+    def text_content(self) -> str:
+        return "".join(
+            child if isinstance(child, str) else child.text_content()
+            for child in self.children
+        )
+
+    def visible_text(self) -> str:
+        """Approximates the rendered text of this element, i.e. innerText"""
+        if not self.displayed:
+            return ""
+
+        def collect(element: FakeElement) -> str:
+            if element.is_hidden:
+                return ""
+            return "".join(
+                child if isinstance(child, str) else collect(child)
+                for child in element.children
+            )
+
+        return re.sub(r"\s+", " ", collect(self)).strip()
+
+    def get_property(self, name: str) -> Any:
+        if name == "value":
+            if self.tag == "select":
+                selected = [o for o in self.options if o.selected]
+                return selected[0].value if selected else ""
+            return self.value
+        if name == "checked":
+            return self.checked
+        if name == "selected":
+            return self.selected
+        if name == "tagName":
+            return self.tag.upper()
+        if name in BOOLEAN_ATTRIBUTES:
+            return name in self.attributes
+        return self.attributes.get(name)
+
+    def get_dom_attribute(self, name: str) -> Optional[str]:
+        if name not in self.attributes:
+            return None
+        if name in BOOLEAN_ATTRIBUTES:
+            return "true"
+        return self.attributes[name]
+
+    def get_attribute(self, name: str) -> Optional[str]:
+        """Implements the semantics of selenium's getAttribute atom"""
+        if name in ("value", "checked", "selected"):
+            value = self.get_property(name)
+            if isinstance(value, bool):
+                return "true" if value else None
+            return value
+        return self.get_dom_attribute(name)
+
+    def matches(self, compound: List[Tuple[str, str, Optional[str]]]) -> bool:
+        """Checks if this element matches a compound css selector"""
+        for kind, name, value in compound:
+            if kind == "tag" and name not in ("*", self.tag):
+                return False
+            if kind == "id" and self.attributes.get("id") != name:
+                return False
+            if kind == "class" and name not in self.attributes.get("class", "").split():
+                return False
+            if kind == "attribute":
+                if name not in self.attributes:
+                    return False
+                if value is not None and self.attributes[name] != value:
+                    return False
+        return True
+
+
+class _DocumentParser(HTMLParser):
+    def __init__(self, root: FakeElement) -> None:
+        super().__init__(convert_charrefs=True)
+        self.stack = [root]
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        parent = self.stack[-1]
+        element = FakeElement(tag, {k: v or "" for (k, v) in attrs}, parent)
+        parent.children.append(element)
+        if tag not in VOID_ELEMENTS:
+            self.stack.append(element)
+
+    def handle_startendtag(
+        self, tag: str, attrs: List[Tuple[str, Optional[str]]]
+    ) -> None:
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.stack.pop()
+
+    def handle_endtag(self, tag: str) -> None:
+        for index in range(len(self.stack) - 1, 0, -1):
+            if self.stack[index].tag == tag:
+                del self.stack[index:]
+                return
+
+    def handle_data(self, data: str) -> None:
+        self.stack[-1].children.append(data)
+
+
+class FakeDocument(object):
+    """A page loaded by the stub"""
+
+    def __init__(self, html: str = "") -> None:
+        self.root = FakeElement("#document", {})
+        parser = _DocumentParser(self.root)
+        parser.feed(html)
+        parser.close()
+
+        # the initial value of textareas is their content
+        for element in self.root.elements():
+            if element.tag == "textarea":
+                element.value = element.text_content()
+            if element.tag == "option" and "value" not in element.attributes:
+                element.value = element.text_content().strip()
+
+    @property
+    def title(self) -> str:
+        for element in self.root.elements():
+            if element.tag == "title":
+                return element.text_content().strip()
+        return ""
+
+    def get_element_by_id(self, id: str) -> Optional[FakeElement]:
+        for element in self.root.elements():
+            if element.attributes.get("id") == id:
+                return element
+        return None
+
+
+#
+# Locators
+#
+
+_COMBINATOR = re.compile(r"\s*>\s*|\s+")
+_SIMPLE_SELECTOR = re.compile(
+    r"""\*|[-\w]+|\#([-\w]+)|\.([-\w]+)"""
+    r"""|\[\s*([-\w]+)\s*(?:=\s*(?:"([^"]*)"|'([^']*)'|([^\]\s]+))\s*)?\]"""
+)
+_XPATH_TEXT = re.compile(
+    r"""^\.?//([-\w*]+)\[normalize-space\(\.\)\s*=\s*(?:"([^"]*)"|'([^']*)')\]$"""
+)
+
+
+def _parse_compound(text: str) -> List[Tuple[str, str, Optional[str]]]:
+    compound = []
+    position = 0
+    while position < len(text):
+        match = _SIMPLE_SELECTOR.match(text, position)
+        if match is None:
+            raise WebDriverError(
+                "invalid selector", "unsupported css selector: {}".format(text)
+            )
+        token = match.group(0)
+        if match.group(1) is not None:
+            compound.append(("id", match.group(1), None))
+        elif match.group(2) is not None:
+            compound.append(("class", match.group(2), None))
+        elif match.group(3) is not None:
+            value = next((v for v in match.group(4, 5, 6) if v is not None), None)
+            compound.append(("attribute", match.group(3), value))
+        else:
+            compound.append(("tag", token.lower(), None))
+        position = match.end()
+    return compound
+
+
+def _matches_selector(
+    element: FakeElement, compounds: List[Any], combinators: List[str]
+) -> bool:
+    if not element.matches(compounds[-1]):
+        return False
+    if len(compounds) == 1:
+        return True
+
+    if combinators[-1] == ">":
+        candidates = [element.parent]
+    else:
+        candidates = list(element.ancestors())
+    return any(
+        candidate is not None
+        and candidate.tag != "#document"
+        and _matches_selector(candidate, compounds[:-1], combinators[:-1])
+        for candidate in candidates
+    )
+
+
+def css_select(root: FakeElement, selector: str) -> List[FakeElement]:
+    """Finds all descendants of root matching a (simple) css selector"""
+
+    groups = []
+    for group in selector.split(","):
+        parts = _COMBINATOR.split(group.strip())
+        combinators = [c.strip() for c in _COMBINATOR.findall(group.strip())]
+        groups.append(([_parse_compound(p) for p in parts], combinators))
+
+    return [
+        element
+        for element in root.elements()
+        if any(_matches_selector(element, c, s) for (c, s) in groups)
+    ]
+
+
+def locate(root: FakeElement, using: str, value: str) -> List[FakeElement]:
+    """Finds elements using a WebDriver location strategy"""
+
+    if using == "css selector":
+        return css_select(root, value)
+    if using == "tag name":
+        return [e for e in root.elements() if e.tag == value.lower()]
+    if using in ("link text", "partial link text"):
+        return [
+            e
+            for e in root.elements()
+            if e.tag == "a"
+            and (
+                e.visible_text() == value
+                if using == "link text"
+                else value in e.visible_text()
+            )
+        ]
+    if using == "xpath":
+        # only the kind of expression used by selenium's Select helper is supported
+        match = _XPATH_TEXT.match(value)
+        if match is None:
+            raise WebDriverError(
+                "invalid selector", "unsupported xpath expression: {}".format(value)
+            )
+        tag = match.group(1)
+        text = match.group(2) if match.group(2) is not None else match.group(3)
+        return [
+            e
+            for e in root.elements()
+            if tag in ("*", e.tag)
+            and re.sub(r"\s+", " ", e.text_content()).strip() == text
+        ]
+    raise WebDriverError("invalid argument", "unknown strategy: {}".format(using))
+
+
+#
+# Sessions
+#
+
+
+class Response(object):
+    """A response received by the stub when fetching a url"""
+
+    def __init__(
+        self, url: str, status: int, headers: List[Tuple[str, str]], body: bytes
+    ) -> None:
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+class StubSession(object):
+    """The state of a single fake browser"""
+
+    def __init__(self, server: StubWebDriverServer) -> None:
+        self.server = server
+        self.id = uuid.uuid4().hex
+        # commands of different sessions run at the same time, like in separate browsers
+        self.lock = threading.RLock()
+        self.window_handle: Optional[str] = "window-" + uuid.uuid4().hex
+        self.url = "about:blank"
+        self.document = FakeDocument()
+        self.elements: Dict[str, FakeElement] = {}
+        self.cookies: Dict[str, Dict[str, Any]] = {}
+        self.timeouts = {"implicit": 0, "pageLoad": 300000, "script": 30000}
+        self.rect = {"x": 0, "y": 0, "width": 1024, "height": 768}
+        self.downloads: Dict[str, bytes] = {}
+        self.connections: Dict[Tuple[str, int], HTTPConnection] = {}
+        self.page_load_strategy = "normal"
+
+        # global variables set by scripts, until the next page is shown
+        self.window: Dict[str, Any] = {}
+
+        # the pages shown in all other windows, by handle
+        self.windows: Dict[str, Dict[str, Any]] = {}
+
+    # elements
+
+    def reference(self, element: FakeElement) -> Dict[str, str]:
+        self.elements[element.id] = element
+        return {ELEMENT_KEY: element.id}
+
+    def element(self, element_id: str) -> FakeElement:
+        element = self.elements.get(element_id)
+        if element is None:
+            raise WebDriverError("no such element", "unknown element reference")
+        if element is not self.document.root and self.document.root not in list(
+            element.ancestors()
+        ):
+            raise WebDriverError(
+                "stale element reference", "element is not attached to the page"
+            )
+        return element
+
+    def encode(self, value: Any) -> Any:
+        """Encodes the result of a script"""
+        if isinstance(value, FakeElement):
+            return self.reference(value)
+        if isinstance(value, (list, tuple)):
+            return [self.encode(v) for v in value]
+        if isinstance(value, dict):
+            return {k: self.encode(v) for (k, v) in value.items()}
+        return value
+
+    def decode(self, value: Any) -> Any:
+        """Decodes the arguments of a script"""
+        if isinstance(value, dict):
+            if ELEMENT_KEY in value:
+                return self.element(value[ELEMENT_KEY])
+            return {k: self.decode(v) for (k, v) in value.items()}
+        if isinstance(value, list):
+            return [self.decode(v) for v in value]
+        return value
+
+    # navigation
+
+    def fetch(
+        self,
+        method: str,
+        url: str,
+        body: Optional[bytes] = None,
+        content_type: Optional[str] = None,
+    ) -> Response:
+        """Makes a request like the browser would, sending and storing cookies and following redirects"""
+
+        for _ in range(20):
+            parts = urlsplit(url)
+            path = parts.path or "/"
+            if parts.query:
+                path += "?" + parts.query
+
+            headers = {}
+            cookie = "; ".join(
+                "{}={}".format(c["name"], c["value"])
+                for c in self.cookies.values()
+                if path.startswith(c.get("path") or "/")
+            )
+            if cookie:
+                headers["Cookie"] = cookie
+            if body is not None:
+                headers["Content-Type"] = content_type
+                headers["Referer"] = self.url
+
+            response, data = self.request(
+                (parts.hostname, parts.port), method, path, body, headers
+            )
+            response_headers = response.getheaders()
+
+            for name, value in response_headers:
+                if name.lower() == "set-cookie":
+                    self.store_cookie(value)
+
+            location = response.getheader("Location")
+            if response.status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                if response.status not in (307, 308):
+                    method, body = "GET", None
+                continue
+
+            return Response(url, response.status, response_headers, data)
+
+        raise WebDriverError("unknown error", "too many redirects")
+
+    def request(
+        self,
+        address: Tuple[str, int],
+        method: str,
+        path: str,
+        body: Optional[bytes],
+        headers: Dict[str, str],
+    ) -> Tuple[HTTPResponse, bytes]:
+        """Makes a single request, keeping the connection alive like a browser does"""
+
+        while True:
+            connection = self.connections.get(address)
+            reused = connection is not None
+            if connection is None:
+                connection = HTTPConnection(*address, timeout=30)
+                self.connections[address] = connection
+
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+            except (ConnectionError, HTTPException):
+                # the server may have closed an idle connection; retry once on a new one
+                self.close_connection(address)
+                if reused:
+                    continue
+                raise
+
+            if response.will_close:
+                self.close_connection(address)
+            return response, data
+
+    def close_connection(self, address: Tuple[str, int]) -> None:
+        connection = self.connections.pop(address, None)
+        if connection is not None:
+            connection.close()
+
+    def store_cookie(self, header: str) -> None:
+        for name, morsel in SimpleCookie(header).items():
+            expires = morsel["expires"]
+            expired = morsel["max-age"] == "0" or (
+                expires
+                and email.utils.parsedate_to_datetime(expires).timestamp() < time.time()
+            )
+            if expired:
+                self.cookies.pop(name, None)
+                continue
+            self.cookies[name] = {
+                "name": name,
+                "value": morsel.value,
+                "path": morsel["path"] or "/",
+                "domain": urlsplit(self.url).hostname,
+                "secure": bool(morsel["secure"]),
+                "httpOnly": bool(morsel["httponly"]),
+                "sameSite": morsel["samesite"] or "Lax",
+            }
+
+    def navigate(self, url: str) -> None:
+        if not url.startswith("http"):
+            self.show(url, "")
+            return
+        response = self.fetch("GET", url)
+        self.show(response.url, response.body.decode("utf8", "replace"))
+
+    def show(self, url: str, html: str) -> None:
+        self.url = url
+        self.document = FakeDocument(html)
+        self.elements = {}
+        self.window = {}
+
+    # windows
+
+    def new_window(self) -> str:
+        handle = "window-" + uuid.uuid4().hex
+        self.windows[handle] = {
+            "url": "about:blank",
+            "document": FakeDocument(),
+            "elements": {},
+            "window": {},
+        }
+        return handle
+
+    def switch_window(self, handle: str) -> None:
+        if handle == self.window_handle:
+            return
+        if handle not in self.windows:
+            raise WebDriverError("no such window", "unknown window handle")
+
+        # windows share cookies and connections, but not the page
+        if self.window_handle is not None:
+            self.windows[self.window_handle] = {
+                "url": self.url,
+                "document": self.document,
+                "elements": self.elements,
+                "window": self.window,
+            }
+        for name, value in self.windows.pop(handle).items():
+            setattr(self, name, value)
+        self.window_handle = handle
+
+    def close_window(self) -> None:
+        if self.window_handle is None:
+            raise WebDriverError("no such window", "window was closed")
+        self.window_handle = None
+
+    def window_handles(self) -> List[str]:
+        handles = list(self.windows.keys())
+        if self.window_handle is not None:
+            handles.insert(0, self.window_handle)
+        return handles
+
+    def submit(self, form: FakeElement, submitter: Optional[FakeElement]) -> None:
+        """Submits a form and navigates to the response"""
+
+        method = form.attributes.get("method", "get").lower()
+        action = urljoin(self.url, form.attributes.get("action") or self.url)
+        data = urlencode(form_data(form, submitter))
+
+        if method == "post":
+            response = self.fetch(
+                "POST",
+                action,
+                data.encode("utf8"),
+                "application/x-www-form-urlencoded",
+            )
+        else:
+            response = self.fetch("GET", action.split("?")[0] + "?" + data)
+        self.show(response.url, response.body.decode("utf8", "replace"))
+
+    # interaction
+
+    def page_changed(self) -> None:
+        """Lets the page watched by watch_page() know that it has been changed"""
+        page = self.window.get("__django_selenium_test_page")
+        if page is not None:
+            page["changed"] = True
+
+    def click(self, element: FakeElement) -> None:
+        self.page_changed()
+        if element.tag == "input" and element.attributes.get("type") == "checkbox":
+            element.checked = not element.checked
+        elif element.tag == "input" and element.attributes.get("type") == "radio":
+            form = element.form or self.document.root
+            for other in form.elements():
+                if other.attributes.get("name") == element.attributes.get("name"):
+                    other.checked = False
+            element.checked = True
+        elif element.tag == "option":
+            select = next(a for a in element.ancestors() if a.tag == "select")
+            if "multiple" in select.attributes:
+                element.selected = not element.selected
+            else:
+                for option in select.options:
+                    option.selected = False
+                element.selected = True
+        elif element.form is not None and element.attributes.get("type", "submit") == (
+            "submit"
+        ):
+            if element.tag in ("input", "button"):
+                self.submit(element.form, element)
+
+
+def form_data(
+    form: FakeElement, submitter: Optional[FakeElement] = None
+) -> List[Tuple[str, str]]:
+    """Builds the data set of a form, like FormData does"""
+
+    data = []
+    for element in form.elements():
+        name = element.attributes.get("name")
+        if not name or "disabled" in element.attributes:
+            continue
+        kind = element.attributes.get("type", "text")
+        if element.tag == "input":
+            if kind in ("checkbox", "radio"):
+                if element.checked:
+                    data.append((name, element.attributes.get("value", "on")))
+            elif kind in ("submit", "button", "image", "reset", "file"):
+                if element is submitter:
+                    data.append((name, element.value))
+            else:
+                data.append((name, element.value))
+        elif element.tag == "textarea":
+            data.append((name, element.value))
+        elif element.tag == "select":
+            options = element.options
+            selected = [o for o in options if o.selected]
+            if not selected and options and "multiple" not in element.attributes:
+                selected = options[:1]
+            data.extend((name, o.value) for o in selected)
+    return data
+
+
+#
+# Scripts
+#
+
+
+def _script_is_displayed(session: StubSession, script: str, args: List[Any]) -> Any:
+    return args[0].displayed
+
+
+def _script_get_attribute(session: StubSession, script: str, args: List[Any]) -> Any:
+    return args[0].get_attribute(args[1])
+
+
+def _script_reset(session: StubSession, script: str, args: List[Any]) -> Any:
+    # there is no storage, only check the origin
+    parts = urlsplit(session.url)
+    return "{}://{}".format(parts.scheme, parts.netloc) == args[0]
+
+
+def _script_mark_page(session: StubSession, script: str, args: List[Any]) -> Any:
+    session.window["__django_selenium_test_previous_page"] = True
+
+
+def _script_is_marked(session: StubSession, script: str, args: List[Any]) -> Any:
+    return session.window.get("__django_selenium_test_previous_page") is True
+
+
+def _script_watch_page(session: StubSession, script: str, args: List[Any]) -> Any:
+    session.window["__django_selenium_test_page"] = {
+        "url": session.url,
+        "changed": False,
+    }
+
+
+def _script_is_unchanged_page(
+    session: StubSession, script: str, args: List[Any]
+) -> Any:
+    page = session.window.get("__django_selenium_test_page")
+    return page is not None and not page["changed"] and page["url"] == session.url
+
+
+def _script_next_sibling(session: StubSession, script: str, args: List[Any]) -> Any:
+    return args[0].next_sibling
+
+
+def _script_set_value(session: StubSession, script: str, args: List[Any]) -> Any:
+    args[0].value = args[1]
+    session.page_changed()
+
+
+def _script_remove_required(session: StubSession, script: str, args: List[Any]) -> Any:
+    for element in session.document.root.elements():
+        if element.tag in ("input", "select"):
+            element.attributes.pop("required", None)
+
+
+def _locate_first(
+    session: StubSession, using: str, value: str
+) -> Optional[FakeElement]:
+    """Finds an element like the locate() function of injected scripts"""
+    if using == "id":
+        using, value = "css selector", '[id="{}"]'.format(value)
+    elif using == "name":
+        using, value = "css selector", '[name="{}"]'.format(value)
+    elif using == "class name":
+        using, value = "css selector", ".{}".format(value)
+    elif using not in ("xpath", "link text", "partial link text"):
+        using = "css selector"
+
+    elements = locate(session.document.root, using, value)
+    return elements[0] if elements else None
+
+
+def _script_snapshot(session: StubSession, script: str, args: List[Any]) -> Any:
+    locators, attributes = args
+    results = []
+    for using, value in locators:
+        element = _locate_first(session, using, value)
+        if element is None:
+            results.append(None)
+            continue
+        displayed = element.displayed
+        results.append(
+            [
+                displayed,
+                element.visible_text() if displayed else "",
+                {name: element.get_attribute(name) for name in attributes},
+            ]
+        )
+    return results
+
+
+def _script_wait(session: StubSession, script: str, args: List[Any]) -> Any:
+    conditions, mode, timeout = args
+
+    matched = []
+    elements = []
+    for using, value, kind, text, negate in conditions:
+        element = _locate_first(session, using, value)
+        ok = False
+        if element is not None:
+            if kind == "exists":
+                ok = True
+            elif kind == "displayed":
+                ok = element.displayed
+            elif kind == "contains":
+                ok = text in element.visible_text()
+            elif kind == "clickable":
+                ok = element.displayed and not element.disabled
+        if negate:
+            ok = not ok
+        matched.append(ok)
+        elements.append(element if ok else None)
+
+    if (any if mode == "any" else all)(matched):
+        return [matched, elements]
+
+    # nothing changes the fake DOM while waiting
+    time.sleep(timeout / 1000)
+    return None
+
+
+def _script_fill_out_form(session: StubSession, script: str, args: List[Any]) -> Any:
+    keys, dropdowns, checkboxes, values = args
+    document = session.document
+    session.page_changed()
+
+    errors = []
+    fields = []
+    for group in (keys, dropdowns, checkboxes, values):
+        found = []
+        for id, value in group.items():
+            element = document.get_element_by_id(id)
+            if element is None:
+                errors.append(
+                    "Unable to locate element with id {}".format(json.dumps(id))
+                )
+            found.append((element, value))
+        fields.append(found)
+    if errors:
+        return errors
+    keys, dropdowns, checkboxes, values = fields
+
+    for element, value in keys + values:
+        element.value = value
+
+    for select, value in dropdowns:
+        options = select.options
+        multiple = "multiple" in select.attributes
+        if multiple:
+            for option in options:
+                option.selected = False
+        if value is None:
+            continue
+
+        if isinstance(value, str):
+            matches = [
+                o
+                for o in options
+                if re.sub(r"\s+", " ", o.text_content()).strip()
+                == re.sub(r"\s+", " ", value).strip()
+            ]
+        else:
+            matches = [o for o in options if o.value in value]
+        if not matches:
+            errors.append(
+                "Cannot locate option {} in select with id {}".format(
+                    json.dumps(value), json.dumps(select.attributes.get("id"))
+                )
+            )
+            continue
+
+        if not multiple:
+            for option in options:
+                option.selected = False
+            matches = matches[:1]
+        for option in matches:
+            option.selected = True
+
+    for checkbox, value in checkboxes:
+        checkbox.checked = value
+
+    return errors
+
+
+def _script_intercept_xhr(session: StubSession, script: str, args: List[Any]) -> Any:
+    *args, stream, timeout = args
+
+    if "arguments[0].form" in script:
+        form = args[0].form
+        action = urljoin(session.url, form.attributes.get("action") or session.url)
+        response = session.fetch(
+            "POST",
+            action,
+            urlencode(form_data(form)).encode("utf8"),
+            "application/x-www-form-urlencoded",
+        )
+    else:
+        response = session.fetch("GET", urljoin(session.url, args[0]))
+
+    result = {
+        "ok": response.status == 200,
+        "status": response.status,
+        "headers": "".join(
+            "{}: {}\r\n".format(name.lower(), value)
+            for (name, value) in response.headers
+        ),
+        "data": None,
+    }
+    if stream:
+        key = "download-{}".format(len(session.downloads) + 1)
+        session.downloads[key] = response.body
+        result.update(key=key, size=len(response.body))
+    else:
+        result["data"] = _data_url(response.body)
+    return result
+
+
+def _script_read_download(session: StubSession, script: str, args: List[Any]) -> Any:
+    key, offset, size = args
+    return _data_url(session.downloads[key][offset : offset + size])
+
+
+def _script_delete_download(session: StubSession, script: str, args: List[Any]) -> Any:
+    session.downloads.pop(args[0], None)
+
+
+def _data_url(data: bytes) -> str:
+    return "data:application/octet-stream;base64," + base64.b64encode(data).decode(
+        "ascii"
+    )
+
+
+#
+# Server
+#
+
+
+class StubWebDriverServer(ThreadingHTTPServer):
+    """
+    A WebDriver server running in a background thread of the current process.
+    Every request received is counted in request_count.
+    """
+
+    daemon_threads = True
+
+    _instance: Optional[StubWebDriverServer] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), StubRequestHandler)
+        self.url = "http://127.0.0.1:{}".format(self.server_address[1])
+        self.sessions: Dict[str, StubSession] = {}
+        self.lock = threading.RLock()
+        self.request_count = 0
+
+        # handlers for scripts, by a substring of the script
+        self.scripts: List[Tuple[str, ScriptHandler]] = [
+            ("/* isDisplayed */", _script_is_displayed),
+            ("/* getAttribute */", _script_get_attribute),
+            ("/* django_selenium_test:snapshot */", _script_snapshot),
+            ("/* django_selenium_test:wait */", _script_wait),
+            ("/* django_selenium_test:fill_out_form */", _script_fill_out_form),
+            ("/* django_selenium_test:intercept_xhr */", _script_intercept_xhr),
+            ("/* django_selenium_test:read_download */", _script_read_download),
+            ("/* django_selenium_test:reset */", _script_reset),
+            ("/* django_selenium_test:watch_page */", _script_watch_page),
+            (
+                "/* django_selenium_test:is_unchanged_page */",
+                _script_is_unchanged_page,
+            ),
+            ("delete window.django_selenium_test_downloads", _script_delete_download),
+            ("__django_selenium_test_previous_page = true", _script_mark_page),
+            ("__django_selenium_test_previous_page === true", _script_is_marked),
+            ("arguments[0].nextElementSibling", _script_next_sibling),
+            ("arguments[0].value = arguments[1];", _script_set_value),
+            ("removeAttribute('required')", _script_remove_required),
+        ]
+
+    @classmethod
+    def instance(cls) -> StubWebDriverServer:
+        """Returns the server of this process, starting it if needed"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                server = cls()
+                thread = threading.Thread(target=server.serve_forever, daemon=True)
+                thread.start()
+                cls._instance = server
+            return cls._instance
+
+    def close_connections(self) -> None:
+        """Closes all connections kept alive by any session"""
+        with self.lock:
+            sessions = list(self.sessions.values())
+        for session in sessions:
+            with session.lock:
+                for address in list(session.connections.keys()):
+                    session.close_connection(address)
+
+    def register_script(self, pattern: str, handler: ScriptHandler) -> None:
+        """Handles scripts containing pattern using handler, before any other handler"""
+        with self.lock:
+            self.scripts.insert(0, (pattern, handler))
+
+    def run_script(self, session: StubSession, script: str, args: List[Any]) -> Any:
+        for pattern, handler in self.scripts:
+            if pattern in script:
+                return session.encode(handler(session, script, session.decode(args)))
+        return None
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: StubWebDriverServer
+
+    # headers and body are written separately, so don't let them wait for an ACK
+    disable_nagle_algorithm = True
+
+    # routes as (method, path pattern, handler name)
+    routes = [
+        ("POST", r"/session", "new_session"),
+        ("DELETE", r"/session/(?P<sid>[^/]+)", "delete_session"),
+        ("GET", r"/session/(?P<sid>[^/]+)/timeouts", "get_timeouts"),
+        ("POST", r"/session/(?P<sid>[^/]+)/timeouts", "set_timeouts"),
+        ("POST", r"/session/(?P<sid>[^/]+)/url", "navigate"),
+        ("GET", r"/session/(?P<sid>[^/]+)/url", "get_url"),
+        ("POST", r"/session/(?P<sid>[^/]+)/refresh", "refresh"),
+        ("GET", r"/session/(?P<sid>[^/]+)/title", "get_title"),
+        ("GET", r"/session/(?P<sid>[^/]+)/source", "get_source"),
+        ("GET", r"/session/(?P<sid>[^/]+)/screenshot", "get_screenshot"),
+        ("GET", r"/session/(?P<sid>[^/]+)/window", "get_window"),
+        ("POST", r"/session/(?P<sid>[^/]+)/window", "switch_window"),
+        ("DELETE", r"/session/(?P<sid>[^/]+)/window", "close_window"),
+        ("POST", r"/session/(?P<sid>[^/]+)/window/new", "new_window"),
+        ("GET", r"/session/(?P<sid>[^/]+)/window/handles", "get_window_handles"),
+        ("GET", r"/session/(?P<sid>[^/]+)/window/rect", "get_window_rect"),
+        ("POST", r"/session/(?P<sid>[^/]+)/window/rect", "set_window_rect"),
+        ("POST", r"/session/(?P<sid>[^/]+)/element", "find_element"),
+        ("POST", r"/session/(?P<sid>[^/]+)/elements", "find_elements"),
+        (
+            "POST",
+            r"/session/(?P<sid>[^/]+)/element/(?P<eid>\w+)/element",
+            "find_element",
+        ),
+        (
+            "POST",
+            r"/session/(?P<sid>[^/]+)/element/(?P<eid>\w+)/elements",
+            "find_elements",
+        ),
+        ("GET", r"/session/(?P<sid>[^/]+)/element/(?P<eid>\w+)/text", "element_text"),
+        ("GET", r"/session/(?P<sid>[^/]+)/element/(?P<eid>\w+)/name", "element_name"),
+        (
+            "GET",
+            r"/session/(?P<sid>[^/]+)/element/(?P<eid>\w+)/displayed",
+            "element_displayed",
+        ),
+        (
+            "GET",
+            r"/session/(?P<sid>[^/]+)/element/(?P<eid>\w+)/enabled",
+            "element_enabled",
+        ),
+        (
+            "GET",
+            r"/session/(?P<sid>[^/]+)/element/(?P<eid>\w+)/selected",
+            "element_selected",
+        ),
+        (
+            "GET",
+            r"/session/(?P<sid>[^/]+)/element/(?P<eid>\w+)/attribute/(?P<name>[^/]+)",
+            "element_attribute",
+        ),
+        (
+            "GET",
+            r"/session/(?P<sid>[^/]+)/element/(?P<eid>\w+)/property/(?P<name>[^/]+)",
+            "element_property",
+        ),
+        (
+            "GET",
+            r"/session/(?P<sid>[^/]+)/element/(?P<eid>\w+)/css/(?P<name>[^/]+)",
+            "element_css",
+        ),
+        ("GET", r"/session/(?P<sid>[^/]+)/element/(?P<eid>\w+)/rect", "element_rect"),
+        (
+            "POST",
+            r"/session/(?P<sid>[^/]+)/element/(?P<eid>\w+)/click",
+            "element_click",
+        ),
+        (
+            "POST",
+            r"/session/(?P<sid>[^/]+)/element/(?P<eid>\w+)/clear",
+            "element_clear",
+        ),
+        ("POST", r"/session/(?P<sid>[^/]+)/element/(?P<eid>\w+)/value", "element_keys"),
+        ("POST", r"/session/(?P<sid>[^/]+)/execute/sync", "execute"),
+        ("POST", r"/session/(?P<sid>[^/]+)/execute/async", "execute"),
+        ("GET", r"/session/(?P<sid>[^/]+)/cookie", "get_cookies"),
+        ("POST", r"/session/(?P<sid>[^/]+)/cookie", "add_cookie"),
+        ("DELETE", r"/session/(?P<sid>[^/]+)/cookie", "delete_cookies"),
+        ("GET", r"/session/(?P<sid>[^/]+)/cookie/(?P<name>[^/]+)", "get_cookie"),
+        ("DELETE", r"/session/(?P<sid>[^/]+)/cookie/(?P<name>[^/]+)", "delete_cookie"),
+        ("POST", r"/session/(?P<sid>[^/]+)/actions", "ignore"),
+        ("DELETE", r"/session/(?P<sid>[^/]+)/actions", "ignore"),
+    ]
+    compiled_routes = [
+        (method, re.compile(pattern + "$"), name) for (method, pattern, name) in routes
+    ]
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self.dispatch("GET")
+
+    def do_POST(self) -> None:
+        self.dispatch("POST")
+
+    def do_DELETE(self) -> None:
+        self.dispatch("DELETE")
+
+    def dispatch(self, method: str) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        status = 200
+        try:
+            params = json.loads(body) if body else {}
+            path = urlsplit(self.path).path.rstrip("/")
+            for route_method, pattern, name in self.compiled_routes:
+                match = pattern.match(path)
+                if route_method == method and match is not None:
+                    break
+            else:
+                raise WebDriverError(
+                    "unknown command", "{} {}".format(method, self.path)
+                )
+
+            with self.server.lock:
+                self.server.request_count += 1
+                kwargs = match.groupdict()
+                lock = self.server.lock
+                if "sid" in kwargs:
+                    session = self.server.sessions.get(kwargs.pop("sid"))
+                    if session is None:
+                        raise WebDriverError("invalid session id", "unknown session")
+                    kwargs["session"] = session
+                    lock = session.lock
+            with lock:
+                value = getattr(self, name)(params, **kwargs)
+        except WebDriverError as e:
+            status = ERROR_STATUS.get(e.error, 500)
+            value = {"error": e.error, "message": e.message, "stacktrace": ""}
+        except Exception as e:
+            status = 500
+            value = {"error": "unknown error", "message": repr(e), "stacktrace": ""}
+
+        data = json.dumps({"value": value}).encode("utf8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    # sessions
+
+    def new_session(self, params: Dict[str, Any]) -> Any:
+        session = StubSession(self.server)
+        requested = params.get("capabilities", {}).get("alwaysMatch", {})
+        session.page_load_strategy = requested.get("pageLoadStrategy", "normal")
+        self.server.sessions[session.id] = session
+        return {
+            "sessionId": session.id,
+            "capabilities": {
+                "browserName": "stub",
+                "browserVersion": "1.0",
+                "platformName": "any",
+                "pageLoadStrategy": session.page_load_strategy,
+                "timeouts": session.timeouts,
+            },
+        }
+
+    def delete_session(self, params: Dict[str, Any], session: StubSession) -> Any:
+        with self.server.lock:
+            del self.server.sessions[session.id]
+        for address in list(session.connections.keys()):
+            session.close_connection(address)
+
+    def get_timeouts(self, params: Dict[str, Any], session: StubSession) -> Any:
+        return session.timeouts
+
+    def set_timeouts(self, params: Dict[str, Any], session: StubSession) -> Any:
+        session.timeouts.update(
+            {k: v for (k, v) in params.items() if k in session.timeouts}
+        )
+
+    # navigation
+
+    def navigate(self, params: Dict[str, Any], session: StubSession) -> Any:
+        if session.page_load_strategy != "none":
+            session.navigate(params["url"])
+            return
+
+        # return right away, and show the page a little later
+        def navigate_later():
+            with session.lock:
+                session.navigate(params["url"])
+
+        timer = threading.Timer(0.05, navigate_later)
+        timer.daemon = True
+        timer.start()
+
+    def get_url(self, params: Dict[str, Any], session: StubSession) -> Any:
+        return session.url
+
+    def refresh(self, params: Dict[str, Any], session: StubSession) -> Any:
+        session.navigate(session.url)
+
+    def get_title(self, params: Dict[str, Any], session: StubSession) -> Any:
+        return session.document.title
+
+    def get_source(self, params: Dict[str, Any], session: StubSession) -> Any:
+        return session.document.root.text_content()
+
+    def get_screenshot(self, params: Dict[str, Any], session: StubSession) -> Any:
+        return SCREENSHOT
+
+    # windows
+
+    def get_window(self, params: Dict[str, Any], session: StubSession) -> Any:
+        return session.window_handle
+
+    def get_window_handles(self, params: Dict[str, Any], session: StubSession) -> Any:
+        return session.window_handles()
+
+    def new_window(self, params: Dict[str, Any], session: StubSession) -> Any:
+        return {"handle": session.new_window(), "type": params.get("type") or "tab"}
+
+    def switch_window(self, params: Dict[str, Any], session: StubSession) -> Any:
+        session.switch_window(params["handle"])
+
+    def close_window(self, params: Dict[str, Any], session: StubSession) -> Any:
+        session.close_window()
+        return session.window_handles()
+
+    def get_window_rect(self, params: Dict[str, Any], session: StubSession) -> Any:
+        return session.rect
+
+    def set_window_rect(self, params: Dict[str, Any], session: StubSession) -> Any:
+        session.rect.update({k: v for (k, v) in params.items() if v is not None})
+        return session.rect
+
+    # elements
+
+    def find_elements(
+        self,
+        params: Dict[str, Any],
+        session: StubSession,
+        eid: Optional[str] = None,
+    ) -> Any:
+        root = session.element(eid) if eid is not None else session.document.root
+        return [
+            session.reference(e) for e in locate(root, params["using"], params["value"])
+        ]
+
+    def find_element(
+        self,
+        params: Dict[str, Any],
+        session: StubSession,
+        eid: Optional[str] = None,
+    ) -> Any:
+        elements = self.find_elements(params, session, eid)
+        if not elements:
+            raise WebDriverError(
+                "no such element",
+                "Unable to locate element: {}".format(params["value"]),
+            )
+        return elements[0]
+
+    def element_text(
+        self, params: Dict[str, Any], session: StubSession, eid: str
+    ) -> Any:
+        return session.element(eid).visible_text()
+
+    def element_name(
+        self, params: Dict[str, Any], session: StubSession, eid: str
+    ) -> Any:
+        return session.element(eid).tag
+
+    def element_displayed(
+        self, params: Dict[str, Any], session: StubSession, eid: str
+    ) -> Any:
+        return session.element(eid).displayed
+
+    def element_enabled(
+        self, params: Dict[str, Any], session: StubSession, eid: str
+    ) -> Any:
+        return not session.element(eid).disabled
+
+    def element_selected(
+        self, params: Dict[str, Any], session: StubSession, eid: str
+    ) -> Any:
+        element = session.element(eid)
+        return element.selected if element.tag == "option" else element.checked
+
+    def element_attribute(
+        self, params: Dict[str, Any], session: StubSession, eid: str, name: str
+    ) -> Any:
+        return session.element(eid).get_dom_attribute(name)
+
+    def element_property(
+        self, params: Dict[str, Any], session: StubSession, eid: str, name: str
+    ) -> Any:
+        return session.element(eid).get_property(name)
+
+    def element_css(
+        self, params: Dict[str, Any], session: StubSession, eid: str, name: str
+    ) -> Any:
+        element = session.element(eid)
+        if name == "visibility":
+            return "visible" if element.displayed else "hidden"
+        if name == "display":
+            return "block" if element.displayed else "none"
+        return ""
+
+    def element_rect(
+        self, params: Dict[str, Any], session: StubSession, eid: str
+    ) -> Any:
+        session.element(eid)
+        return {"x": 0, "y": 0, "width": 100, "height": 20}
+
+    def element_click(
+        self, params: Dict[str, Any], session: StubSession, eid: str
+    ) -> Any:
+        session.click(session.element(eid))
+
+    def element_clear(
+        self, params: Dict[str, Any], session: StubSession, eid: str
+    ) -> Any:
+        session.element(eid).value = ""
+        session.page_changed()
+
+    def element_keys(
+        self, params: Dict[str, Any], session: StubSession, eid: str
+    ) -> Any:
+        # special keys (such as ENTER) live in the unicode private use area, and are ignored
+        text = re.sub("[-]", "", params["text"])
+        session.element(eid).value += text
+        session.page_changed()
+
+    # scripts
+
+    def execute(self, params: Dict[str, Any], session: StubSession) -> Any:
+        return self.server.run_script(session, params["script"], params["args"])
+
+    # cookies
+
+    def get_cookies(self, params: Dict[str, Any], session: StubSession) -> Any:
+        return list(session.cookies.values())
+
+    def get_cookie(
+        self, params: Dict[str, Any], session: StubSession, name: str
+    ) -> Any:
+        if name not in session.cookies:
+            raise WebDriverError("no such cookie", name)
+        return session.cookies[name]
+
+    def add_cookie(self, params: Dict[str, Any], session: StubSession) -> Any:
+        # like a real browser, cookies can only be set for the current page
+        if not session.url.startswith("http"):
+            raise WebDriverError("invalid cookie domain", session.url)
+        cookie = dict(params["cookie"])
+        cookie.setdefault("path", "/")
+        cookie.setdefault("domain", urlsplit(session.url).hostname)
+        session.cookies[cookie["name"]] = cookie
+
+    def delete_cookies(self, params: Dict[str, Any], session: StubSession) -> Any:
+        session.cookies.clear()
+
+    def delete_cookie(
+        self, params: Dict[str, Any], session: StubSession, name: str
+    ) -> Any:
+        session.cookies.pop(name, None)
+
+    def ignore(self, params: Dict[str, Any], session: StubSession) -> Any:
+        return None
+
+
+class StubOptions(ArgOptions):
+    @property
+    def default_capabilities(self) -> Dict[str, Any]:
+        return {"browserName": "stub"}
+
+
+def create_stub_driver(page_load_strategy: Optional[str] = None) -> WebDriver:
+    """Creates a new driver connected to the stub server of this process"""
+    server = StubWebDriverServer.instance()
+    options = StubOptions()
+    if page_load_strategy is not None:
+        options.page_load_strategy = page_load_strategy
+    return webdriver.Remote(command_executor=server.url, options=options)
+
+
+def make_stub_driver(
+    args: List[Any], kwargs: Dict[str, Any], page_load_strategy: Optional[str] = None
+) -> Dict[str, Any]:
+    """Makes a new stub driver settings instance"""
+    if page_load_strategy is not None:
+        kwargs.update({"page_load_strategy": page_load_strategy})
+    return {
+        "callable": create_stub_driver,
+        "args": args,
+        "kwargs": kwargs,
+    }